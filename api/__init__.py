@@ -12,6 +12,7 @@ __all__ = {
     "application_router",
     "file_router",
     "statistics_router",
+    "metrics_router",
 }
 from api.v1.hike import router as hike_router
 from api.v1.passage import router as pass_router
@@ -25,3 +26,4 @@ from api.v1.article import router as article_router
 from api.v1.application import router as application_router
 from api.v1.files import router as file_router
 from api.v1.statistics import router as statistics_router
+from api.v1.metrics import router as metrics_router
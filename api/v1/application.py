@@ -3,7 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 
 from core.utils import role_required
-from crud.users import get_user_by_id
+from core.pagination import PageParams
 from db import get_async_session
 from schemas import (
     ApplicationCreate,
@@ -20,7 +20,7 @@ from crud.application import (
     update_application_status,
     get_application,
 )
-from services.email import send_applicant_email
+from services.email import queue_applicant_email
 
 router = APIRouter(prefix="/api", tags=["School Applications"])
 
@@ -38,7 +38,7 @@ async def post_application(
     app_obj = await create_application(session, user.id, payload)
     if app_obj is None:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_409_CONFLICT,
             detail="У вас уже есть активная или одобренная заявка",
         )
     return CreateResponse(
@@ -69,12 +69,11 @@ async def get_my_application(
 )
 async def admin_list(
     status: Optional[str] = None,
-    page: int = 1,
-    limit: int = 20,
+    page: PageParams = Depends(),
     session: AsyncSession = Depends(get_async_session),
     user=Depends(role_required(["admin"])),
 ):
-    apps = await list_applications(session, status=status, page=page, limit=limit)
+    apps, next_cursor = await list_applications(session, page, status=status)
     out = []
     for it in apps:
         out.append(
@@ -87,7 +86,9 @@ async def admin_list(
                 }
             )
         )
-    return CreateResponse(status="success", message="Список заявок", detail=out)
+    return CreateResponse(
+        status="success", message="Список заявок", detail=out, next_cursor=next_cursor
+    )
 
 
 @router.patch(
@@ -99,15 +100,18 @@ async def admin_update(
     session: AsyncSession = Depends(get_async_session),
     user=Depends(role_required(["admin"])),
 ):
-    app_obj = await update_application_status(session, id, payload)
+    app_obj = await get_application(session, id)
     if app_obj is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Application not found"
         )
-    user_data = await get_user_by_id(session, app_obj.user_id)
-    await send_applicant_email(
-        user_data.email, f"{user_data.first_name} {user_data.last_name}"
+    # Письмо коммитится вместе со сменой статуса
+    queue_applicant_email(
+        session,
+        app_obj.user.email,
+        f"{app_obj.user.first_name} {app_obj.user.last_name}",
     )
+    app_obj = await update_application_status(session, id, payload)
 
     return CreateResponse(
         status="success",
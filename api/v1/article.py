@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, UploadFile, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.ratelimit import rate_limit
 from core.utils import role_required, generate_slug, parse_article_form
 from crud.articles import (
     create_new_article,
@@ -15,6 +16,7 @@ from crud.articles import (
     get_article_by_slug,
     get_articles,
 )
+from core.pagination import PageParams
 from db import get_async_session
 from models import UserModel
 from schemas import CreateResponse
@@ -35,14 +37,16 @@ router = APIRouter(prefix="/api", tags=["Article"])
 @router.get("/articles", response_model=CreateResponse[List[ArticlesRead]])
 async def get_article_items(
     status: str | None = Query(None),
+    page: PageParams = Depends(),
     user: UserModel = Depends(role_required(["guest"])),
     session: AsyncSession = Depends(get_async_session),
 ):
-    articles = await get_articles(session, status)
+    articles, next_cursor = await get_articles(session, status, page)
     return CreateResponse(
         status="success",
         message="ok",
         detail=[ArticlesRead.model_validate(article) for article in articles],
+        next_cursor=next_cursor,
     )
 
 
@@ -66,7 +70,11 @@ async def get_article_item(
     )
 
 
-@router.post("/articles", response_model=CreateResponse[ArticleRead])
+@router.post(
+    "/articles",
+    response_model=CreateResponse[ArticleRead],
+    dependencies=[Depends(rate_limit("upload"))],
+)
 async def create_new_article_item(
     cover_file: UploadFile,
     article: ArticleBase = Depends(parse_article_form),
@@ -105,10 +113,8 @@ async def update_article_item(
     user: UserModel = Depends(role_required(["moderator", "admin"])),
     session: AsyncSession = Depends(get_async_session),
 ):
-    article_data = await get_article_by_id(session, article_id)
-
     updated_article_data = await update_article(
-        session, article_data, update_data, user.id
+        session, article_id, update_data, user.id
     )
 
     return CreateResponse(
@@ -1,9 +1,9 @@
 import asyncio
+import logging
+import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, Response, Cookie
 from fastapi.responses import RedirectResponse
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.requests import Request
 from starlette.status import (
@@ -16,6 +16,7 @@ from starlette.status import (
 )
 
 from core.config import settings
+from core.ratelimit import rate_limit
 from core.security import (
     hash_password,
     create_email_verification_token,
@@ -23,20 +24,27 @@ from core.security import (
     verify_password,
     create_access_token,
     create_refresh_token,
+    user_claims,
 )
 from core.utils import role_required, set_auth_cookies
-from crud.tokens import save_token, remove_token, find_token
+from crud.tokens import save_token, remove_token, rotate_token, revoke_token_family
 from crud.users import get_user_by_email_or_username, create_new_user, activate_user
-from db import get_async_session
+from db import get_async_session, get_primary_session
 from models import UserModel
 from schemas import RegisterUser, UserRead, LoginUser, CreateResponse
-from services.email import send_verification_email
+from services.email import queue_verification_email
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
-limiter = Limiter(key_func=get_remote_address)
 
 
-@router.post("/register", status_code=HTTP_201_CREATED, response_model=CreateResponse)
+@router.post(
+    "/register",
+    status_code=HTTP_201_CREATED,
+    response_model=CreateResponse,
+    dependencies=[Depends(rate_limit("register"))],
+)
 async def user_registration(
     user: RegisterUser,
     response: Response,
@@ -44,21 +52,23 @@ async def user_registration(
         get_async_session,
     ),
 ):
-    candidate = await get_user_by_email_or_username(session, user.username, user.email)
-    if candidate:
+    hashed_password = await hash_password(user.password)
+
+    # Письмо попадает в outbox и коммитится вместе с пользователем,
+    # а если username или email заняты — откатывается вместе с ним
+    verify_token = create_email_verification_token(user.username)
+    queue_verification_email(
+        session,
+        user.email,
+        f"{settings.BACKEND_URL}/api/auth/verify?token={verify_token}",
+    )
+    user = await create_new_user(session, user, hashed_password)
+    if user is None:
         raise HTTPException(
             status_code=HTTP_409_CONFLICT,
             detail="User with this username or email already registered.",
         )
 
-    hashed_password = hash_password(user.password)
-    user = await create_new_user(session, user, hashed_password)
-
-    verify_token = create_email_verification_token(user.username)
-    await send_verification_email(
-        user.email, f"{settings.BACKEND_URL}/api/auth/verify?token={verify_token}"
-    )
-
     return CreateResponse(
         status="success",
         message="Verify your email",
@@ -66,8 +76,12 @@ async def user_registration(
     )
 
 
-@router.post("/login", status_code=HTTP_200_OK, response_model=CreateResponse)
-@limiter.limit("5/minute")
+@router.post(
+    "/login",
+    status_code=HTTP_200_OK,
+    response_model=CreateResponse,
+    dependencies=[Depends(rate_limit("login"))],
+)
 async def user_login(
     user: LoginUser,
     request: Request,
@@ -75,7 +89,7 @@ async def user_login(
     session: AsyncSession = Depends(get_async_session),
 ):
     candidate = await get_user_by_email_or_username(session, user.username, None)
-    if not candidate or not verify_password(user.password, candidate.password):
+    if not candidate or not await verify_password(user.password, candidate.password):
         await asyncio.sleep(1)
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
@@ -83,9 +97,16 @@ async def user_login(
     if not candidate.is_activated:
         raise HTTPException(status_code=HTTP_401_UNAUTHORIZED, detail="Verify email")
 
-    access_token = create_access_token(candidate.username)
-    refresh_token = create_refresh_token(candidate.username)
-    await save_token(session, refresh_token, candidate.id)
+    family = uuid.uuid4()
+    access_token = create_access_token(candidate.username, user_claims(candidate))
+    refresh_token = create_refresh_token(candidate.username, family)
+    await save_token(
+        session,
+        refresh_token,
+        candidate.id,
+        family,
+        device=request.headers.get("user-agent"),
+    )
 
     set_auth_cookies(response, access_token, refresh_token)
 
@@ -127,36 +148,50 @@ async def user_logout(
     )
 
 
-@router.get("/refresh", response_model=CreateResponse)
+@router.get(
+    "/refresh",
+    response_model=CreateResponse,
+    dependencies=[Depends(rate_limit("refresh"))],
+)
 async def token_refresh(
     response: Response,
     refresh_token: str | None = Cookie(default=None),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_primary_session),
 ):
     if not refresh_token:
-        print("refresh token not found")
+        logger.info("Refresh without token")
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED, detail="user unauthorized"
         )
     payload = decode_token(refresh_token)
 
-    if payload.get("type") != "refresh":
-        print("refresh token type not supported")
+    if payload.get("type") != "refresh" or not payload.get("fam"):
+        logger.info("Refresh with unsupported token type")
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED, detail="Invalid token type"
         )
 
-    token_data = await find_token(refresh_token, session)
-    if not token_data:
-        print("refresh token data not found")
+    family = uuid.UUID(payload["fam"])
+    new_refresh_token = create_refresh_token(payload["sub"], family)
+    user_id = await rotate_token(session, refresh_token, new_refresh_token, family)
+    if user_id is None:
+        # Подписанный, но давно заменённый токен — признак кражи, отзываем сессию.
+        # Если сессии уже нет (выход, истечение), это не повторное использование
+        revoked_user_id = await revoke_token_family(session, family)
+        if revoked_user_id is not None:
+            logger.warning(
+                "Refresh token reuse detected, session revoked: "
+                "user_id=%s family=%s",
+                revoked_user_id,
+                family,
+            )
         raise HTTPException(
             status_code=HTTP_401_UNAUTHORIZED, detail="user unauthorized"
         )
 
-    access_token = create_access_token(payload["sub"])
-    refresh_token = create_refresh_token(payload["sub"])
     db_user = await get_user_by_email_or_username(session, payload["sub"], None)
-    await save_token(session, refresh_token, db_user.id)
+    access_token = create_access_token(payload["sub"], user_claims(db_user))
+    refresh_token = new_refresh_token
 
     set_auth_cookies(response, access_token, refresh_token)
 
@@ -179,7 +214,7 @@ async def token_refresh(
 async def user_verify(
     response: Response,
     token: str,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_primary_session),
 ):
     token_payload = decode_token(token)
     if token_payload["type"] != "verify":
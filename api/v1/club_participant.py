@@ -7,6 +7,7 @@ from pydantic import model_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.ratelimit import rate_limit
 from core.utils import role_required, parse_participant_form
 from crud import get_user_by_email_or_username
 from crud.hikes import get_hike_by_id
@@ -57,7 +58,11 @@ async def get_all_hike_participants(
     )
 
 
-@router.post("/participants", response_model=CreateResponse)
+@router.post(
+    "/participants",
+    response_model=CreateResponse,
+    dependencies=[Depends(rate_limit("upload"))],
+)
 async def create_new_hike_participant(
     avatar: UploadFile,
     participant: ClubParticipantBase = Depends(parse_participant_form),
@@ -3,6 +3,7 @@ from uuid import uuid4
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.ratelimit import rate_limit
 from core.utils import role_required
 from db import get_async_session
 from models import UserModel
@@ -12,7 +13,11 @@ from services import s3_client
 router = APIRouter(prefix="/api/upload", tags=["Files"])
 
 
-@router.post("/files", response_model=CreateResponse[str])
+@router.post(
+    "/files",
+    response_model=CreateResponse[str],
+    dependencies=[Depends(rate_limit("upload"))],
+)
 async def upload_file(
     bucket_name: str,
     file: UploadFile,
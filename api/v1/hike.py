@@ -1,18 +1,36 @@
+import gzip
+import hashlib
 import uuid
-from typing import List
+from typing import List, Optional
 import io
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, Path, File, Query
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    UploadFile,
+    Path,
+    File,
+    Query,
+    Request,
+    Response,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from starlette.responses import StreamingResponse
 
 from core.config import settings
+from core.geometry import GEOMETRY_FORMAT_VERSION, zoom_tolerance
+from core.gpx import convert_gpx
+from core.ratelimit import rate_limit
 from core.utils import (
     role_required,
-    gpx_to_geojson,
     parse_hike_form,
     generate_slug,
     parse_update_hike_form,
+    negotiate_media_type,
+    accepts_encoding,
+    etag_matches,
 )
 from crud.hikes import (
     get_all_hikes,
@@ -20,47 +38,163 @@ from crud.hikes import (
     get_hike_by_id,
     delete_hike_by_id,
     get_hike_by_slug,
+    get_hike_geometry,
+    get_hike_geometry_body,
+    get_hike_geometry_level,
     update_hike,
 )
+from crud.loaders import HIKE_CARD, HIKE_LIST
+from core.pagination import PageParams
 from db import get_async_session
 from models import UserModel
-from schemas import HikeBase, CreateResponse, HikeRead, HikesRead, HikeUpdate
+from schemas import (
+    HikeBase,
+    CreateResponse,
+    HikeRead,
+    HikesRead,
+    HikeUpdate,
+)
 from services import s3_client
 
 router = APIRouter(prefix="/api/archive", tags=["Hikes"])
 
+# Форматы /hikes/{id}/geometry и их media types, первый — по умолчанию
+GEOMETRY_MEDIA_TYPES = {
+    "geojson": ("application/geo+json", "application/json"),
+    "polyline": ("application/vnd.tkirbis30.polyline+json",),
+}
+
+
+def geometry_tolerance(
+    zoom: Optional[int] = Query(
+        None, ge=0, le=22, description="Масштаб карты, по нему выбирается детализация"
+    ),
+    tolerance: Optional[float] = Query(
+        None, gt=0, description="Допуск упрощения трека в метрах, важнее zoom"
+    ),
+) -> Optional[float]:
+    if tolerance is not None:
+        return tolerance
+    if zoom is not None:
+        return zoom_tolerance(zoom)
+    return None
+
 
 @router.get("/hikes", response_model=CreateResponse[List[HikesRead]])
 async def get_hikes(
     status: str | None = Query(None),
+    page: PageParams = Depends(),
     user: UserModel = Depends(role_required(["guest"])),
     session: AsyncSession = Depends(get_async_session),
 ):
-    hikes = await get_all_hikes(session, status)
+    hikes, next_cursor = await get_all_hikes(session, status, page)
 
     return CreateResponse(
         status="success",
         message="ok",
         detail=[HikesRead.model_validate(hike) for hike in hikes],
+        next_cursor=next_cursor,
     )
 
 
 @router.get("/hikes/{identification}", response_model=CreateResponse[HikeRead])
 async def get_hike_id(
     identification: str,
+    tolerance: Optional[float] = Depends(geometry_tolerance),
     user: UserModel = Depends(role_required(["guest"])),
     session: AsyncSession = Depends(get_async_session),
 ):
-
+    # С допуском исходный трек не нужен: вместо него отдаётся уровень
+    profile = HIKE_CARD if tolerance is None else HIKE_LIST
     if identification.isdigit():
-        hike = await get_hike_by_id(session, int(identification))
+        hike = await get_hike_by_id(session, int(identification), profile)
     else:
-        hike = await get_hike_by_slug(session, identification)
+        hike = await get_hike_by_slug(session, identification, profile)
+    if not hike:
+        raise HTTPException(status_code=404, detail="Hike not found")
+
+    if tolerance is not None:
+        geometry = await get_hike_geometry(session, hike.id, tolerance)
+        set_committed_value(hike, "geojson_data", geometry)
+    detail = HikeRead.model_validate(hike)
 
     return CreateResponse(
         status="success",
         message="ok",
-        detail=HikeRead.model_validate(hike),
+        detail=detail,
+    )
+
+
+@router.get(
+    "/hikes/{hike_id}/geometry",
+    responses={
+        200: {
+            "content": {
+                media_type: {}
+                for media_types in GEOMETRY_MEDIA_TYPES.values()
+                for media_type in media_types
+            },
+            "description": "FeatureCollection трека, уровень и число точек"
+            " — в заголовках X-Geometry-Tolerance и X-Geometry-Points",
+        },
+        304: {"description": "Не изменилось с ETag из If-None-Match"},
+        406: {"description": "Ни один формат не подходит под Accept"},
+    },
+)
+async def get_hike_geometry_item(
+    request: Request,
+    hike_id: int,
+    format: Optional[str] = Query(
+        None,
+        pattern="^(geojson|polyline)$",
+        description="Формат ответа, важнее заголовка Accept",
+    ),
+    tolerance: Optional[float] = Depends(geometry_tolerance),
+    user: UserModel = Depends(role_required(["guest"])),
+    session: AsyncSession = Depends(get_async_session),
+):
+    body_format = format or negotiate_media_type(
+        request.headers.get("accept"), GEOMETRY_MEDIA_TYPES
+    )
+    if body_format is None:
+        raise HTTPException(status_code=406, detail="Unsupported media type")
+    route_s3_key, tolerance_m = await get_hike_geometry_level(
+        session, hike_id, tolerance or 0.0
+    )
+
+    # Тела хранятся сжатыми: клиент без gzip получает распакованное
+    encoding = (
+        "gzip"
+        if accepts_encoding(request.headers.get("accept-encoding"), "gzip")
+        else "identity"
+    )
+    # Новый GPX получает новый route_s3_key, так что ETag меняется вместе с ним
+    version = (
+        f"{route_s3_key}:{tolerance_m:g}:{body_format}:{encoding}"
+        f":{GEOMETRY_FORMAT_VERSION}"
+    )
+    etag = f'"{hashlib.sha256(version.encode()).hexdigest()[:32]}"'
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept, Accept-Encoding",
+        "Cache-Control": "private, no-cache",
+        "X-Geometry-Tolerance": f"{tolerance_m:g}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body, points = await get_hike_geometry_body(
+        session, hike_id, tolerance_m, body_format
+    )
+    headers["X-Geometry-Points"] = str(points)
+    if encoding == "gzip":
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(
+        content=body,
+        media_type=GEOMETRY_MEDIA_TYPES[body_format][0],
+        headers=headers,
     )
 
 
@@ -73,7 +207,11 @@ async def delete_hike(
     await delete_hike_by_id(session, hike_id)
 
 
-@router.post("/hikes", response_model=CreateResponse[HikeRead])
+@router.post(
+    "/hikes",
+    response_model=CreateResponse[HikeRead],
+    dependencies=[Depends(rate_limit("upload"))],
+)
 async def create_new_hike_report(
     report_file: UploadFile,
     gpx_file: UploadFile,
@@ -86,14 +224,14 @@ async def create_new_hike_report(
 
     gpx_bytes = await gpx_file.read()
     report_bytes = await report_file.read()
-    geojson_data = gpx_to_geojson(gpx_bytes)
+    gpx = await convert_gpx(gpx_bytes)
 
     try:
         async with session.begin():
             hike.slug = generate_slug(hike.name)
             hike.report_s3_key = report_s3_filename
             hike.route_s3_key = gpx_s3_filename
-            new_hike = await create_new_hike(session, hike, geojson_data, user.id)
+            new_hike = await create_new_hike(session, hike, gpx, user.id)
 
             await session.commit()
 
@@ -132,7 +270,7 @@ async def get_hike_file(
     session: AsyncSession = Depends(get_async_session),
     user: UserModel = Depends(role_required(["guest"])),
 ):
-    hike = await get_hike_by_id(session, hike_id)
+    hike = await get_hike_by_id(session, hike_id, HIKE_LIST)
     if not hike:
         raise HTTPException(status_code=404, detail="Hike not found")
 
@@ -160,7 +298,11 @@ async def get_hike_file(
     )
 
 
-@router.patch("/hikes/{hike_id}", response_model=CreateResponse[HikeRead])
+@router.patch(
+    "/hikes/{hike_id}",
+    response_model=CreateResponse[HikeRead],
+    dependencies=[Depends(rate_limit("upload"))],
+)
 async def update_hike_item(
     hike_id: int,
     update_data: HikeUpdate = Depends(parse_update_hike_form),
@@ -171,7 +313,7 @@ async def update_hike_item(
 ):
     report_s3_filename = None
     gpx_s3_filename = None
-    geojson_data = None
+    gpx = None
     if report_file:
         report_bytes = await report_file.read()
         report_s3_filename = f"{uuid.uuid4()}.pdf"
@@ -187,12 +329,12 @@ async def update_hike_item(
         if not gpx_file.filename.lower().endswith(".gpx"):
             raise HTTPException(status_code=400, detail="Only GPX files are allowed")
 
-        if gpx_file.size > 10 * 1024 * 1024:
+        if gpx_file.size > settings.GPX_MAX_SIZE_MB * 1024 * 1024:
             raise HTTPException(status_code=400, detail="File too large")
 
         gpx_s3_filename = f"{uuid.uuid4()}.gpx"
         gpx_bytes = await gpx_file.read()
-        geojson_data = gpx_to_geojson(gpx_bytes)
+        gpx = await convert_gpx(gpx_bytes)
 
         await s3_client.upload_bytes(
             gpx_bytes,
@@ -202,15 +344,13 @@ async def update_hike_item(
             "attachment",
         )
 
-    hike_data = await get_hike_by_id(session, hike_id)
-
     updated_hike_data = await update_hike(
         session,
-        hike_data,
+        hike_id,
         update_data,
         gpx_s3_filename,
         report_s3_filename,
-        geojson_data,
+        gpx,
         user.id,
     )
 
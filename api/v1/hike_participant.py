@@ -1,24 +1,29 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile
 from pydantic import model_validator
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.utils import role_required
+from core.config import settings
+from core.ratelimit import rate_limit
+from core.utils import parse_participants_csv, role_required
 from crud import get_user_by_email_or_username
-from crud.hikes import get_hike_by_id
-from crud.participants import create_hike_participant, get_hike_participants
-from crud.users import get_user_by_id
+from crud.participants import add_hike_participants, get_hike_participants
 from db import get_async_session
 from models import UserModel
-from schemas import HikeParticipantBase, CreateResponse, UserRead
+from schemas import (
+    HikeParticipantBase,
+    HikeParticipantImportResult,
+    CreateResponse,
+    UserRead,
+)
 from schemas.users import UserHikeParticipant
 
 router = APIRouter(prefix="/api/archive", tags=["Archive"])
 
 
 @router.get(
-    "/hikes/{hikes_id}/participants",
+    "/hikes/{hike_id}/participants",
     response_model=CreateResponse[List[UserHikeParticipant]],
 )
 async def get_all_hike_participants(
@@ -38,30 +43,52 @@ async def get_all_hike_participants(
     )
 
 
-@router.post("/participants", response_model=CreateResponse)
+def _import_response(
+    results: List[HikeParticipantImportResult],
+) -> CreateResponse[List[HikeParticipantImportResult]]:
+    added = sum(result.status == "added" for result in results)
+    return CreateResponse(
+        status="success",
+        message=f"Participants added: {added} of {len(results)}",
+        detail=results,
+    )
+
+
+@router.post(
+    "/participants",
+    response_model=CreateResponse[List[HikeParticipantImportResult]],
+)
 async def create_new_hike_participants(
-    participants: List[HikeParticipantBase],  # теперь список
+    participants: List[HikeParticipantBase],
     user: UserModel = Depends(role_required(["admin"])),
     session: AsyncSession = Depends(get_async_session),
 ):
-    added = []
-    for participant in participants:
-        hike = await get_hike_by_id(session, participant.hike_id)
-        user_obj = await get_user_by_id(session, participant.user_id)
+    if len(participants) > settings.PARTICIPANTS_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many rows, limit is {settings.PARTICIPANTS_IMPORT_MAX_ROWS}",
+        )
 
-        if not hike or not user_obj:
-            continue  # можно собирать ошибки отдельно
+    results = await add_hike_participants(
+        session, {row: p for row, p in enumerate(participants, start=1)}
+    )
+    return _import_response(results)
 
-        await create_hike_participant(
-            session, participant.hike_id, participant.user_id, participant.role
-        )
-        added.append(f"Hike {hike.id} -> User {user_obj.id}")
 
-    if not added:
-        raise HTTPException(status_code=404, detail="No valid participants found")
+@router.post(
+    "/participants/csv",
+    response_model=CreateResponse[List[HikeParticipantImportResult]],
+    dependencies=[Depends(rate_limit("upload"))],
+)
+async def import_hike_participants_csv(
+    file: UploadFile,
+    user: UserModel = Depends(role_required(["admin"])),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Загрузка архивных составов походов: CSV с колонками hike_id, user_id, role.
 
-    return CreateResponse(
-        status="success",
-        message="Participants added",
-        detail=added,
-    )
+    Номер строки в ответе — номер строки файла, заголовок — строка 1.
+    """
+    participants, invalid = parse_participants_csv(await file.read())
+    results = await add_hike_participants(session, participants)
+    return _import_response(sorted(results + invalid, key=lambda r: r.row))
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+
+from core.cache import principal_cache, verified_token_cache
+from core.gpx import gpx_metrics
+from core.security import password_metrics
+from core.utils import role_required
+from db import db_helper
+from models import UserModel
+from schemas import CreateResponse
+
+router = APIRouter(prefix="/api", tags=["Admin"])
+
+
+@router.get("/metrics", response_model=CreateResponse[dict])
+async def get_runtime_metrics(
+    user: UserModel = Depends(role_required(["admin"])),
+):
+    """Метрики процесса: пулы, кэши и очереди"""
+    return CreateResponse(
+        status="success",
+        message="ok",
+        detail={
+            "password_hashing": password_metrics.snapshot(),
+            "gpx_processing": gpx_metrics.snapshot(),
+            "principal_cache": principal_cache.stats(),
+            "jwt_cache": verified_token_cache.stats(),
+            "database": db_helper.pool_stats(),
+            "replicas": db_helper.replica_stats(),
+        },
+    )
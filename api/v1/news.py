@@ -2,10 +2,11 @@ import uuid
 from pathlib import Path
 from typing import List
 
-from fastapi import APIRouter, Depends, UploadFile, Query
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.ratelimit import rate_limit
 from core.utils import role_required, generate_slug, parse_news_form
 
 from crud.news import (
@@ -16,11 +17,14 @@ from crud.news import (
     update_news,
     create_new_news,
 )
+from core.pagination import PageParams
 from db import get_async_session
+from enums import ItemStatus
 from models import UserModel
 from schemas import CreateResponse
-from schemas import NewsBase, NewsUpdate, NewsReadList, NewsRead
+from schemas import NewsBase, NewsUpdate, NewsReadList, NewsRead, NewsletterJobRead
 from services import s3_client
+from services.newsletter import get_newsletter_job, job_snapshot, queue_newsletter
 
 content_type_map = {
     "jpg": "image/jpeg",
@@ -33,18 +37,22 @@ content_type_map = {
 router = APIRouter(prefix="/api", tags=["News"])
 
 
-@router.get("/news", response_model=CreateResponse[List[NewsReadList]])
+@router.get(
+    "/news",
+    response_model=CreateResponse[List[NewsReadList]],
+    dependencies=[Depends(rate_limit("news_list"))],
+)
 async def get_article_items(
     status: str | None = Query(None),
-    limit: int | None = Query(None, ge=0, le=100, description="Сколько статей вернуть"),
-    offset: int | None = Query(None, ge=0, description="Сколько статей пропустить"),
+    page: PageParams = Depends(),
     session: AsyncSession = Depends(get_async_session),
 ):
-    news_data = await get_news(session, limit=limit, offset=offset, status=status)
+    news_data, next_cursor = await get_news(session, status, page)
     return CreateResponse(
         status="success",
         message="ok",
         detail=[NewsReadList.model_validate(news) for news in news_data],
+        next_cursor=next_cursor,
     )
 
 
@@ -68,7 +76,11 @@ async def get_article_item(
     )
 
 
-@router.post("/news", response_model=CreateResponse[NewsReadList])
+@router.post(
+    "/news",
+    response_model=CreateResponse[NewsReadList],
+    dependencies=[Depends(rate_limit("upload"))],
+)
 async def create_new_news_item(
     cover_file: UploadFile,
     news: NewsBase = Depends(parse_news_form),
@@ -107,9 +119,7 @@ async def update_news_item(
     user: UserModel = Depends(role_required(["moderator", "admin"])),
     session: AsyncSession = Depends(get_async_session),
 ):
-    news_data = await get_news_by_id(session, news_id)
-
-    updated_news_data = await update_news(session, news_data, update_data, user.id)
+    updated_news_data = await update_news(session, news_id, update_data, user.id)
 
     return CreateResponse(
         status="succes",
@@ -125,3 +135,48 @@ async def delete_news_item(
     session: AsyncSession = Depends(get_async_session),
 ):
     await delete_news_by_id(session, news_id)
+
+
+@router.post(
+    "/news/{news_id}/newsletter",
+    status_code=202,
+    response_model=CreateResponse[NewsletterJobRead],
+)
+async def send_news_newsletter(
+    news_id: int,
+    user: UserModel = Depends(role_required(["admin"])),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Запускает рассылку опубликованной новости всем участникам клуба"""
+    news = await get_news_by_id(session, news_id)
+    if news.status != ItemStatus.PUBLISHED:
+        raise HTTPException(status_code=400, detail="News is not published")
+    job = await queue_newsletter(session, news_id)
+    if job is None:
+        raise HTTPException(status_code=409, detail="Newsletter is already running")
+
+    return CreateResponse(
+        status="success",
+        message="Newsletter started",
+        detail=NewsletterJobRead(**job_snapshot(job)),
+    )
+
+
+@router.get(
+    "/news/newsletters/{job_id}",
+    response_model=CreateResponse[NewsletterJobRead],
+)
+async def get_newsletter_progress(
+    job_id: int,
+    user: UserModel = Depends(role_required(["admin"])),
+    session: AsyncSession = Depends(get_async_session),
+):
+    job = await get_newsletter_job(session, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Newsletter job not found")
+
+    return CreateResponse(
+        status="success",
+        message="ok",
+        detail=NewsletterJobRead(**job_snapshot(job)),
+    )
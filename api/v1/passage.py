@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.utils import role_required, generate_slug
 from crud.additional import get_pass_hikes
+from core.pagination import PageParams
 from db import get_async_session
 from models import UserModel
 from schemas import CreateResponse, PassBase, PassRead, HikesRead, PassUpdate
@@ -22,14 +23,16 @@ router = APIRouter(prefix="/api/archive", tags=["Passes"])
 @router.get("/passes", response_model=CreateResponse[List[PassRead]])
 async def get_passes(
     status: str | None = Query(None),
+    page: PageParams = Depends(),
     session: AsyncSession = Depends(get_async_session),
     user: UserModel = Depends(role_required(["guest"])),
 ):
-    passes = await get_all_passes(session, status)
+    passes, next_cursor = await get_all_passes(session, status, page)
     return CreateResponse(
         status="success",
         message="ok",
         detail=[PassRead.model_validate(pass_stmt) for pass_stmt in passes],
+        next_cursor=next_cursor,
     )
 
 
@@ -87,8 +90,7 @@ async def update_pass_item(
     session: AsyncSession = Depends(get_async_session),
     user: UserModel = Depends(role_required(["moderator", "admin"])),
 ):
-    db_pass = await get_pass_by_id(session, pass_id)
-    updated_pass = await update_pass(session, db_pass, data, user.id)
+    updated_pass = await update_pass(session, pass_id, data, user.id)
 
     return CreateResponse(
         status="success",
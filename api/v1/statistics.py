@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import settings
+
 from core.utils import role_required
 from db import get_async_session
 from models import UserModel
-from crud.statistics import get_admin_statistics_data
+from crud.statistics import (
+    get_admin_statistics_data,
+    get_statistics_timeseries,
+    timeseries_periods,
+)
 from schemas import CreateResponse
-from schemas.statistics import StatisticsDetail
+from schemas.statistics import StatisticsDetail, StatisticsTimeseries
 
 router = APIRouter(prefix="/api", tags=["Admin"])
 
@@ -24,3 +33,43 @@ async def get_admin_statistics(
         message="Statistics retrieved successfully",
         detail=data,
     )
+
+
+# Диапазон по умолчанию для каждого шага
+DEFAULT_RANGES = {
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=26),
+    "month": timedelta(days=365),
+}
+
+
+@router.get(
+    "/statistics/timeseries", response_model=CreateResponse[StatisticsTimeseries]
+)
+async def get_admin_statistics_timeseries(
+    interval: Literal["day", "week", "month"] = Query("day"),
+    start: Optional[date] = Query(None, description="Первый день, UTC"),
+    end: Optional[date] = Query(None, description="Последний день, UTC"),
+    user: UserModel = Depends(role_required(["admin"])),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Регистрации, заявки по статусам, походы по дате начала и опубликованные
+    новости и статьи по дням, неделям или месяцам"""
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - DEFAULT_RANGES[interval]
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    max_points = settings.STATISTICS_TIMESERIES_MAX_POINTS
+    # Грубая отсечка до построения списка периодов
+    if (end - start).days > max_points * 31 or (
+        len(timeseries_periods(start, end, interval)) > max_points
+    ):
+        raise HTTPException(status_code=400, detail="Range is too long")
+
+    data = await get_statistics_timeseries(session, interval, start, end)
+
+    return CreateResponse(
+        status="success",
+        message="Statistics retrieved successfully",
+        detail=data,
+    )
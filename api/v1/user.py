@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from core.ratelimit import rate_limit
 from core.utils import role_required
 from crud.users import (
     get_users,
@@ -19,6 +20,7 @@ from crud.users import (
     unban_user_by_id,
     update_admin_user,
 )
+from core.pagination import PageParams
 from db import get_async_session
 from models import UserModel
 from schemas import CreateResponse, UserRead, UserUpdate
@@ -30,15 +32,17 @@ router = APIRouter(prefix="/api", tags=["User"])
 
 @router.get("/users", response_model=CreateResponse[List[UserRead]])
 async def get_all_users(
+    page: PageParams = Depends(),
     session: AsyncSession = Depends(get_async_session),
     user: UserModel = Depends(role_required(["admin"])),
 ):
-    users = await get_users(session)
+    users, next_cursor = await get_users(session, page)
 
     return CreateResponse(
         status="success",
         message="ok",
         detail=[UserRead.model_validate(user) for user in users],
+        next_cursor=next_cursor,
     )
 
 
@@ -47,6 +51,9 @@ async def read_profile(
     user: UserModel = Depends(role_required(["guest"])),
     session: AsyncSession = Depends(get_async_session),
 ):
+    if not isinstance(user, UserModel):
+        # В режиме AUTH_FAST_MODE приходит только principal из токена
+        user = await get_user_by_id(session, user.id)
     return CreateResponse(
         status="success",
         message="ok",
@@ -78,7 +85,11 @@ async def delete_user(
     deleted_user = await delete_user_by_id(session, user_id)
 
 
-@router.post("/upload/avatar", response_model=CreateResponse[UserRead])
+@router.post(
+    "/upload/avatar",
+    response_model=CreateResponse[UserRead],
+    dependencies=[Depends(rate_limit("upload"))],
+)
 async def upload_avatar(
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_async_session),
@@ -114,9 +125,7 @@ async def update_user_item(
     user: UserModel = Depends(role_required(["guest"])),
     session: AsyncSession = Depends(get_async_session),
 ):
-    user_data = await get_user_by_id(session, user.id)
-
-    updated_user_data = await update_user(session, user_data, update_data)
+    updated_user_data = await update_user(session, user.id, update_data)
 
     return CreateResponse(
         status="succes",
@@ -152,9 +161,7 @@ async def update_user_item(
     user: UserModel = Depends(role_required(["admin"])),
     session: AsyncSession = Depends(get_async_session),
 ):
-    user_data = await get_user_by_id(session, user_id)
-
-    updated_user_data = await update_admin_user(session, user_data, update_data)
+    updated_user_data = await update_admin_user(session, user_id, update_data)
 
     return CreateResponse(
         status="succes",
@@ -0,0 +1,130 @@
+"""Записей в секунду: старый путь (SELECT, commit, refresh) против RETURNING.
+
+Создаёт и обновляет новости обоими способами и печатает скорость и число
+запросов к базе на одну операцию. Созданные строки удаляются в конце.
+Нужна база с применёнными миграциями; лучше отдельная, не рабочая.
+
+Запуск: python -m benchmarks.crud_writes
+"""
+
+import asyncio
+import logging
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from core.utils import generate_slug
+from crud.news import create_new_news, update_news
+from db import db_helper
+from db.querycount import track_queries
+from models import NewsModel, UserModel
+from schemas import NewsBase, NewsUpdate
+
+ROUNDS = 500
+PREFIX = "bench-writes-"
+
+
+async def legacy_create(session, news: NewsBase, user_id: int):
+    new_news = NewsModel(
+        title=news.title,
+        slug=news.slug,
+        summary=news.summary,
+        created_by=user_id,
+        updated_by=user_id,
+    )
+    session.add(new_news)
+    await session.commit()
+    await session.refresh(new_news)
+    return new_news
+
+
+async def legacy_update(session, news_id: int, update_data: NewsUpdate, user_id: int):
+    news_data = await session.scalar(select(NewsModel).where(NewsModel.id == news_id))
+    update_data = update_data.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(news_data, field, value)
+    if "title" in update_data:
+        news_data.slug = generate_slug(news_data.title)
+    news_data.updated_by = user_id
+    await session.commit()
+    await session.refresh(news_data)
+    return news_data
+
+
+async def measure(name: str, operation) -> float:
+    with track_queries() as stats:
+        started = time.perf_counter()
+        for i in range(ROUNDS):
+            await operation(i)
+        elapsed = time.perf_counter() - started
+    print(
+        f"{name:24} {ROUNDS / elapsed:8.1f} writes/s"
+        f"  {stats.count / ROUNDS:4.1f} queries/write"
+    )
+    return ROUNDS / elapsed
+
+
+async def main():
+    # Повторы одного запроса здесь ожидаемы, предупреждения о N+1 не нужны
+    logging.getLogger("db.querycount").setLevel(logging.ERROR)
+    session_factory: async_sessionmaker = db_helper.session_factory
+    async with session_factory() as session:
+        user_id = await session.scalar(select(UserModel.id).limit(1))
+    if user_id is None:
+        raise SystemExit("Benchmark needs at least one user in the database")
+
+    created = {"legacy": [], "returning": []}
+
+    def payload(kind: str, i: int) -> NewsBase:
+        title = f"{PREFIX}{kind}-{i}"
+        return NewsBase(title=title, slug=title, summary="benchmark")
+
+    async def create(kind, create_fn, i):
+        # Отдельная сессия на операцию, как в обработчике запроса
+        async with session_factory() as session:
+            news = await create_fn(session, payload(kind, i), user_id)
+            created[kind].append(news.id)
+
+    async def update(kind, update_fn, i):
+        async with session_factory() as session:
+            news_id = created[kind][i]
+            await update_fn(
+                session, news_id, NewsUpdate(title=f"{PREFIX}{kind}-{i}-2"), user_id
+            )
+
+    try:
+        print(f"rounds: {ROUNDS}")
+        results = {
+            "create": (
+                await measure(
+                    "create, refresh", lambda i: create("legacy", legacy_create, i)
+                ),
+                await measure(
+                    "create, returning",
+                    lambda i: create("returning", create_new_news, i),
+                ),
+            ),
+            "update": (
+                await measure(
+                    "update, select+refresh",
+                    lambda i: update("legacy", legacy_update, i),
+                ),
+                await measure(
+                    "update, returning", lambda i: update("returning", update_news, i)
+                ),
+            ),
+        }
+        for name, (before, after) in results.items():
+            print(f"{name} speedup: {after / before:.2f}x")
+    finally:
+        async with session_factory() as session:
+            await session.execute(
+                delete(NewsModel).where(NewsModel.slug.startswith(PREFIX))
+            )
+            await session.commit()
+        await db_helper.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,314 @@
+"""Проверка планов ключевых запросов: ни один не должен уходить в Seq Scan.
+
+Заполняет базу синтетическими данными внутри транзакции, собирает статистику,
+прогоняет запросы из crud/* через EXPLAIN и откатывает транзакцию.
+Нужна база с применёнными миграциями; лучше отдельная, не рабочая.
+
+Запуск: python -m benchmarks.explain_indexes
+Код выхода 1, если хотя бы один запрос читает таблицу последовательно.
+Та же проверка входит в тесты: tests/test_explain_indexes.py.
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import NullPool
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from core.config import settings
+from enums import ItemStatus
+from models import (
+    ApplicationModel,
+    ArticleModel,
+    EmailOutboxModel,
+    HikeModel,
+    HikeParticipantModel,
+    NewsModel,
+    OutboxStatus,
+    PassModel,
+    TokenModel,
+    UserModel,
+    hike_pass_association,
+    rate_limits,
+)
+from models.applications import ApplicationStatus
+
+# Ссылки на только что вставленные строки: последовательности не откатываются,
+# поэтому id отсчитываются от максимального
+REFS = {
+    "users": "(SELECT max(id) FROM users) - g % 20000",
+    "hikes": "(SELECT max(id) FROM hikes) - g % 5000",
+    "passes": "(SELECT max(id) FROM passes) - (g * 7) % 2000",
+}
+
+SEED = [
+    """
+    INSERT INTO users (username, email, password, first_name, last_name,
+                       is_activated, roles, is_banned, created_at)
+    SELECT 'user' || g, 'user' || g || '@example.com', 'x', 'Имя', 'Фамилия',
+           true, ARRAY['guest'], false, now() - g * interval '2 hours'
+    FROM generate_series(1, 20000) g
+    """,
+    """
+    INSERT INTO passes (name, slug, region, complexity, height, longitude,
+                        latitude, status, created_by, updated_by)
+    SELECT 'pass' || g, 'pass-' || g, 'region', '1А', 3000, 42.0, 43.0,
+           CASE WHEN g % 100 = 0 THEN 'DRAFT' ELSE 'PUBLISHED' END::itemstatus,
+           {users}, {users}
+    FROM generate_series(1, 2000) g
+    """,
+    """
+    INSERT INTO hikes (name, slug, tourism_type, complexity, leader_id,
+                       participants_count, route, start_date, end_date,
+                       report_s3_key, route_s3_key, status, created_by)
+    SELECT 'hike' || g, 'hike-' || g, 'горный', '2', {users}, 8, 'route',
+           current_date, current_date, 'r', 'g',
+           CASE WHEN g % 100 = 0 THEN 'DRAFT' ELSE 'PUBLISHED' END::itemstatus,
+           {users}
+    FROM generate_series(1, 5000) g
+    """,
+    """
+    INSERT INTO hike_participants (user_id, hike_id, role)
+    SELECT {users}, {hikes}, 'participant'
+    FROM generate_series(1, 50000) g
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO hike_pass_association (hike_id, pass_id)
+    SELECT {hikes}, {passes}
+    FROM generate_series(1, 10000) g
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO news (title, summary, slug, status, created_by, updated_by,
+                      created_at)
+    SELECT 'news' || g, 'summary', 'news-' || g,
+           CASE WHEN g % 10 = 0 THEN 'DRAFT' ELSE 'PUBLISHED' END::itemstatus,
+           {users}, {users}, now() - g * interval '1 hour'
+    FROM generate_series(1, 20000) g
+    """,
+    """
+    INSERT INTO articles (title, slug, status, author, created_by, updated_by,
+                          created_at)
+    SELECT 'article' || g, 'article-' || g,
+           CASE WHEN g % 100 = 0 THEN 'DRAFT' ELSE 'PUBLISHED' END::itemstatus,
+           'author', {users}, {users}, now() - g * interval '3 hours'
+    FROM generate_series(1, 5000) g
+    """,
+    """
+    INSERT INTO applications (user_id, first_name, last_name, date_of_birth,
+                              email, phone_number, experience, consent, status,
+                              created_at, updated_at)
+    SELECT {users}, 'Имя', 'Фамилия', '2000-01-01', 'a@example.com',
+           '+7', 'нет', true,
+           CASE WHEN g % 100 = 0 THEN 'pending' ELSE 'approved' END
+               ::applicationstatus,
+           now() - g * interval '1 hour', now()
+    FROM generate_series(1, 20000) g
+    """,
+    """
+    INSERT INTO refresh_sessions (token_hash, family, user_id, expires_at)
+    SELECT sha256(g::text::bytea), gen_random_uuid(), {users},
+           now() + (g % 1000 - 5) * interval '1 hour'
+    FROM generate_series(1, 20000) g
+    """,
+    """
+    INSERT INTO email_outbox (subject, recipients, subtype, status, attempts,
+                              next_attempt_at)
+    SELECT 'subject', ARRAY['a@example.com'], 'plain',
+           CASE WHEN g % 200 = 0 THEN 'pending' ELSE 'sent' END::outboxstatus,
+           1, now() - g * interval '1 minute'
+    FROM generate_series(1, 20000) g
+    """,
+    """
+    INSERT INTO rate_limits (key, "window", hits, expires_at)
+    SELECT 'login:' || g, g, 1, now() + (g % 1000 - 5) * interval '1 minute'
+    FROM generate_series(1, 20000) g
+    """,
+]
+
+TABLES = [
+    "users",
+    "passes",
+    "hikes",
+    "hike_participants",
+    "hike_pass_association",
+    "news",
+    "articles",
+    "applications",
+    "refresh_sessions",
+    "email_outbox",
+    "rate_limits",
+]
+
+
+def page(query, keys, after=None):
+    """Запрос страницы так же, как его строит core.pagination.paginate."""
+    if after:
+        query = query.where(tuple_(*keys) < tuple_(*after))
+    return query.order_by(*(key.desc() for key in keys)).limit(21)
+
+
+def key_queries() -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "login by username": select(UserModel).where(UserModel.username == "user77"),
+        "user hike participations": select(HikeParticipantModel).where(
+            HikeParticipantModel.user_id == 77
+        ),
+        "hike participants": select(HikeParticipantModel).where(
+            HikeParticipantModel.hike_id.in_([77])
+        ),
+        "hikes page by status": page(
+            select(HikeModel).where(HikeModel.status == ItemStatus.DRAFT),
+            [HikeModel.start_date, HikeModel.id],
+        ),
+        "hikes page after cursor": page(
+            select(HikeModel),
+            [HikeModel.start_date, HikeModel.id],
+            (now.date(), 77),
+        ),
+        "hike by slug": select(HikeModel).where(HikeModel.slug == "hike-77"),
+        "hikes led by user": select(HikeModel.id).where(HikeModel.leader_id == 77),
+        "hikes of pass": select(hike_pass_association).where(
+            hike_pass_association.c.pass_id == 77
+        ),
+        "news feed": page(
+            select(NewsModel).where(NewsModel.status == ItemStatus.PUBLISHED),
+            [NewsModel.created_at, NewsModel.id],
+        ),
+        "news feed after cursor": page(
+            select(NewsModel).where(NewsModel.status == ItemStatus.PUBLISHED),
+            [NewsModel.created_at, NewsModel.id],
+            (now - timedelta(days=300), 77),
+        ),
+        "news feed, all statuses": page(
+            select(NewsModel), [NewsModel.created_at, NewsModel.id]
+        ),
+        "articles page by status": page(
+            select(ArticleModel).where(ArticleModel.status == ItemStatus.DRAFT),
+            [ArticleModel.created_at, ArticleModel.id],
+            (now - timedelta(days=30), 77),
+        ),
+        "passes page by status": page(
+            select(PassModel).where(PassModel.status == ItemStatus.DRAFT),
+            [PassModel.id],
+            (1000,),
+        ),
+        "users page": page(
+            select(UserModel),
+            [UserModel.created_at, UserModel.id],
+            (now - timedelta(days=300), 77),
+        ),
+        "news by author": select(NewsModel.id).where(NewsModel.created_by == 77),
+        "application of user": select(ApplicationModel).where(
+            ApplicationModel.user_id == 77
+        ),
+        "pending applications": page(
+            select(ApplicationModel).where(
+                ApplicationModel.status == ApplicationStatus.pending
+            ),
+            [ApplicationModel.created_at, ApplicationModel.id],
+        ),
+        "refresh token lookup": select(TokenModel).where(
+            TokenModel.token_hash == hashlib.sha256(b"77").digest()
+        ),
+        "refresh family revoke": delete(TokenModel).where(
+            TokenModel.family == "00000000-0000-0000-0000-000000000077"
+        ),
+        "expired refresh sessions": select(TokenModel.id)
+        .where(TokenModel.expires_at <= func.now())
+        .limit(1000),
+        "outbox pending batch": select(EmailOutboxModel)
+        .where(
+            EmailOutboxModel.status == OutboxStatus.pending,
+            EmailOutboxModel.next_attempt_at <= now,
+        )
+        .order_by(EmailOutboxModel.next_attempt_at)
+        .limit(50),
+        "users registered in 30 days": select(func.count())
+        .select_from(UserModel)
+        .where(UserModel.created_at >= now - timedelta(days=30)),
+        "expired rate limit windows": select(rate_limits.c.key)
+        .where(rate_limits.c.expires_at <= func.now())
+        .limit(1000),
+    }
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+async def explain(conn: AsyncConnection, statement) -> dict:
+    result = await conn.scalar(Explain(statement))
+    if isinstance(result, str):
+        result = json.loads(result)
+    return result[0]["Plan"]
+
+
+async def check_plans() -> list[tuple[str, list[str], str]]:
+    """(запрос, таблицы с Seq Scan, все сканирования плана) по key_queries."""
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    plans = []
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            for statement in SEED:
+                await conn.execute(text(statement.format(**REFS)))
+            for table in TABLES:
+                await conn.execute(text(f"ANALYZE {table}"))
+
+            for name, statement in key_queries().items():
+                nodes = list(plan_nodes(await explain(conn, statement)))
+                seq_scans = [
+                    node["Relation Name"]
+                    for node in nodes
+                    if node["Node Type"] == "Seq Scan"
+                ]
+                scans = ", ".join(
+                    f"{node['Node Type']} {node.get('Index Name') or node.get('Relation Name', '')}".strip()
+                    for node in nodes
+                    if "Scan" in node["Node Type"]
+                )
+                plans.append((name, seq_scans, scans))
+
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+    return plans
+
+
+async def main() -> int:
+    plans = await check_plans()
+    failures = 0
+    for name, seq_scans, scans in plans:
+        status = "FAIL" if seq_scans else "ok"
+        failures += bool(seq_scans)
+        print(f"{status:4}  {name:30}  {scans}")
+
+    print(f"\n{failures} of {len(plans)} queries use a sequential scan")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,167 @@
+"""Разбор GPX: дерево объектов gpxpy против потокового parse_gpx.
+
+Генерирует синтетические треки на 100 тыс. – 1 млн точек и разбирает каждый
+обоими способами, каждый раз в отдельном процессе: печатает время, пик
+памяти сверх уже прочитанного файла (ru_maxrss) и совпадает ли результат.
+
+Запуск: python -m benchmarks.gpx_parse
+Код выхода 1, если результаты разбора различаются.
+"""
+
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import gpxpy
+
+from core.gpx import gpx_to_geojson
+
+POINTS = (100_000, 300_000, 1_000_000)
+POINTS_PER_SEGMENT = 5_000
+WAYPOINTS = 100
+
+
+def legacy_gpx_to_geojson(data: bytes) -> dict:
+    """Прежний путь: gpxpy.parse строит объект на каждую точку."""
+    gpx = gpxpy.parse(io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"))
+    features = []
+    for track in gpx.tracks:
+        segments_coords = []
+        for seg in track.segments:
+            coords = [[p.longitude, p.latitude] for p in seg.points]
+            if len(coords) >= 2:
+                segments_coords.append(coords)
+        if not segments_coords:
+            continue
+        geometry = (
+            {"type": "LineString", "coordinates": segments_coords[0]}
+            if len(segments_coords) == 1
+            else {"type": "MultiLineString", "coordinates": segments_coords}
+        )
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": geometry,
+                "properties": {
+                    "kind": "track",
+                    "name": track.name,
+                    "number": track.number,
+                },
+            }
+        )
+    for w in gpx.waypoints:
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [w.longitude, w.latitude]},
+                "properties": {
+                    "kind": "waypoint",
+                    "name": w.name,
+                    "desc": w.description,
+                    "comment": w.comment,
+                    "symbol": w.symbol,
+                    "elevation": w.elevation,
+                    "time": w.time.isoformat() if w.time else None,
+                },
+            }
+        )
+    for r in gpx.routes:
+        coords = [[p.longitude, p.latitude] for p in r.points]
+        if len(coords) >= 2:
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {"type": "LineString", "coordinates": coords},
+                    "properties": {
+                        "kind": "route",
+                        "name": r.name,
+                        "desc": r.description,
+                    },
+                }
+            )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def write_track(path: str, points: int):
+    started = datetime(2024, 7, 1, 6, tzinfo=timezone.utc)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gpx version="1.1" creator="benchmark"'
+            ' xmlns="http://www.topografix.com/GPX/1/1">\n'
+        )
+        for i in range(WAYPOINTS):
+            f.write(
+                f'<wpt lat="{43 + i / 1000:.6f}" lon="{41 + i / 1000:.6f}">'
+                f"<ele>{1500 + i}</ele><name>Точка {i}</name><sym>Flag</sym></wpt>\n"
+            )
+        f.write("<trk><name>Синтетический трек</name><number>1</number>\n<trkseg>\n")
+        for i in range(points):
+            if i and i % POINTS_PER_SEGMENT == 0:
+                f.write("</trkseg>\n<trkseg>\n")
+            moment = started + timedelta(seconds=i)
+            f.write(
+                f'<trkpt lat="{43 + i * 1e-6:.7f}" lon="{41 + i * 1.3e-6:.7f}">'
+                f"<ele>{1500 + (i % 700) / 10:.1f}</ele>"
+                f"<time>{moment:%Y-%m-%dT%H:%M:%SZ}</time></trkpt>\n"
+            )
+        f.write("</trkseg>\n</trk>\n</gpx>\n")
+
+
+def measure(parser_name: str, path: str, result):
+    parser = {"gpxpy": legacy_gpx_to_geojson, "stream": gpx_to_geojson}[parser_name]
+    with open(path, "rb") as f:
+        data = f.read()
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    geojson = parser(data)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    digest = hashlib.sha256(json.dumps(geojson).encode()).hexdigest()
+    result.put((elapsed, peak / 1024, digest))
+
+
+def run(context, parser_name: str, path: str) -> tuple:
+    # Новый процесс на каждый замер: ru_maxrss не сбрасывается
+    result = context.Queue()
+    process = context.Process(target=measure, args=(parser_name, path, result))
+    process.start()
+    measured = result.get()
+    process.join()
+    return measured
+
+
+def main() -> int:
+    context = multiprocessing.get_context("spawn")
+    mismatches = 0
+    print(f"{'points':>9} {'size MB':>8}  {'parser':6} {'time s':>7} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for points in POINTS:
+            path = os.path.join(tmp, f"track-{points}.gpx")
+            write_track(path, points)
+            size = os.path.getsize(path) / 1024 / 1024
+            digests = set()
+            for parser_name in ("gpxpy", "stream"):
+                elapsed, peak, digest = run(context, parser_name, path)
+                digests.add(digest)
+                print(
+                    f"{points:9} {size:8.1f}  {parser_name:6} {elapsed:7.2f} {peak:8.1f}"
+                )
+            if len(digests) != 1:
+                mismatches += 1
+                print(f"{points:9} results differ")
+            os.remove(path)
+
+    print(f"\n{mismatches} result mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
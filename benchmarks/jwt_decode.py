@@ -0,0 +1,39 @@
+"""Сравнение стоимости decode_token с кэшем проверенных JWT и без него.
+
+Запуск: python -m benchmarks.jwt_decode
+"""
+
+import timeit
+
+from jose import jwt
+
+from core.cache import verified_token_cache
+from core.config import settings
+from core.security import create_access_token, decode_token
+
+ROUNDS = 20_000
+
+
+def main():
+    token = create_access_token(
+        "benchmark", {"uid": 1, "roles": ["guest"], "act": True, "pv": 0}
+    )
+
+    raw = timeit.timeit(
+        lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]),
+        number=ROUNDS,
+    )
+
+    verified_token_cache.clear()
+    decode_token(token)
+    cached = timeit.timeit(lambda: decode_token(token), number=ROUNDS)
+
+    print(f"rounds: {ROUNDS}")
+    print(f"jose decode:   {raw / ROUNDS * 1e6:8.2f} us/op")
+    print(f"cached decode: {cached / ROUNDS * 1e6:8.2f} us/op")
+    print(f"speedup:       {raw / cached:8.1f}x")
+    print(f"cache stats:   {verified_token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Проверка профилей загрузки из crud/loaders.py.
+
+Для каждого профиля вызывает функции crud/*, которые его используют, и
+проверяет три вещи: число SQL-запросов равно заявленному, загружены только
+заявленные связи и столбцы, а схема ответа собирается без обращения к незаявленным
+связям (иначе сработает raiseload). Данные создаются внутри транзакции,
+которая в конце откатывается.
+Нужна база с применёнными миграциями; лучше отдельная, не рабочая.
+
+Запуск: python -m benchmarks.loader_profiles
+Код выхода 1, если хотя бы один профиль грузит больше, чем заявляет.
+Та же проверка входит в тесты: tests/test_loader_profiles.py.
+"""
+
+import asyncio
+import logging
+import sys
+from datetime import date
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import settings
+from core.pagination import PageParams
+from crud.hikes import get_all_hikes, get_hike_by_id
+from crud.loaders import (
+    ADMIN_LIST,
+    AUTH,
+    HIKE_CARD,
+    HIKE_LIST,
+    PROFILE,
+    LoaderProfile,
+)
+from crud.users import get_user_by_email_or_username, get_user_by_id, get_users
+from db.querycount import instrument, track_queries
+from enums import ItemStatus
+from models import ApplicationModel, HikeModel, UserModel
+from schemas import HikeRead, HikesRead, UserRead
+
+PREFIX = "bench-loaders-"
+
+
+def loaded_relationships(obj) -> set[str]:
+    state = inspect(obj)
+    return {
+        relationship.key
+        for relationship in state.mapper.relationships
+        if relationship.key not in state.unloaded
+    }
+
+
+def extra_loads(profile: LoaderProfile, objects: list) -> list[str]:
+    """Связи, загруженные сверх профиля, на корневых и связанных объектах,
+    и отложенные профилем столбцы, которые всё же попали в SELECT."""
+    declared = {relationship.key for relationship in profile.relationships}
+    deferred = {column.key for column in profile.deferred}
+    extra = []
+    for obj in objects:
+        extra += sorted(loaded_relationships(obj) - declared)
+        extra += sorted(deferred - inspect(obj).unloaded)
+        for key in declared & loaded_relationships(obj):
+            related = getattr(obj, key)
+            for item in related if isinstance(related, list) else [related]:
+                if item is not None:
+                    extra += [
+                        f"{key}.{name}" for name in sorted(loaded_relationships(item))
+                    ]
+    return extra
+
+
+async def seed(session: AsyncSession) -> tuple[UserModel, HikeModel]:
+    user = UserModel(
+        username=f"{PREFIX}user",
+        email=f"{PREFIX}user@example.com",
+        password="x",
+        first_name="Ivan",
+        last_name="Petrov",
+        is_activated=True,
+    )
+    session.add(user)
+    await session.flush()
+    # Заявка нужна, чтобы неявная загрузка applications была заметна
+    session.add(
+        ApplicationModel(
+            user_id=user.id,
+            first_name="Ivan",
+            last_name="Petrov",
+            date_of_birth=date(2000, 1, 1),
+            email=user.email,
+            phone_number="+70000000000",
+            experience="none",
+            consent=True,
+        )
+    )
+    hike = HikeModel(
+        name=f"{PREFIX}hike",
+        slug=f"{PREFIX}hike",
+        tourism_type="пеший",
+        complexity="1",
+        route="A - B",
+        start_date=date(2024, 7, 1),
+        end_date=date(2024, 7, 10),
+        participants_count=1,
+        leader_id=user.id,
+        report_s3_key="report",
+        route_s3_key="route",
+        status=ItemStatus.PUBLISHED,
+        created_by=user.id,
+        updated_by=user.id,
+    )
+    session.add(hike)
+    await session.flush()
+    session.expunge_all()
+    return user, hike
+
+
+def cases(user: UserModel, hike: HikeModel) -> list:
+    async def auth(session):
+        return [await get_user_by_email_or_username(session, user.username, None)]
+
+    async def profile(session):
+        return [await get_user_by_id(session, user.id)]
+
+    async def admin_list(session):
+        users, _ = await get_users(session, PageParams(cursor=None, limit=10))
+        return users
+
+    async def hike_card(session):
+        return [await get_hike_by_id(session, hike.id)]
+
+    async def hike_list(session):
+        hikes, _ = await get_all_hikes(session, None, PageParams(cursor=None, limit=10))
+        return hikes
+
+    return [
+        (AUTH, "get_user_by_email_or_username", auth, UserRead),
+        (PROFILE, "get_user_by_id", profile, UserRead),
+        (ADMIN_LIST, "get_users", admin_list, UserRead),
+        (HIKE_CARD, "get_hike_by_id", hike_card, HikeRead),
+        (HIKE_LIST, "get_all_hikes", hike_list, HikesRead),
+    ]
+
+
+async def check_profiles() -> list[tuple[str, str, list[str], int]]:
+    """(профиль, функция crud, найденные проблемы, число запросов) по cases."""
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    instrument(engine)
+    results = []
+    try:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            session = AsyncSession(
+                bind=conn,
+                expire_on_commit=False,
+                join_transaction_mode="create_savepoint",
+            )
+            user, hike = await seed(session)
+
+            for profile, name, load, schema in cases(user, hike):
+                session.expunge_all()
+                problems = []
+                with track_queries(name) as stats:
+                    objects = await load(session)
+                if stats.count != profile.queries:
+                    problems.append(
+                        f"{stats.count} queries, declared {profile.queries}"
+                    )
+                extra = extra_loads(profile, objects)
+                if extra:
+                    problems.append(f"undeclared loads: {', '.join(extra)}")
+                try:
+                    for obj in objects:
+                        schema.model_validate(obj)
+                except Exception as e:
+                    problems.append(f"{schema.__name__}: {type(e).__name__}: {e}")
+                results.append((profile.name, name, problems, stats.count))
+
+            await session.close()
+            await transaction.rollback()
+    finally:
+        await engine.dispose()
+    return results
+
+
+async def main() -> int:
+    logging.getLogger("db.querycount").setLevel(logging.ERROR)
+    results = await check_profiles()
+    failures = 0
+    for profile, name, problems, count in results:
+        status = "FAIL" if problems else "ok"
+        failures += bool(problems)
+        print(
+            f"{status:4}  {profile:10}  {name:30}  "
+            + ("; ".join(problems) or f"{count} queries")
+        )
+
+    print(f"\n{failures} profile checks failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import EmailStr
 from pydantic_settings import BaseSettings
 
@@ -9,18 +11,73 @@ class Settings(BaseSettings):
     PORT: int = 8000
     FRONTEND_URL: str = "http://localhost:3000"
     BACKEND_URL: str = f"http://localhost:{PORT}"
+    PAGE_SIZE_DEFAULT: int = 20
+    PAGE_SIZE_MAX: int = 100
+    PARTICIPANTS_IMPORT_MAX_ROWS: int = 5000
+    # /api/statistics из снимка счётчиков, который обновляется в фоне
+    STATISTICS_COUNTERS: bool = False
+    STATISTICS_REFRESH_INTERVAL_SECONDS: int = 60
+    # Снимок старше этого — статистика считается по таблицам
+    STATISTICS_MAX_STALENESS_SECONDS: int = 300
+    STATISTICS_ROLLUP_INTERVAL_SECONDS: int = 300
+    STATISTICS_TIMESERIES_MAX_POINTS: int = 1000
+    # Разбор GPX в пуле процессов, см. core/gpx.py
+    GPX_WORKERS: int = 2
+    GPX_MAX_PENDING: int = 8
+    GPX_TIMEOUT_SECONDS: float = 30
+    GPX_MEMORY_LIMIT_MB: int = 512
+    GPX_MAX_SIZE_MB: int = 10
+    # Допуски упрощения трека в метрах, по уровню детализации на каждый
+    GPX_LOD_TOLERANCES_M: list[float] = [2, 10, 40, 160, 640]
 
     # --- Database ---
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = False
+    DB_POOL_PREFILL: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_CONNECT_TIMEOUT: float = 10
+    DB_COMMAND_TIMEOUT: Optional[float] = 60
+    DATABASE_REPLICA_URLS: list[str] = []
+    REPLICA_STICKY_SECONDS: int = 5
+    REPLICA_MAX_LAG_SECONDS: float = 10
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 5
+    # Одинаковый запрос столько раз за HTTP-запрос — предупреждение о N+1
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
+    DB_QUERY_STATS_HEADERS: bool = False
 
     # --- JWT settings ---
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRES_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRES_DAYS: int = 7
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 10
     VERIFY_TOKEN_EXPIRES_HOURS: int = 48
+    TOKEN_SWEEP_INTERVAL_SECONDS: int = 600
+    TOKEN_SWEEP_BATCH_SIZE: int = 1000
     COOKIE_SECURE: bool = False
 
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+    JWT_CACHE_MAX_SIZE: int = 4096
+    AUTH_FAST_MODE: bool = False
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # --- Rate limiting ---
+    # memory — token bucket в процессе, postgres — общее окно для всех воркеров
+    RATE_LIMIT_BACKEND: Literal["memory", "postgres"] = "memory"
+    RATE_LIMITS: dict[str, str] = {
+        "login": "5/minute",
+        "register": "5/minute",
+        "refresh": "30/minute",
+        "upload": "30/minute",
+        "news_list": "120/minute",
+    }
+
     # --- Email settings ---
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
@@ -30,6 +87,15 @@ class Settings(BaseSettings):
     MAIL_SERVER: str
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
+    OUTBOX_POLL_INTERVAL_SECONDS: int = 5
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: int = 30
+    OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    NEWSLETTER_CHUNK_SIZE: int = 500
+    NEWSLETTER_SMTP_CONNECTIONS: int = 3
+    NEWSLETTER_JOBS_KEEP: int = 50
+    NEWSLETTER_POLL_INTERVAL_SECONDS: int = 5
 
     # --- S3 settings ---
     S3_ACCESS_KEY: str
@@ -0,0 +1,210 @@
+"""Упрощение линий GeoJSON по Дугласу — Пекеру для уровней детализации (LOD)
+и готовые тела ответа /hikes/{id}/geometry для каждого уровня.
+
+Алгоритм проходит линию один раз и сохраняет для каждой точки «значимость» —
+допуск, начиная с которого точка выбрасывается. Уровень с допуском t — это
+точки со значимостью больше t, результат совпадает с отдельным прогоном
+алгоритма для t. Расстояния считаются в метрах в локальной равнопромежуточной
+проекции, чего для допусков от метров до километров достаточно.
+
+Тела ответа — GeoJSON и тот же FeatureCollection, в котором массивы координат
+линий заменены строками Google encoded polyline. Оба сжаты gzip при записи.
+"""
+
+import gzip
+import json
+import math
+from array import array
+from typing import Optional
+
+EARTH_RADIUS_M = 6_371_008.8
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+# Метров в пикселе тайла 256x256 на экваторе при zoom=0
+METERS_PER_PIXEL_Z0 = 2 * math.pi * 6_378_137 / 256
+# 5 знаков (около 1 м) — точность по умолчанию у декодеров polyline
+POLYLINE_PRECISION = 5
+# Меняется вместе с форматом тел ответа: входит в ETag
+GEOMETRY_FORMAT_VERSION = 1
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """Допуск в метрах для карты с данным zoom: полпикселя на экваторе."""
+    return METERS_PER_PIXEL_Z0 / 2**zoom / 2
+
+
+def _importance(coordinates: list, min_tolerance: float) -> array:
+    count = len(coordinates)
+    importance = array("d", bytes(8 * count))
+    importance[0] = importance[-1] = math.inf
+    if count < 3:
+        return importance
+
+    latitude = sum(point[1] for point in coordinates) / count
+    scale_x = METERS_PER_DEGREE * math.cos(math.radians(latitude))
+    xs = array("d", (point[0] * scale_x for point in coordinates))
+    ys = array("d", (point[1] * METERS_PER_DEGREE for point in coordinates))
+
+    stack = [(0, count - 1, math.inf)]
+    while stack:
+        first, last, parent = stack.pop()
+        if last - first < 2:
+            continue
+        x0, y0 = xs[first], ys[first]
+        dx, dy = xs[last] - x0, ys[last] - y0
+        length = math.hypot(dx, dy)
+        inner_xs, inner_ys = xs[first + 1 : last], ys[first + 1 : last]
+        if length:
+            distances = [
+                abs(dy * (x - x0) - dx * (y - y0)) for x, y in zip(inner_xs, inner_ys)
+            ]
+        else:
+            # Замкнутый участок: расстояние до общей конечной точки
+            length = 1.0
+            distances = [math.hypot(x - x0, y - y0) for x, y in zip(inner_xs, inner_ys)]
+        farthest = max(range(len(distances)), key=distances.__getitem__)
+        distance = distances[farthest] / length
+        if distance <= min_tolerance:
+            continue
+        # Точка не значимее той, что разбила участок до неё
+        index = first + 1 + farthest
+        importance[index] = value = min(distance, parent)
+        stack.append((first, index, value))
+        stack.append((index, last, value))
+    return importance
+
+
+def simplify_line(coordinates: list, tolerances: list[float]) -> list[list]:
+    """Точки линии для каждого допуска из tolerances (в метрах)."""
+    importance = _importance(coordinates, min(tolerances))
+    return [
+        [point for point, value in zip(coordinates, importance) if value > tolerance]
+        for tolerance in tolerances
+    ]
+
+
+def _simplify_geometry(geometry: dict, tolerances: list[float]) -> list[dict]:
+    if geometry["type"] == "LineString":
+        return [
+            {"type": "LineString", "coordinates": coordinates}
+            for coordinates in simplify_line(geometry["coordinates"], tolerances)
+        ]
+    if geometry["type"] == "MultiLineString":
+        lines = [simplify_line(line, tolerances) for line in geometry["coordinates"]]
+        return [
+            {"type": "MultiLineString", "coordinates": [line[i] for line in lines]}
+            for i in range(len(tolerances))
+        ]
+    return [geometry] * len(tolerances)
+
+
+def count_points(geojson: Optional[dict]) -> int:
+    points = 0
+    for feature in (geojson or {}).get("features", []):
+        geometry = feature["geometry"]
+        if geometry["type"] == "Point":
+            points += 1
+        elif geometry["type"] == "LineString":
+            points += len(geometry["coordinates"])
+        elif geometry["type"] == "MultiLineString":
+            points += sum(len(line) for line in geometry["coordinates"])
+    return points
+
+
+def build_lods(geojson: dict, tolerances: list[float]) -> list[dict]:
+    """Уровни детализации FeatureCollection, по строке на допуск.
+
+    Линии треков и маршрутов упрощаются, точки (waypoints) остаются как есть.
+    Уровень — словарь с tolerance_m, points и geojson.
+    """
+    tolerances = sorted(tolerances)
+    if not tolerances:
+        return []
+
+    levels = [[] for _ in tolerances]
+    for feature in geojson["features"]:
+        geometries = _simplify_geometry(feature["geometry"], tolerances)
+        for level, geometry in zip(levels, geometries):
+            level.append({**feature, "geometry": geometry})
+
+    lods = []
+    for tolerance, features in zip(tolerances, levels):
+        lod = {"type": "FeatureCollection", "features": features}
+        lods.append(
+            {"tolerance_m": tolerance, "points": count_points(lod), "geojson": lod}
+        )
+    return lods
+
+
+def encode_polyline(coordinates: list, precision: int = POLYLINE_PRECISION) -> str:
+    """Google encoded polyline; на входе пары [lon, lat], как в GeoJSON."""
+    factor = 10**precision
+    chunks = []
+    previous_lat = previous_lon = 0
+    for longitude, latitude in coordinates:
+        lat = math.floor(latitude * factor + 0.5)
+        lon = math.floor(longitude * factor + 0.5)
+        for delta in (lat - previous_lat, lon - previous_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        previous_lat, previous_lon = lat, lon
+    return "".join(chunks)
+
+
+def _encode_geometry(geometry: dict) -> dict:
+    if geometry["type"] == "LineString":
+        return {**geometry, "coordinates": encode_polyline(geometry["coordinates"])}
+    if geometry["type"] == "MultiLineString":
+        return {
+            **geometry,
+            "coordinates": [encode_polyline(line) for line in geometry["coordinates"]],
+        }
+    return geometry
+
+
+def polyline_collection(geojson: dict) -> dict:
+    return {
+        "type": "FeatureCollection",
+        "encoding": "polyline",
+        "precision": POLYLINE_PRECISION,
+        "features": [
+            {**feature, "geometry": _encode_geometry(feature["geometry"])}
+            for feature in geojson["features"]
+        ],
+    }
+
+
+def _gzip_json(data: dict) -> bytes:
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    # mtime=0: одинаковые данные дают одинаковые байты
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def level_bodies(geojson: dict) -> dict:
+    """Сжатые тела ответа уровня: geojson_gz и polyline_gz."""
+    return {
+        "geojson_gz": _gzip_json(geojson),
+        "polyline_gz": _gzip_json(polyline_collection(geojson)),
+    }
+
+
+def geometry_levels(geojson: dict, tolerances: list[float]) -> list[dict]:
+    """Строки hike_geometries без hike_id: исходный трек и уровни build_lods.
+
+    Исходный трек — уровень с допуском 0. Для каждого уровня хранятся
+    сжатые тела ответа в обоих форматах.
+    """
+    levels = [
+        {"tolerance_m": 0.0, "points": count_points(geojson), "geojson": geojson},
+        *build_lods(geojson, [tolerance for tolerance in tolerances if tolerance > 0]),
+    ]
+    return [
+        {
+            "tolerance_m": level["tolerance_m"],
+            "points": level["points"],
+            **level_bodies(level["geojson"]),
+        }
+        for level in levels
+    ]
@@ -0,0 +1,533 @@
+"""Разбор GPX в GeoJSON и упрощение трека вне event loop.
+
+Файл разбирается потоково (parse_gpx): точки копятся в array('d'), дерево
+объектов gpxpy не строится. Разбор и упрощение держат GIL, поэтому идут в пуле
+процессов, а не потоков. Воркер ограничен по памяти (RLIMIT_AS), задача — по
+времени: по истечении GPX_TIMEOUT_SECONDS таймер SIGALRM с действием по
+умолчанию завершает воркер. Исключение из обработчика сигнала внутри C-парсера
+XML оставляет парсер в неопределённом состоянии, поэтому процесс именно
+завершается. Пул после этого пересоздаётся, а задачи, которые выполнялись в нём
+одновременно с зависшей или ждали очереди, запускаются ещё раз. Таймаутом
+считается только задача, которая сама выполнялась дольше GPX_TIMEOUT_SECONDS:
+время начала каждой задачи воркер пишет в общий с родителем массив.
+"""
+
+import asyncio
+import codecs
+import io
+import math
+import multiprocessing
+import resource
+import signal
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from pyexpat import errors as expat_errors
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Union
+
+from fastapi import HTTPException, status
+from gpxpy.gpxfield import TIME_TYPE
+
+from core.config import settings
+from core.geometry import geometry_levels
+from core.track_metrics import compute_track_metrics
+from core.metrics import TimingStats
+
+
+class GpxInvalid(Exception):
+    pass
+
+
+class GpxMemoryLimit(Exception):
+    pass
+
+
+class GpxProcessingMetrics:
+    def __init__(self):
+        self.pending = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.wait = TimingStats()
+        self.compute = TimingStats()
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": settings.GPX_WORKERS,
+            "max_pending": settings.GPX_MAX_PENDING,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "crashes": self.crashes,
+            "wait": self.wait.snapshot(),
+            "compute": self.compute.snapshot(),
+        }
+
+
+gpx_metrics = GpxProcessingMetrics()
+
+GPX_CHUNK_SIZE = 64 * 1024
+XML_ERROR_NO_MEMORY = expat_errors.codes[expat_errors.XML_ERROR_NO_MEMORY]
+
+_pool: Optional["_WorkerPool"] = None
+# Время начала задачи в воркере, массив _WorkerPool.started
+_job_started = None
+
+
+def _init_worker(memory_limit: int, started):
+    global _job_started
+    _job_started = started
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    signal.signal(signal.SIGALRM, signal.SIG_DFL)
+
+
+def _caused_by_memory(error: BaseException) -> bool:
+    # Парсер XML при отказе в памяти под RLIMIT_AS иногда отдаёт SystemError
+    while error is not None:
+        if isinstance(error, (MemoryError, SystemError)):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _run_job(function, args: tuple, timeout: float, queued_at: float, slot: int):
+    started_at = time.monotonic()
+    _job_started[slot] = started_at
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        result = function(*args)
+    except Exception as e:
+        if _caused_by_memory(e):
+            raise GpxMemoryLimit() from None
+        raise
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+    return result, started_at - queued_at, time.monotonic() - started_at
+
+
+class _WorkerPool:
+    """Пул процессов и слоты времени начала задач.
+
+    Слотов GPX_MAX_PENDING: больше задач _submit в пул не пускает. Часы
+    time.monotonic общие для процессов одной машины, поэтому время начала из
+    воркера сравнимо со временем родителя.
+    """
+
+    def __init__(self):
+        # spawn: форк процесса с работающим event loop и потоками небезопасен
+        context = multiprocessing.get_context("spawn")
+        self.started = context.Array("d", settings.GPX_MAX_PENDING, lock=False)
+        self.free_slots = list(range(settings.GPX_MAX_PENDING))
+        self.executor = ProcessPoolExecutor(
+            max_workers=settings.GPX_WORKERS,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(settings.GPX_MEMORY_LIMIT_MB * 1024 * 1024, self.started),
+        )
+
+
+def _get_pool() -> _WorkerPool:
+    global _pool
+    if _pool is None:
+        _pool = _WorkerPool()
+    return _pool
+
+
+def _discard_pool(pool: _WorkerPool):
+    global _pool
+    if _pool is pool:
+        _pool = None
+    pool.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_gpx_executor():
+    if _pool is not None:
+        _discard_pool(_pool)
+
+
+async def _run_in_pool(function, *args):
+    loop = asyncio.get_running_loop()
+    timeout = settings.GPX_TIMEOUT_SECONDS
+    for attempt in range(2):
+        pool = _get_pool()
+        slot = pool.free_slots.pop()
+        pool.started[slot] = 0.0
+        try:
+            return await loop.run_in_executor(
+                pool.executor,
+                _run_job,
+                function,
+                args,
+                timeout,
+                time.monotonic(),
+                slot,
+            )
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            started_at = pool.started[slot]
+            if started_at and time.monotonic() - started_at >= timeout:
+                gpx_metrics.timeouts += 1
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="GPX processing timed out",
+                )
+            # Задача не начиналась или шла меньше таймаута: пул сломала чужая
+            gpx_metrics.crashes += 1
+        finally:
+            pool.free_slots.append(slot)
+    raise HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="GPX processing failed, try again later",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _submit(function, *args):
+    """function(*args) в пуле процессов; ошибки входа превращаются в HTTP-ответы."""
+    if gpx_metrics.pending >= settings.GPX_MAX_PENDING:
+        gpx_metrics.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+    gpx_metrics.pending += 1
+    try:
+        result, wait, compute = await _run_in_pool(function, *args)
+    # MemoryError приходит, если памяти не хватило на отправку результата
+    except (GpxMemoryLimit, MemoryError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="GPX file needs too much memory to process",
+        )
+    except GpxInvalid:
+        raise HTTPException(status_code=400, detail="Invalid GPX file")
+    finally:
+        gpx_metrics.pending -= 1
+
+    gpx_metrics.wait.observe(wait)
+    gpx_metrics.compute.observe(compute)
+    return result
+
+
+class GpxConversion:
+    __slots__ = ("geojson", "lods", "metrics")
+
+    def __init__(self, geojson: dict, lods: list[dict], metrics: dict):
+        self.geojson = geojson
+        # Строки hike_geometries, см. core.geometry.geometry_levels
+        self.lods = lods
+        # Значения столбцов метрик трека, см. core.track_metrics
+        self.metrics = metrics
+
+
+def _process_gpx(data: bytes, tolerances: list[float]) -> GpxConversion:
+    gpx = parse_gpx(data)
+    geojson = geojson_from_gpx(gpx)
+    return GpxConversion(
+        geojson, geometry_levels(geojson, tolerances), compute_track_metrics(gpx)
+    )
+
+
+async def convert_gpx(data: bytes) -> GpxConversion:
+    """GeoJSON, уровни детализации и метрики трека из GPX, в пуле процессов."""
+    if len(data) > settings.GPX_MAX_SIZE_MB * 1024 * 1024:
+        raise HTTPException(status_code=400, detail="File too large")
+    return await _submit(_process_gpx, data, settings.GPX_LOD_TOLERANCES_M)
+
+
+class GpxTrack:
+    __slots__ = ("name", "number", "segments", "elevations", "times")
+
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.number: Optional[int] = None
+        # Точки сегмента подряд: lon, lat, lon, lat, ...
+        self.segments: list[array] = []
+        # По сегментам, точка в точку: высота в метрах и время в секундах
+        # Unix; nan, если в точке нет значения или его не удалось разобрать
+        self.elevations: list[array] = []
+        self.times: list[array] = []
+
+
+class GpxRoute:
+    __slots__ = ("name", "description", "points")
+
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.description: Optional[str] = None
+        self.points = array("d")
+
+
+class GpxWaypoint:
+    __slots__ = (
+        "longitude",
+        "latitude",
+        "name",
+        "description",
+        "comment",
+        "symbol",
+        "elevation",
+        "time",
+    )
+
+
+class GpxData:
+    def __init__(self):
+        self.tracks: list[GpxTrack] = []
+        self.waypoints: list[GpxWaypoint] = []
+        self.routes: list[GpxRoute] = []
+
+
+def _iter_events(file_obj):
+    parser = ET.XMLPullParser(events=("start-ns", "start", "end"))
+    # gpxpy читает файл только как UTF-8, проверяем так же, но по кускам
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        while chunk := file_obj.read(GPX_CHUNK_SIZE):
+            if isinstance(chunk, bytes):
+                decoder.decode(chunk)
+            parser.feed(chunk)
+            yield from parser.read_events()
+        decoder.decode(b"", final=True)
+        parser.close()
+        yield from parser.read_events()
+    except ET.ParseError as e:
+        if e.code == XML_ERROR_NO_MEMORY:
+            raise MemoryError() from None
+        raise GpxInvalid(f"Error parsing XML: {e}") from None
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    return None if value is None else float(value.strip())
+
+
+def _lenient_float(value: Optional[str]) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _timestamp(value: Optional[str]) -> float:
+    if not value:
+        return math.nan
+    try:
+        moment = datetime.fromisoformat(value.strip())
+    except ValueError:
+        moment = TIME_TYPE.from_string(value)
+        if moment is None:
+            return math.nan
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _append_point(points: array, element):
+    latitude, longitude = element.get("lat"), element.get("lon")
+    if latitude is None or longitude is None:
+        raise GpxInvalid(f"<{element.tag.rpartition('}')[2]}> without lat/lon")
+    points.append(float(longitude.strip()))
+    points.append(float(latitude.strip()))
+
+
+def _parse_waypoint(element, ns: str) -> GpxWaypoint:
+    def text(name):
+        return element.findtext(ns + name) or None
+
+    waypoint = GpxWaypoint()
+    point = array("d")
+    _append_point(point, element)
+    waypoint.longitude, waypoint.latitude = point
+    waypoint.name = text("name")
+    waypoint.description = text("desc")
+    waypoint.comment = text("cmt")
+    waypoint.symbol = text("sym")
+    waypoint.elevation = _parse_float(text("ele"))
+    waypoint.time = TIME_TYPE.from_string(text("time"))
+    return waypoint
+
+
+# Пути от корня до элементов, из которых собирается GeoJSON
+_TRACK = ("trk",)
+_SEGMENT = ("trk", "trkseg")
+_TRACK_POINT = ("trk", "trkseg", "trkpt")
+_ROUTE = ("rte",)
+_ROUTE_POINT = ("rte", "rtept")
+_WAYPOINT = ("wpt",)
+_STRUCTURE_TAGS = frozenset(
+    path[-1]
+    for path in (_TRACK_POINT, _SEGMENT, _TRACK, _ROUTE_POINT, _ROUTE, _WAYPOINT)
+)
+
+
+def _parse_stream(file_obj) -> GpxData:
+    data = GpxData()
+    ns = ""  # пространство имён по умолчанию, как в gpxpy — только первое
+    local_names: dict[str, str] = {}
+    paths: list[tuple] = []
+    elements: list = []
+    ele_tag, time_tag = "ele", "time"
+    track = segment = elevations = times = route = None
+
+    for event, item in _iter_events(file_obj):
+        if event == "start-ns":
+            prefix, uri = item
+            if prefix == "" and not ns:
+                ns = f"{{{uri}}}"
+                ele_tag, time_tag = ns + "ele", ns + "time"
+                local_names.clear()
+            continue
+
+        tag = local_names.get(item.tag)
+        if tag is None:
+            tag = item.tag[len(ns) :] if ns and item.tag.startswith(ns) else item.tag
+            local_names[item.tag] = tag
+
+        if event == "start":
+            path = paths[-1] + (tag,) if paths else ()
+            paths.append(path)
+            elements.append(item)
+            if path == _TRACK:
+                track = GpxTrack()
+            elif path == _SEGMENT:
+                segment, elevations, times = array("d"), array("d"), array("d")
+            elif path == _ROUTE:
+                route = GpxRoute()
+            continue
+
+        path = paths.pop()
+        elements.pop()
+        if tag not in _STRUCTURE_TAGS:
+            continue
+
+        if path == _TRACK_POINT:
+            _append_point(segment, item)
+            # Высота и время идут только в метрики, ошибки в них не критичны
+            elevations.append(_lenient_float(item.findtext(ele_tag)))
+            times.append(_timestamp(item.findtext(time_tag)))
+        elif path == _SEGMENT:
+            track.segments.append(segment)
+            track.elevations.append(elevations)
+            track.times.append(times)
+        elif path == _TRACK:
+            track.name = item.findtext(ns + "name") or None
+            number = item.findtext(ns + "number") or None
+            track.number = None if number is None else int(number.strip())
+            data.tracks.append(track)
+        elif path == _ROUTE_POINT:
+            _append_point(route.points, item)
+        elif path == _ROUTE:
+            route.name = item.findtext(ns + "name") or None
+            route.description = item.findtext(ns + "desc") or None
+            data.routes.append(route)
+        elif path == _WAYPOINT:
+            data.waypoints.append(_parse_waypoint(item, ns))
+        else:
+            continue
+        # Разобранные элементы убираем из дерева, иначе оно растёт до размера файла
+        elements[-1].remove(item)
+
+    return data
+
+
+def parse_gpx(file_obj: Union[str, bytes, io.IOBase]) -> GpxData:
+    """Потоковый разбор GPX: точки копятся в array('d'), а не в объектах gpxpy.
+
+    Берутся только поля, которые попадают в GeoJSON или в метрики трека.
+    Высота и время точек трека не проверяются: ошибка в них даёт nan.
+    """
+    if isinstance(file_obj, str):
+        with open(file_obj, "rb") as gpx_file:
+            return parse_gpx(gpx_file)
+    if isinstance(file_obj, (bytes, bytearray)):
+        file_obj = io.BytesIO(file_obj)
+    try:
+        return _parse_stream(file_obj)
+    except ValueError as e:
+        # float()/int() на кривых координатах и номерах
+        raise GpxInvalid(str(e)) from None
+
+
+def _coordinates(points: array) -> list:
+    values = iter(points)
+    return [[longitude, latitude] for longitude, latitude in zip(values, values)]
+
+
+def gpx_to_geojson(file_obj: Union[str, bytes, io.IOBase]) -> dict:
+    return geojson_from_gpx(parse_gpx(file_obj))
+
+
+def geojson_from_gpx(gpx: GpxData) -> dict:
+    features = []
+
+    # Tracks
+    for track in gpx.tracks:
+        segments_coords = [
+            _coordinates(points) for points in track.segments if len(points) >= 4
+        ]
+        if not segments_coords:
+            continue
+
+        geometry = (
+            {"type": "LineString", "coordinates": segments_coords[0]}
+            if len(segments_coords) == 1
+            else {"type": "MultiLineString", "coordinates": segments_coords}
+        )
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": geometry,
+                "properties": {
+                    "kind": "track",
+                    "name": track.name,
+                    "number": track.number,
+                },
+            }
+        )
+
+    # Waypoints
+    for w in gpx.waypoints:
+        features.append(
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [w.longitude, w.latitude],
+                },
+                "properties": {
+                    "kind": "waypoint",
+                    "name": w.name,
+                    "desc": w.description,
+                    "comment": w.comment,
+                    "symbol": w.symbol,
+                    "elevation": w.elevation,
+                    "time": w.time.isoformat() if w.time else None,
+                },
+            }
+        )
+
+    # Routes
+    for r in gpx.routes:
+        if len(r.points) >= 4:
+            features.append(
+                {
+                    "type": "Feature",
+                    "geometry": {
+                        "type": "LineString",
+                        "coordinates": _coordinates(r.points),
+                    },
+                    "properties": {
+                        "kind": "route",
+                        "name": r.name,
+                        "desc": r.description,
+                    },
+                }
+            )
+
+    return {"type": "FeatureCollection", "features": features}
@@ -0,0 +1,28 @@
+import threading
+
+
+class TimingStats:
+    """Счётчик длительностей: количество, сумма и максимум в секундах."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.count,
+                "avg_ms": (
+                    round(self.total / self.count * 1000, 3) if self.count else 0.0
+                ),
+                "max_ms": round(self.max * 1000, 3),
+            }
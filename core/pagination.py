@@ -0,0 +1,92 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional, Sequence
+
+from fastapi import HTTPException, Query
+from sqlalchemy import Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from core.config import settings
+
+
+class PageParams:
+    """Параметры страницы: непрозрачный курсор и размер страницы."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(
+            None, description="Курсор из next_cursor предыдущей страницы"
+        ),
+        limit: int = Query(
+            settings.PAGE_SIZE_DEFAULT,
+            ge=1,
+            le=settings.PAGE_SIZE_MAX,
+            description="Размер страницы",
+        ),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def _dump(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _load(value, column: InstrumentedAttribute):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence[InstrumentedAttribute]) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(keys):
+            raise ValueError
+        return tuple(_load(value, key) for key, value in zip(keys, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    keys: Sequence[InstrumentedAttribute],
+    page: PageParams,
+    descending: bool = True,
+) -> tuple[list, Optional[str]]:
+    """Keyset-пагинация по уникальному набору колонок keys.
+
+    Вместо OFFSET следующая страница начинается строго после последней
+    строки предыдущей, поэтому стоимость не растёт с номером страницы.
+    """
+    if page.cursor:
+        after = decode_cursor(page.cursor, keys)
+        if descending:
+            query = query.where(tuple_(*keys) < tuple_(*after))
+        else:
+            query = query.where(tuple_(*keys) > tuple_(*after))
+
+    query = query.order_by(
+        *(key.desc() if descending else key.asc() for key in keys)
+    ).limit(page.limit + 1)
+    items = (await session.scalars(query)).all()
+
+    next_cursor = None
+    if len(items) > page.limit:
+        items = items[: page.limit]
+        next_cursor = encode_cursor([getattr(items[-1], key.key) for key in keys])
+    return items, next_cursor
@@ -0,0 +1,143 @@
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, Request, status
+from slowapi.util import get_remote_address
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from db import db_helper
+from models import rate_limits
+
+PERIODS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+}
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """'5/minute' -> (5, 60)"""
+    amount, period = rate.split("/")
+    return int(amount), PERIODS[period.strip().rstrip("s")]
+
+
+class MemoryTokenBucket:
+    """Token bucket в памяти процесса — для запуска с одним воркером."""
+
+    def __init__(self, max_keys: int = 10_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def hit(self, key: str, limit: int, period: int) -> float:
+        """Возвращает 0, если запрос разрешён, иначе сколько секунд ждать."""
+        now = time.monotonic()
+        rate = limit / period
+        tokens, updated_at = self._buckets.get(key, (limit, now))
+        tokens = min(limit, tokens + (now - updated_at) * rate)
+
+        if tokens >= 1:
+            retry_after = 0.0
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class PostgresSlidingWindow:
+    """Скользящее окно поверх таблицы rate_limits, общее для всех воркеров.
+
+    Текущее окно инкрементируется upsert'ом, предыдущее учитывается с весом
+    оставшейся доли — всё одним запросом.
+    """
+
+    async def hit(self, key: str, limit: int, period: int) -> float:
+        now = time.time()
+        window = int(now // period)
+        elapsed = now / period - window
+
+        current = (
+            insert(rate_limits)
+            .values(
+                key=key,
+                window=window,
+                hits=1,
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=period * 2),
+            )
+            .on_conflict_do_update(
+                index_elements=[rate_limits.c.key, rate_limits.c.window],
+                set_={"hits": rate_limits.c.hits + 1},
+            )
+            .returning(rate_limits.c.hits)
+            .cte("current")
+        )
+        previous = (
+            select(rate_limits.c.hits)
+            .where(rate_limits.c.key == key, rate_limits.c.window == window - 1)
+            .scalar_subquery()
+        )
+
+        async with db_helper.session_factory() as session:
+            hits, previous_hits = (
+                await session.execute(
+                    select(current.c.hits, func.coalesce(previous, 0))
+                )
+            ).one()
+            await session.commit()
+
+        if hits + previous_hits * (1 - elapsed) <= limit:
+            return 0.0
+        return (1 - elapsed) * period
+
+
+async def delete_expired_windows(session: AsyncSession, batch_size: int) -> int:
+    expired = (
+        select(rate_limits.c.key, rate_limits.c.window)
+        .where(rate_limits.c.expires_at <= func.now())
+        .limit(batch_size)
+    )
+    result = await session.execute(
+        delete(rate_limits).where(
+            tuple_(rate_limits.c.key, rate_limits.c.window).in_(expired)
+        )
+    )
+    await session.commit()
+    return result.rowcount
+
+
+backends = {
+    "memory": MemoryTokenBucket,
+    "postgres": PostgresSlidingWindow,
+}
+limiter = backends[settings.RATE_LIMIT_BACKEND]()
+
+
+def rate_limit(name: str):
+    """Зависимость FastAPI: лимит из settings.RATE_LIMITS[name] на IP клиента."""
+
+    async def checker(request: Request):
+        rate = settings.RATE_LIMITS.get(name)
+        if not rate:
+            return
+        limit, period = parse_rate(rate)
+        retry_after = await limiter.hit(
+            f"{name}:{get_remote_address(request)}", limit, period
+        )
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return checker
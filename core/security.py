@@ -1,18 +1,84 @@
+import asyncio
+import hashlib
+import secrets
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError, ExpiredSignatureError
 from fastapi import HTTPException, status
+from core.cache import verified_token_cache
 from core.config import settings
+from core.metrics import TimingStats
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt отпускает GIL, поэтому хэширование идёт в отдельном пуле потоков,
+# а не блокирует event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+
+class PasswordHashingMetrics:
+    def __init__(self):
+        self.pending = 0
+        self.rejected = 0
+        self.wait = TimingStats()
+        self.compute = TimingStats()
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "wait": self.wait.snapshot(),
+            "compute": self.compute.snapshot(),
+        }
+
+
+password_metrics = PasswordHashingMetrics()
+
+
+async def _run_password_job(func, *args):
+    if password_metrics.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        password_metrics.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+    queued_at = time.perf_counter()
+
+    def job():
+        started_at = time.perf_counter()
+        result = func(*args)
+        return result, started_at - queued_at, time.perf_counter() - started_at
+
+    password_metrics.pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        result, wait, compute = await loop.run_in_executor(password_executor, job)
+    finally:
+        password_metrics.pending -= 1
+
+    password_metrics.wait.observe(wait)
+    password_metrics.compute.observe(compute)
+    return result
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    return await _run_password_job(pwd_context.hash, password)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(pwd_context.verify, plain_password, hashed_password)
 
 
 def _create_token(data: dict, expires_delta: timedelta) -> str:
@@ -22,16 +88,31 @@ def _create_token(data: dict, expires_delta: timedelta) -> str:
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def create_access_token(sub: str) -> str:
+def user_claims(user) -> dict:
+    return {
+        "uid": user.id,
+        "roles": list(user.roles or []),
+        "act": user.is_activated,
+        "pv": user.permissions_version,
+    }
+
+
+def create_access_token(sub: str, claims: Optional[dict] = None) -> str:
     return _create_token(
-        {"sub": sub, "type": "access"},
+        {**(claims or {}), "sub": sub, "type": "access"},
         timedelta(minutes=settings.ACCESS_TOKEN_EXPIRES_MINUTES),
     )
 
 
-def create_refresh_token(sub: str) -> str:
+def create_refresh_token(sub: str, family: uuid.UUID) -> str:
+    # jti делает каждый токен уникальным, даже если выпущен в ту же секунду
     return _create_token(
-        {"sub": sub, "type": "refresh"},
+        {
+            "sub": sub,
+            "type": "refresh",
+            "fam": str(family),
+            "jti": secrets.token_urlsafe(8),
+        },
         timedelta(days=settings.REFRESH_TOKEN_EXPIRES_DAYS),
     )
 
@@ -44,8 +125,14 @@ def create_email_verification_token(sub: str) -> str:
 
 
 def decode_token(token: str) -> dict:
+    cache_key = hashlib.sha256(token.encode()).digest()
+    payload = verified_token_cache.get(cache_key)
+    if payload is not None:
+        return dict(payload)
     try:
-        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
     except ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired"
@@ -54,3 +141,39 @@ def decode_token(token: str) -> dict:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
+    if isinstance(payload.get("exp"), (int, float)):
+        verified_token_cache.set(cache_key, payload, payload["exp"] - time.time())
+    return dict(payload)
+
+
+class PermissionsRevocations:
+    """Минимальные допустимые версии прав по user_id.
+
+    Запись нужна только пока живы access-токены, выданные до отзыва,
+    поэтому старше ACCESS_TOKEN_EXPIRES_MINUTES записи удаляются.
+    """
+
+    def __init__(self):
+        self._versions: dict[int, tuple[int, float]] = {}
+
+    def revoke(self, user_id: int, min_version: int):
+        now = time.monotonic()
+        self._prune(now)
+        current = self._versions.get(user_id)
+        if current is None or current[0] < min_version:
+            self._versions[user_id] = (min_version, now)
+
+    def is_revoked(self, user_id: int, version: int) -> bool:
+        item = self._versions.get(user_id)
+        return item is not None and version < item[0]
+
+    def _prune(self, now: float):
+        ttl = settings.ACCESS_TOKEN_EXPIRES_MINUTES * 60
+        for user_id in [u for u, (_, at) in self._versions.items() if now - at > ttl]:
+            del self._versions[user_id]
+
+    def __len__(self) -> int:
+        return len(self._versions)
+
+
+permissions_revocations = PermissionsRevocations()
@@ -0,0 +1,161 @@
+"""Метрики трека для столбцов hikes, считаются в воркере при загрузке GPX.
+
+Расстояние — сумма гаверсинусов между соседними точками сегмента. Набор и
+сброс высоты считаются по высоте, сглаженной скользящим средним, с порогом
+ELEVATION_THRESHOLD_M: шум GPS на ровном месте не превращается в набор.
+Время движения — шаги со скоростью не меньше MOVING_SPEED_MPS. Дни разбивки —
+местные: часовой пояс оценивается по средней долготе трека (15° на час), иначе
+по UTC многодневный поход на Камчатке делился бы на дни в полдень.
+"""
+
+import math
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Optional
+
+from core.geometry import EARTH_RADIUS_M
+
+MOVING_SPEED_MPS = 1 / 3.6  # 1 км/ч, как порог остановки в gpxpy
+ELEVATION_WINDOW = 5
+ELEVATION_THRESHOLD_M = 2.0
+# Разбивка по дням не строится, если время в треке растянуто дольше
+MAX_SPLIT_DAYS = 366
+SECONDS_PER_DAY = 86_400
+EPOCH = date(1970, 1, 1)
+
+
+def _smooth(values) -> list[float]:
+    """Скользящее среднее по окну ELEVATION_WINDOW; nan в расчёт не входят."""
+    half = ELEVATION_WINDOW // 2
+    valid = [i for i, value in enumerate(values) if not math.isnan(value)]
+    prefix = [0.0]
+    for i in valid:
+        prefix.append(prefix[-1] + values[i])
+
+    smoothed = [math.nan] * len(values)
+    for k, i in enumerate(valid):
+        low, high = max(0, k - half), min(len(valid), k + half + 1)
+        smoothed[i] = (prefix[high] - prefix[low]) / (high - low)
+    return smoothed
+
+
+def _lines(gpx) -> list[tuple]:
+    lines = [
+        (points, elevations, times)
+        for track in gpx.tracks
+        for points, elevations, times in zip(
+            track.segments, track.elevations, track.times
+        )
+        if points
+    ]
+    # Файл без треков: расстояние и границы считаются по маршрутам
+    return lines or [(route.points, None, None) for route in gpx.routes if route.points]
+
+
+def _bbox(gpx, lines: list[tuple]) -> dict:
+    longitudes = [w.longitude for w in gpx.waypoints]
+    latitudes = [w.latitude for w in gpx.waypoints]
+    for points, _, _ in lines:
+        longitudes += (min(points[0::2]), max(points[0::2]))
+        latitudes += (min(points[1::2]), max(points[1::2]))
+    if not longitudes:
+        return dict.fromkeys(("bbox_west", "bbox_south", "bbox_east", "bbox_north"))
+    return {
+        "bbox_west": min(longitudes),
+        "bbox_south": min(latitudes),
+        "bbox_east": max(longitudes),
+        "bbox_north": max(latitudes),
+    }
+
+
+def _day_offset(lines: list[tuple]) -> float:
+    total = count = 0
+    for points, _, _ in lines:
+        total += sum(points[0::2])
+        count += len(points) // 2
+    return round(total / count / 15) * 3600 if count else 0
+
+
+def compute_track_metrics(gpx) -> dict:
+    """Значения столбцов метрик для hikes по результату core.gpx.parse_gpx."""
+    lines = _lines(gpx)
+    offset = _day_offset(lines)
+
+    distance = gain = loss = moving = 0.0
+    max_elevation: Optional[float] = None
+    has_time = False
+    # День (номер от 1970-01-01) -> [метры, набор, сброс, секунды движения]
+    days = defaultdict(lambda: [0.0, 0.0, 0.0, 0.0])
+    reference = math.nan
+
+    for points, elevations, times in lines:
+        longitudes = [math.radians(value) for value in points[0::2]]
+        latitudes = [math.radians(value) for value in points[1::2]]
+        cosines = [math.cos(value) for value in latitudes]
+        smoothed = _smooth(elevations) if elevations else None
+        if elevations and any(not math.isnan(value) for value in elevations):
+            segment_max = max(value for value in elevations if not math.isnan(value))
+            if max_elevation is None or segment_max > max_elevation:
+                max_elevation = segment_max
+
+        day = None
+        for i in range(len(latitudes)):
+            moment = times[i] if times else math.nan
+            if not math.isnan(moment):
+                has_time = True
+                day = int((moment + offset) // SECONDS_PER_DAY)
+            split = days[day] if day is not None else [0.0] * 4
+
+            if i:
+                a = (
+                    math.sin((latitudes[i] - latitudes[i - 1]) / 2) ** 2
+                    + cosines[i]
+                    * cosines[i - 1]
+                    * math.sin((longitudes[i] - longitudes[i - 1]) / 2) ** 2
+                )
+                step = 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+                distance += step
+                split[0] += step
+
+                elapsed = moment - times[i - 1] if times else math.nan
+                if elapsed > 0 and step / elapsed >= MOVING_SPEED_MPS:
+                    moving += elapsed
+                    split[3] += elapsed
+
+            elevation = smoothed[i] if smoothed else math.nan
+            if math.isnan(elevation):
+                continue
+            if math.isnan(reference):
+                reference = elevation
+            elif elevation - reference >= ELEVATION_THRESHOLD_M:
+                gain += elevation - reference
+                split[1] += elevation - reference
+                reference = elevation
+            elif reference - elevation >= ELEVATION_THRESHOLD_M:
+                loss += reference - elevation
+                split[2] += reference - elevation
+                reference = elevation
+
+    daily_splits = None
+    if days and max(days) - min(days) < MAX_SPLIT_DAYS:
+        daily_splits = [
+            {
+                "day": (EPOCH + timedelta(days=day)).isoformat(),
+                "distance_km": round(days[day][0] / 1000, 3),
+                "elevation_gain_m": round(days[day][1], 1),
+                "elevation_loss_m": round(days[day][2], 1),
+                "moving_time_s": int(days[day][3]),
+            }
+            for day in range(min(days), max(days) + 1)
+        ]
+
+    has_elevation = max_elevation is not None
+    return {
+        "track_distance_km": round(distance / 1000, 3) if lines else None,
+        "elevation_gain_m": round(gain, 1) if has_elevation else None,
+        "elevation_loss_m": round(loss, 1) if has_elevation else None,
+        "max_elevation_m": max_elevation,
+        "moving_time_s": int(moving) if has_time else None,
+        **_bbox(gpx, lines),
+        "daily_splits": daily_splits,
+    }
@@ -1,27 +1,38 @@
+import csv
 import io
 import json
+import time
 
 from fastapi import Depends, HTTPException, Request, status, Form, Response
 from jose import JWTError
+from pydantic import ValidationError
 from slugify import slugify
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Union
+from typing import List, Optional
 
+from core.cache import principal_cache
 from core.config import settings
-from core.security import decode_token
+from core.security import decode_token, permissions_revocations
 from crud.users import get_user_by_email_or_username
 from db.session import get_async_session
-import gpxpy
 
 from schemas import (
     HikeBase,
     PassBase,
     HikeParticipantBase,
+    HikeParticipantImportResult,
     ClubParticipantBase,
     ArticleBase,
     NewsBase,
     HikeUpdate,
 )
+from schemas.users import TokenPrincipal
+
+
+def _seconds_until(exp) -> Optional[float]:
+    if exp is None:
+        return None
+    return exp - time.time()
 
 
 async def get_current_user(
@@ -39,20 +50,69 @@ async def get_current_user(
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
             )
+        cache_key = (username, payload.get("exp"))
+        cached_user = principal_cache.get(cache_key)
+        if cached_user is not None:
+            return await session.merge(cached_user, load=False)
+
         user = await get_user_by_email_or_username(session, username, None)
         if not user or not user.is_activated:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or not found"
             )
-        return user
+        # В кэше храним отсоединённый экземпляр, запросу отдаём его копию в сессии
+        session.expunge(user)
+        principal_cache.set(cache_key, user, _seconds_until(payload.get("exp")))
+        return await session.merge(user, load=False)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token is invalid"
         )
 
 
+def get_token_principal(request: Request) -> Optional[TokenPrincipal]:
+    """Пользователь из claims access-токена, без обращения к БД.
+
+    Возвращает None, если токен выпущен без claims — тогда нужна загрузка из БД.
+    """
+    token = request.cookies.get("access_token")
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token"
+        )
+    payload = decode_token(token)
+    if payload.get("type") != "access" or payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload"
+        )
+    if "uid" not in payload or "pv" not in payload:
+        return None
+    if not payload.get("act"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or not found"
+        )
+    if permissions_revocations.is_revoked(payload["uid"], payload["pv"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token revoked"
+        )
+    return TokenPrincipal(
+        id=payload["uid"],
+        username=payload["sub"],
+        roles=payload.get("roles") or [],
+        is_activated=True,
+    )
+
+
 def role_required(roles: list[str]):
-    async def checker(user=Depends(get_current_user)):
+    async def checker(
+        request: Request, session: AsyncSession = Depends(get_async_session)
+    ):
+        user = None
+        if settings.AUTH_FAST_MODE:
+            user = get_token_principal(request)
+        if user is None:
+            user = await get_current_user(request, session)
+
         user_roles = list(user.roles or [])  # Принудительно приводим к списку
         # На случай, если это не список, а строка или lazy-объект
         if not isinstance(user_roles, list):
@@ -69,95 +129,6 @@ def role_required(roles: list[str]):
     return checker
 
 
-def gpx_to_geojson(file_obj: Union[str, io.IOBase]) -> dict:
-    if isinstance(file_obj, str):
-        with open(file_obj, "r", encoding="utf-8") as gpx_file:
-            gpx = gpxpy.parse(gpx_file)
-    else:
-        if isinstance(file_obj, io.BytesIO):
-            file_obj = io.TextIOWrapper(file_obj, encoding="utf-8")
-        gpx = gpxpy.parse(file_obj)
-
-    features = []
-
-    # Tracks
-    for track in gpx.tracks:
-        segments_coords = []
-        for seg in track.segments:
-            coords = [
-                [p.longitude, p.latitude]
-                for p in seg.points
-                if p.longitude is not None and p.latitude is not None
-            ]
-            if len(coords) >= 2:
-                segments_coords.append(coords)
-
-        if not segments_coords:
-            continue
-
-        geometry = (
-            {"type": "LineString", "coordinates": segments_coords[0]}
-            if len(segments_coords) == 1
-            else {"type": "MultiLineString", "coordinates": segments_coords}
-        )
-        features.append(
-            {
-                "type": "Feature",
-                "geometry": geometry,
-                "properties": {
-                    "kind": "track",
-                    "name": track.name,
-                    "number": track.number,
-                },
-            }
-        )
-
-    # Waypoints
-    for w in gpx.waypoints:
-        if w.longitude is None or w.latitude is None:
-            continue
-        features.append(
-            {
-                "type": "Feature",
-                "geometry": {
-                    "type": "Point",
-                    "coordinates": [w.longitude, w.latitude],
-                },
-                "properties": {
-                    "kind": "waypoint",
-                    "name": w.name,
-                    "desc": w.description,
-                    "comment": getattr(w, "comment", None),
-                    "symbol": w.symbol,
-                    "elevation": w.elevation,
-                    "time": w.time.isoformat() if getattr(w, "time", None) else None,
-                },
-            }
-        )
-
-    # Routes
-    for r in gpx.routes:
-        coords = [
-            [p.longitude, p.latitude]
-            for p in r.points
-            if p.longitude is not None and p.latitude is not None
-        ]
-        if len(coords) >= 2:
-            features.append(
-                {
-                    "type": "Feature",
-                    "geometry": {"type": "LineString", "coordinates": coords},
-                    "properties": {
-                        "kind": "route",
-                        "name": r.name,
-                        "desc": r.description,
-                    },
-                }
-            )
-
-    return {"type": "FeatureCollection", "features": features}
-
-
 def parse_hike_form(hike: str = Form(...)) -> HikeBase:
     return HikeBase.model_validate(json.loads(hike))
 
@@ -182,6 +153,54 @@ def parse_update_hike_form(update_data: str = Form(...)) -> HikeUpdate:
     return HikeUpdate.model_validate(json.loads(update_data))
 
 
+PARTICIPANTS_CSV_COLUMNS = {"hike_id", "user_id", "role"}
+
+
+def parse_participants_csv(
+    data: bytes,
+) -> tuple[dict[int, HikeParticipantBase], list[HikeParticipantImportResult]]:
+    """CSV с колонками hike_id, user_id, role (заголовок обязателен).
+
+    Возвращает корректные строки по номеру строки файла и ошибки разбора.
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+
+    reader = csv.DictReader(io.StringIO(text))
+    if not PARTICIPANTS_CSV_COLUMNS.issubset(reader.fieldnames or []):
+        raise HTTPException(
+            status_code=400,
+            detail=f"CSV header must contain {', '.join(sorted(PARTICIPANTS_CSV_COLUMNS))}",
+        )
+
+    participants = {}
+    invalid = []
+    for record in reader:
+        if len(participants) + len(invalid) >= settings.PARTICIPANTS_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many rows, limit is {settings.PARTICIPANTS_IMPORT_MAX_ROWS}",
+            )
+        try:
+            participants[reader.line_num] = HikeParticipantBase.model_validate(
+                {column: record[column] for column in PARTICIPANTS_CSV_COLUMNS}
+            )
+        except ValidationError as error:
+            invalid.append(
+                HikeParticipantImportResult(
+                    row=reader.line_num,
+                    status="invalid",
+                    error="; ".join(
+                        f"{'.'.join(map(str, e['loc']))}: {e['msg']}"
+                        for e in error.errors()
+                    ),
+                )
+            )
+    return participants, invalid
+
+
 def set_auth_cookies(response: Response, access_token: str, refresh_token: str):
     response.set_cookie(
         key="access_token",
@@ -203,3 +222,62 @@ def set_auth_cookies(response: Response, access_token: str, refresh_token: str):
 
 def generate_slug(title: str):
     return slugify(title)
+
+
+def _header_weights(value: Optional[str]) -> dict[str, float]:
+    """Элементы Accept/Accept-Encoding и их веса q."""
+    weights = {}
+    for item in (value or "").split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, raw = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(raw)
+                except ValueError:
+                    weight = 0.0
+        weights[name.lower()] = weight
+    return weights
+
+
+def negotiate_media_type(
+    accept: Optional[str], offered: dict[str, tuple[str, ...]]
+) -> Optional[str]:
+    """Ключ offered (формат -> его media types), лучший по заголовку Accept.
+
+    Без Accept — первый формат; при равных весах — тот, что раньше в offered.
+    None — ни один формат не подходит.
+    """
+    if not accept:
+        return next(iter(offered))
+    weights = _header_weights(accept)
+    best, best_weight = None, 0.0
+    for key, media_types in offered.items():
+        for media_type in media_types:
+            # Точное совпадение важнее type/* и */*
+            for accepted in (media_type, media_type.split("/")[0] + "/*", "*/*"):
+                if accepted in weights:
+                    if weights[accepted] > best_weight:
+                        best, best_weight = key, weights[accepted]
+                    break
+    return best
+
+
+def accepts_encoding(accept_encoding: Optional[str], encoding: str) -> bool:
+    weights = _header_weights(accept_encoding)
+    return weights.get(encoding, weights.get("*", 0.0)) > 0
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Слабое сравнение из If-None-Match, как требует RFC 9110."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for candidate in if_none_match.split(",")
+    )
@@ -1,17 +1,34 @@
 from typing import Optional
 
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from models import HikeModel, PassModel, hike_pass_association
-from sqlalchemy import select, or_, insert
+from models import PassModel, hike_pass_association
+from sqlalchemy import select, or_
 
+FOREIGN_KEY_VIOLATION = "23503"
 
-async def create_new_hike_pass_link(
-    session: AsyncSession, hike: HikeModel, pas: PassModel
-):
-    stmt = insert(hike_pass_association).values(hike_id=hike.id, pass_id=pas.id)
-    await session.execute(stmt)
+
+async def create_new_hike_pass_link(session: AsyncSession, hike_id: int, pass_id: int):
+    """Один INSERT: существование похода и перевала проверяют внешние ключи,
+    повтор связи — первичный ключ таблицы."""
+    try:
+        result = await session.execute(
+            pg_insert(hike_pass_association)
+            .values(hike_id=hike_id, pass_id=pass_id)
+            .on_conflict_do_nothing()
+        )
+    except IntegrityError as e:
+        await session.rollback()
+        if getattr(e.orig, "sqlstate", None) == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=404, detail="Hike or Pass not found")
+        raise
+    if result.rowcount == 0:
+        await session.rollback()
+        raise HTTPException(status_code=409, detail="Hike and Pass already linked")
     await session.commit()
 
 
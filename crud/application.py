@@ -1,9 +1,14 @@
+from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text
 from typing import Optional, List
 
 from sqlalchemy.orm import selectinload
 
+from core.pagination import PageParams, paginate
+from crud.utils import update_returning
 from models import ApplicationModel, ApplicationStatus
 from schemas import ApplicationCreate, ApplicationUpdateAdmin
 
@@ -11,38 +16,40 @@ from schemas import ApplicationCreate, ApplicationUpdateAdmin
 async def create_application(
     session: AsyncSession, user_id: int, payload: ApplicationCreate
 ) -> Optional[ApplicationModel]:
-    result = await session.execute(
-        select(ApplicationModel).where(
-            ApplicationModel.user_id == user_id,
-            ApplicationModel.status.in_(
-                [ApplicationStatus.pending, ApplicationStatus.approved]
-            ),
-        )
-    )
-    existing = result.scalars().first()
-    if existing:
-        return None
+    """None — у пользователя уже есть активная заявка.
 
-    new_app = ApplicationModel(
-        user_id=user_id,
-        first_name=payload.first_name,
-        last_name=payload.last_name,
-        middle_name=payload.middle_name,
-        date_of_birth=payload.date_of_birth,
-        email=payload.email,
-        phone_number=payload.phone_number,
-        vk_profile=payload.vk_profile,
-        experience=payload.experience,
-        previous_school=payload.previous_school,
-        how_heard=payload.how_heard,
-        question=payload.question,
-        wishes=payload.wishes,
-        consent=payload.consent,
-        status=ApplicationStatus.pending,
+    Проверку делает частичный уникальный индекс ux_applications_user_id_active,
+    поэтому две одновременные заявки не пройдут обе.
+    """
+    new_app = await session.scalar(
+        pg_insert(ApplicationModel)
+        .values(
+            user_id=user_id,
+            first_name=payload.first_name,
+            last_name=payload.last_name,
+            middle_name=payload.middle_name,
+            date_of_birth=payload.date_of_birth,
+            email=payload.email,
+            phone_number=payload.phone_number,
+            vk_profile=payload.vk_profile,
+            experience=payload.experience,
+            previous_school=payload.previous_school,
+            how_heard=payload.how_heard,
+            question=payload.question,
+            wishes=payload.wishes,
+            consent=payload.consent,
+            status=ApplicationStatus.pending,
+        )
+        .on_conflict_do_nothing(
+            index_elements=[ApplicationModel.user_id],
+            # Литерал, как в индексе: с параметрами Postgres не сопоставит
+            # условие с индексом, когда подготовленный запрос перейдёт
+            # на generic plan
+            index_where=text("status IN ('pending', 'approved')"),
+        )
+        .returning(ApplicationModel)
     )
-    session.add(new_app)
     await session.commit()
-    await session.refresh(new_app)
     return new_app
 
 
@@ -67,29 +74,29 @@ async def get_application(
 
 
 async def list_applications(
-    session: AsyncSession, status: Optional[str] = None, page: int = 1, limit: int = 20
-) -> List[ApplicationModel]:
+    session: AsyncSession, page: PageParams, status: Optional[str] = None
+) -> tuple[List[ApplicationModel], Optional[str]]:
     query = select(ApplicationModel).options(selectinload(ApplicationModel.user))
     if status:
-        query = query.where(ApplicationModel.status == status).options(
-            selectinload(ApplicationModel.user)
-        )
-    query = query.offset((page - 1) * limit).limit(limit)
-    result = await session.execute(query)
-    return result.scalars().all()
+        query = query.where(ApplicationModel.status == status)
+    return await paginate(
+        session, query, [ApplicationModel.created_at, ApplicationModel.id], page
+    )
 
 
 async def update_application_status(
     session: AsyncSession, app_id: int, payload: ApplicationUpdateAdmin
 ) -> Optional[ApplicationModel]:
-    result = await session.execute(
-        select(ApplicationModel).where(ApplicationModel.id == app_id)
-    )
-    app = result.scalars().first()
-    if not app:
-        return None
-    app.status = payload.status
-    app.comment = payload.comment
-    await session.commit()
-    await session.refresh(app)
-    return app
+    try:
+        return await update_returning(
+            session,
+            ApplicationModel,
+            [ApplicationModel.id == app_id],
+            {"status": payload.status, "comment": payload.comment},
+        )
+    except IntegrityError:
+        # Возврат в pending/approved при другой активной заявке пользователя
+        await session.rollback()
+        raise HTTPException(
+            status_code=409, detail="User already has an active application"
+        )
@@ -1,7 +1,9 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.pagination import PageParams, paginate
 from core.utils import generate_slug
+from crud.utils import update_returning
 from enums import ItemStatus
 from models import ArticleModel
 from sqlalchemy import select
@@ -21,7 +23,6 @@ async def create_new_article(session: AsyncSession, article: ArticleBase, user_i
 
     session.add(new_article)
     await session.commit()
-    await session.refresh(new_article)
     return new_article
 
 
@@ -41,38 +42,35 @@ async def get_article_by_slug(session: AsyncSession, slug: str):
     return result
 
 
-async def get_articles(session: AsyncSession, status: ItemStatus):
+async def get_articles(session: AsyncSession, status: ItemStatus, page: PageParams):
+    query = select(ArticleModel)
     if status:
         status = ItemStatus(status.upper())
-        result = await session.scalars(
-            select(ArticleModel).where(ArticleModel.status == status)
-        )
-    else:
-        result = await session.scalars(select(ArticleModel))
-    if not result:
-        raise HTTPException(status_code=404, detail="Articles not found")
-    return result.all()
+        query = query.where(ArticleModel.status == status)
+    return await paginate(
+        session, query, [ArticleModel.created_at, ArticleModel.id], page
+    )
 
 
 async def update_article(
     session: AsyncSession,
-    article_data: ArticleModel,
+    article_id: int,
     update_data: ArticleUpdate,
     user_id: int,
 ):
 
     update_data = update_data.model_dump(exclude_unset=True)
 
-    for field, value in update_data.items():
-        setattr(article_data, field, value)
-
     if "title" in update_data:
-        article_data.slug = generate_slug(article_data.title)
+        update_data["slug"] = generate_slug(update_data["title"])
 
-    article_data.updated_by = user_id
+    update_data["updated_by"] = user_id
 
-    await session.commit()
-    await session.refresh(article_data)
+    article_data = await update_returning(
+        session, ArticleModel, [ArticleModel.id == article_id], update_data
+    )
+    if not article_data:
+        raise HTTPException(status_code=404, detail="Article not found")
     return article_data
 
 
@@ -1,49 +1,71 @@
+import gzip
+import json
 from typing import Optional
 from fastapi import HTTPException
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import delete, func, select
 
+from core.gpx import GpxConversion
+from core.pagination import PageParams, paginate
 from core.utils import generate_slug
+from crud.additional import FOREIGN_KEY_VIOLATION
+from crud.loaders import HIKE_CARD, HIKE_LIST, LoaderProfile
+from crud.utils import update_returning
 from enums import ItemStatus
-from models import HikeModel
+from models import HikeModel, hike_geometries
 from schemas import HikeBase, HikeUpdate
 
 
-async def get_all_hikes(session: AsyncSession, status: ItemStatus):
+async def get_all_hikes(session: AsyncSession, status: ItemStatus, page: PageParams):
+    query = select(HikeModel).options(*HIKE_LIST.options())
     if status:
         status = ItemStatus(status.upper())
-        result = await session.scalars(
-            select(HikeModel)
-            .where(HikeModel.status == status)
-            .options(selectinload(HikeModel.leader))
-        )
-    else:
-        result = await session.scalars(
-            select(HikeModel).options(selectinload(HikeModel.leader))
-        )
-    return result.all()
+        query = query.where(HikeModel.status == status)
+    return await paginate(session, query, [HikeModel.start_date, HikeModel.id], page)
 
 
-async def get_hike_by_id(session: AsyncSession, id: int):
+async def get_hike_by_id(
+    session: AsyncSession, id: int, profile: LoaderProfile = HIKE_CARD
+):
     return await session.scalar(
-        select(HikeModel)
-        .where(HikeModel.id == id)
-        .options(selectinload(HikeModel.leader))
+        select(HikeModel).where(HikeModel.id == id).options(*profile.options())
     )
 
 
-async def get_hike_by_slug(session: AsyncSession, slug: str):
+async def get_hike_by_slug(
+    session: AsyncSession, slug: str, profile: LoaderProfile = HIKE_CARD
+):
     return await session.scalar(
-        select(HikeModel)
-        .where(HikeModel.slug == slug)
-        .options(selectinload(HikeModel.leader))
+        select(HikeModel).where(HikeModel.slug == slug).options(*profile.options())
     )
 
 
+async def _save_geometries(session: AsyncSession, hike_id: int, lods: list[dict]):
+    await session.execute(
+        delete(hike_geometries).where(hike_geometries.c.hike_id == hike_id)
+    )
+    if lods:
+        await session.execute(
+            pg_insert(hike_geometries).on_conflict_do_nothing(),
+            [{**lod, "hike_id": hike_id} for lod in lods],
+        )
+
+
+def _track_defaults(metrics: dict) -> dict:
+    """Значения ручных полей по треку — для тех, что не заполнены."""
+    splits = metrics["daily_splits"]
+    return {
+        "distance_km": metrics["track_distance_km"],
+        "duration_days": len(splits) if splits else None,
+    }
+
+
 async def create_new_hike(
-    session: AsyncSession, hike: HikeBase, geojson_data: dict, user_id: int
+    session: AsyncSession, hike: HikeBase, gpx: GpxConversion, user_id: int
 ):
+    defaults = _track_defaults(gpx.metrics)
     new_hike = HikeModel(
         name=hike.name,
         slug=hike.slug,
@@ -51,14 +73,23 @@ async def create_new_hike(
         complexity=hike.complexity,
         difficulty_distribution=hike.difficulty_distribution,
         route=hike.route,
-        geojson_data=geojson_data,
+        geojson_data=gpx.geojson,
         start_date=hike.start_date,
         end_date=hike.end_date,
         region=hike.region,
         description=hike.description,
         participants_count=hike.participants_count,
-        duration_days=hike.duration_days,
-        distance_km=hike.distance_km,
+        duration_days=(
+            hike.duration_days
+            if hike.duration_days is not None
+            else defaults["duration_days"]
+        ),
+        distance_km=(
+            hike.distance_km
+            if hike.distance_km is not None
+            else defaults["distance_km"]
+        ),
+        **gpx.metrics,
         leader_id=hike.leader_id,
         photos_archive=hike.photos_archive,
         report_s3_key=hike.report_s3_key,
@@ -68,8 +99,12 @@ async def create_new_hike(
     )
 
     session.add(new_hike)
+    if gpx.lods:
+        await session.flush()
+        await _save_geometries(session, new_hike.id, gpx.lods)
     await session.commit()
-    await session.refresh(new_hike)
+    # INSERT уже вернул строку похода, догружаем только руководителя
+    await session.refresh(new_hike, ["leader"])
     return new_hike
 
 
@@ -85,32 +120,126 @@ async def delete_hike_by_id(session: AsyncSession, hike_id: int):
 
 async def update_hike(
     session: AsyncSession,
-    hike_data: HikeModel,
+    hike_id: int,
     update_data: HikeUpdate,
     gpx_s3_filename: Optional[str],
     report_s3_filename: Optional[str],
-    geojson_data: Optional[dict],
+    gpx: Optional[GpxConversion],
     user_id: int,
 ):
     update_dict = update_data.model_dump(exclude_unset=True)
 
-    for field, value in update_dict.items():
-        setattr(hike_data, field, value)
-
     if "name" in update_dict:
-        hike_data.slug = generate_slug(hike_data.name)
+        update_dict["slug"] = generate_slug(update_dict["name"])
 
     if gpx_s3_filename:
-        hike_data.route_s3_key = gpx_s3_filename
+        update_dict["route_s3_key"] = gpx_s3_filename
 
     if report_s3_filename:
-        hike_data.report_s3_key = report_s3_filename
+        update_dict["report_s3_key"] = report_s3_filename
+
+    if gpx:
+        update_dict["geojson_data"] = gpx.geojson
+        update_dict.update(gpx.metrics)
+        for field, value in _track_defaults(gpx.metrics).items():
+            if field not in update_dict and value is not None:
+                column = getattr(HikeModel, field)
+                update_dict[field] = func.coalesce(column, value)
+
+    update_dict["updated_by"] = user_id
+
+    if gpx:
+        # Уровни пишутся в той же транзакции, что и новый geojson_data
+        try:
+            await _save_geometries(session, hike_id, gpx.lods)
+        except IntegrityError as e:
+            await session.rollback()
+            if getattr(e.orig, "sqlstate", None) == FOREIGN_KEY_VIOLATION:
+                raise HTTPException(status_code=404, detail="Hike not found")
+            raise
+
+    hike_data = await update_returning(
+        session,
+        HikeModel,
+        [HikeModel.id == hike_id],
+        update_dict,
+        HIKE_CARD.options(),
+    )
+    if not hike_data:
+        raise HTTPException(status_code=404, detail="Hike not found")
+    return hike_data
 
-    if geojson_data:
-        hike_data.geojson_data = geojson_data
 
-    hike_data.updated_by = user_id
+# Столбцы hike_geometries с телами ответа по форматам
+GEOMETRY_BODIES = {
+    "geojson": hike_geometries.c.geojson_gz,
+    "polyline": hike_geometries.c.polyline_gz,
+}
 
-    await session.commit()
-    await session.refresh(hike_data)
-    return hike_data
+
+async def get_hike_geometry_level(
+    session: AsyncSession, hike_id: int, tolerance: float
+) -> tuple[str, float]:
+    """route_s3_key похода и допуск уровня, который отдаётся для tolerance.
+
+    Уровень — самый грубый с допуском не больше tolerance; уровень 0 (исходный
+    трек) подходит всегда. Тела ответа не читаются: их хватает для ETag и 304.
+    Уровни строятся только при записи GPX, здесь в базу ничего не пишется.
+    """
+    level = (
+        select(hike_geometries.c.tolerance_m)
+        .where(
+            hike_geometries.c.hike_id == HikeModel.id,
+            hike_geometries.c.tolerance_m <= tolerance,
+        )
+        .order_by(hike_geometries.c.tolerance_m.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = (
+        await session.execute(
+            select(HikeModel.route_s3_key, level).where(HikeModel.id == hike_id)
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Hike not found")
+    if row[1] is None:
+        raise HTTPException(status_code=404, detail="Hike has no route geometry")
+    return row[0], row[1]
+
+
+async def get_hike_geometry_body(
+    session: AsyncSession, hike_id: int, tolerance_m: float, body_format: str
+) -> tuple[bytes, int]:
+    """Сжатое gzip тело ответа уровня и число точек в нём."""
+    row = (
+        await session.execute(
+            select(GEOMETRY_BODIES[body_format], hike_geometries.c.points).where(
+                hike_geometries.c.hike_id == hike_id,
+                hike_geometries.c.tolerance_m == tolerance_m,
+            )
+        )
+    ).first()
+    if row is None:
+        # Трек заменили между выбором уровня и чтением тела
+        raise HTTPException(status_code=404, detail="Hike geometry not found")
+    return row[0], row[1]
+
+
+async def get_hike_geometry(
+    session: AsyncSession, hike_id: int, tolerance: float
+) -> Optional[dict]:
+    """GeoJSON уровня для tolerance, как в get_hike_geometry_level.
+
+    None — у похода нет трека.
+    """
+    body = await session.scalar(
+        select(hike_geometries.c.geojson_gz)
+        .where(
+            hike_geometries.c.hike_id == hike_id,
+            hike_geometries.c.tolerance_m <= tolerance,
+        )
+        .order_by(hike_geometries.c.tolerance_m.desc())
+        .limit(1)
+    )
+    return json.loads(gzip.decompress(body)) if body is not None else None
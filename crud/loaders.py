@@ -0,0 +1,58 @@
+"""Профили загрузки связей для crud/*.
+
+Профиль перечисляет связи, которые нужны ответу эндпоинта. Они грузятся
+selectinload, все остальные закрыты raiseload: обращение к незаявленной связи
+падает сразу, а не превращается в лишний запрос. Тяжёлые столбцы, которые
+ответу не нужны, перечислены в deferred: их нет в SELECT, а обращение к ним
+падает так же, как к незаявленной связи.
+
+Проверка профилей: python -m benchmarks.loader_profiles
+"""
+
+from sqlalchemy.orm import defer, raiseload, selectinload
+
+from models import HikeModel, UserModel
+
+
+class LoaderProfile:
+    def __init__(
+        self, name: str, model, relationships: tuple = (), deferred: tuple = ()
+    ):
+        self.name = name
+        self.model = model
+        self.relationships = relationships
+        self.deferred = deferred
+
+    @property
+    def queries(self) -> int:
+        """Сколько SQL-запросов уходит на загрузку по профилю."""
+        return 1 + len(self.relationships)
+
+    def options(self) -> tuple:
+        return (
+            *(
+                selectinload(relationship).raiseload("*")
+                for relationship in self.relationships
+            ),
+            *(defer(column, raiseload=True) for column in self.deferred),
+            raiseload("*"),
+        )
+
+
+# Проверка прав в get_current_user, логин, обновление токенов
+AUTH = LoaderProfile("auth", UserModel)
+# /users/me и /users/{id}: UserRead без связей
+PROFILE = LoaderProfile("profile", UserModel)
+# /users для администратора
+ADMIN_LIST = LoaderProfile("admin list", UserModel)
+# Карточка похода: HikeRead берёт ФИО и email руководителя и весь трек
+HIKE_CARD = LoaderProfile("hike card", HikeModel, (HikeModel.leader,))
+# Список походов и всё, чему трек не нужен: geojson_data не читается
+HIKE_LIST = LoaderProfile(
+    "hike list", HikeModel, (HikeModel.leader,), (HikeModel.geojson_data,)
+)
+
+LOADER_PROFILES = {
+    profile.name: profile
+    for profile in (AUTH, PROFILE, ADMIN_LIST, HIKE_CARD, HIKE_LIST)
+}
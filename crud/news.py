@@ -3,7 +3,9 @@ from typing import Optional
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.pagination import PageParams, paginate
 from core.utils import generate_slug
+from crud.utils import update_returning
 from enums import ItemStatus
 from models import NewsModel
 from sqlalchemy import select
@@ -23,7 +25,6 @@ async def create_new_news(session: AsyncSession, news: NewsBase, user_id: int):
 
     session.add(new_news)
     await session.commit()
-    await session.refresh(new_news)
     return new_news
 
 
@@ -41,62 +42,33 @@ async def get_news_by_slug(session: AsyncSession, slug: str):
     return result
 
 
-async def get_news(
-    session: AsyncSession, status: ItemStatus, limit: int, offset: int = 0
-):
+async def get_news(session: AsyncSession, status: ItemStatus, page: PageParams):
+    query = select(NewsModel)
     if status:
         status = ItemStatus(status.upper())
-        if limit == 0:
-            result = await session.scalars(
-                select(NewsModel)
-                .where(NewsModel.status == status)
-                .order_by(NewsModel.created_at.desc())
-                .offset(offset)
-            )
-        else:
-            result = await session.scalars(
-                select(NewsModel)
-                .limit(limit)
-                .where(NewsModel.status == status)
-                .order_by(NewsModel.created_at.desc())
-                .offset(offset)
-            )
-    else:
-        if limit == 0:
-            result = await session.scalars(
-                select(NewsModel).order_by(NewsModel.created_at.desc()).offset(offset)
-            )
-        else:
-            result = await session.scalars(
-                select(NewsModel)
-                .limit(limit)
-                .order_by(NewsModel.created_at.desc())
-                .offset(offset)
-            )
-    if not result:
-        raise HTTPException(status_code=404, detail="News not found")
-    return result.all()
+        query = query.where(NewsModel.status == status)
+    return await paginate(session, query, [NewsModel.created_at, NewsModel.id], page)
 
 
 async def update_news(
     session: AsyncSession,
-    news_data: NewsModel,
+    news_id: int,
     update_data: NewsUpdate,
     user_id: int,
 ):
 
     update_data = update_data.model_dump(exclude_unset=True)
 
-    for field, value in update_data.items():
-        setattr(news_data, field, value)
-
     if "title" in update_data:
-        news_data.slug = generate_slug(news_data.title)
+        update_data["slug"] = generate_slug(update_data["title"])
 
-    news_data.updated_by = user_id
+    update_data["updated_by"] = user_id
 
-    await session.commit()
-    await session.refresh(news_data)
+    news_data = await update_returning(
+        session, NewsModel, [NewsModel.id == news_id], update_data
+    )
+    if not news_data:
+        raise HTTPException(status_code=404, detail="News not found")
     return news_data
 
 
@@ -1,8 +1,10 @@
 from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from models import HikeModel, HikeParticipantModel, UserModel, ClubParticipantModel
+from schemas import HikeParticipantBase, HikeParticipantImportResult
 
 
 async def create_hike_participant(
@@ -15,10 +17,74 @@ async def create_hike_participant(
     )
     session.add(participant)
     await session.commit()
-    await session.refresh(participant)
     return participant
 
 
+async def add_hike_participants(
+    session: AsyncSession, participants: dict[int, HikeParticipantBase]
+) -> list[HikeParticipantImportResult]:
+    """Массовое добавление участников походов за три запроса.
+
+    participants — номер строки (в запросе или CSV) -> участник. Походы и
+    пользователи проверяются двумя IN-запросами, все подходящие строки
+    вставляются одним INSERT ... ON CONFLICT DO NOTHING RETURNING.
+    Возвращает результат по каждой строке.
+    """
+    if not participants:
+        return []
+
+    hike_ids = {p.hike_id for p in participants.values()}
+    user_ids = {p.user_id for p in participants.values()}
+    known_hikes = set(
+        await session.scalars(select(HikeModel.id).where(HikeModel.id.in_(hike_ids)))
+    )
+    known_users = set(
+        await session.scalars(select(UserModel.id).where(UserModel.id.in_(user_ids)))
+    )
+
+    results = {}
+    to_insert = {}
+    for row, participant in participants.items():
+        result = HikeParticipantImportResult(
+            row=row, status="added", **participant.model_dump()
+        )
+        key = (participant.hike_id, participant.user_id)
+        if participant.hike_id not in known_hikes:
+            result.status = "hike_not_found"
+        elif participant.user_id not in known_users:
+            result.status = "user_not_found"
+        elif key in to_insert:
+            result.status = "duplicate"
+        else:
+            to_insert[key] = result
+        results[row] = result
+
+    if to_insert:
+        inserted = await session.execute(
+            pg_insert(HikeParticipantModel)
+            .values(
+                [
+                    {"hike_id": r.hike_id, "user_id": r.user_id, "role": r.role}
+                    for r in to_insert.values()
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["hike_id", "user_id"])
+            .returning(
+                HikeParticipantModel.id,
+                HikeParticipantModel.hike_id,
+                HikeParticipantModel.user_id,
+            )
+        )
+        for participant_id, hike_id, user_id in inserted:
+            to_insert.pop((hike_id, user_id)).id = participant_id
+        # Не вернулись из RETURNING — такие участники уже были в походе
+        for result in to_insert.values():
+            result.status = "exists"
+        await session.commit()
+
+    return [results[row] for row in sorted(results)]
+
+
 async def get_hike_participants(session: AsyncSession, hike_id: int):
     stmt = (
         select(HikeModel)
@@ -51,5 +117,4 @@ async def create_club_participant(
     )
     session.add(participant)
     await session.commit()
-    await session.refresh(participant)
     return participant
@@ -1,7 +1,10 @@
 from typing import Optional
 
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.pagination import PageParams, paginate
+from crud.utils import update_returning
 from enums import ItemStatus
 from models import PassModel
 from sqlalchemy import select, or_
@@ -9,15 +12,12 @@ from sqlalchemy import select, or_
 from schemas import PassBase, PassUpdate
 
 
-async def get_all_passes(session: AsyncSession, status: ItemStatus):
+async def get_all_passes(session: AsyncSession, status: ItemStatus, page: PageParams):
+    query = select(PassModel)
     if status:
         status = ItemStatus(status.upper())
-        result = await session.scalars(
-            select(PassModel).where(PassModel.status == status)
-        )
-    else:
-        result = await session.scalars(select(PassModel))
-    return result.all()
+        query = query.where(PassModel.status == status)
+    return await paginate(session, query, [PassModel.id], page)
 
 
 async def get_pass_by_id(session: AsyncSession, id: int):
@@ -46,12 +46,11 @@ async def create_new_pass(session: AsyncSession, pass_stmt: PassBase, user_id: i
     )
     session.add(new_pass)
     await session.commit()
-    await session.refresh(new_pass)
     return new_pass
 
 
 async def update_pass(
-    session: AsyncSession, db_pass: PassModel, data: PassUpdate, user_id: int
+    session: AsyncSession, pass_id: int, data: PassUpdate, user_id: int
 ) -> PassModel:
     ALLOWED_FIELDS = {
         "name",
@@ -65,13 +64,16 @@ async def update_pass(
         "status",
     }
 
-    update_data = data.model_dump(exclude_unset=True)
-
-    for field, value in update_data.items():
-        if field in ALLOWED_FIELDS:
-            setattr(db_pass, field, value)
+    update_data = {
+        field: value
+        for field, value in data.model_dump(exclude_unset=True).items()
+        if field in ALLOWED_FIELDS
+    }
+    update_data["updated_by"] = user_id
 
-    db_pass.updated_by = user_id
-    await session.commit()
-    await session.refresh(db_pass)
+    db_pass = await update_returning(
+        session, PassModel, [PassModel.id == pass_id], update_data
+    )
+    if not db_pass:
+        raise HTTPException(status_code=404, detail="Pass not found")
     return db_pass
@@ -1,7 +1,11 @@
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
+from sqlalchemy import Date, JSON, String, cast, delete, func, insert, select, text
 
+from core.config import settings
 from models import (
     UserModel,
     HikeModel,
@@ -9,71 +13,291 @@ from models import (
     ArticleModel,
     NewsModel,
     PassModel,
+    ApplicationStatus,
+    statistics_counters,
+    statistics_daily,
+    statistics_dirty_days,
 )
-from schemas.statistics import StatisticsDetail
+from schemas.statistics import StatisticsDetail, StatisticsTimeseries
 
+# Ключи advisory lock, чтобы воркеры не пересчитывали одно и то же одновременно
+STATISTICS_LOCK_ID = 7_201_106
+STATISTICS_DAILY_LOCK_ID = 7_201_107
 
-async def get_admin_statistics_data(session: AsyncSession) -> StatisticsDetail:
-    """Формирует статистику для админ-панели"""
+GROUPED_FIELDS = ("hikes_by_status", "applications_by_status")
 
-    # === USERS ===
-    total_users = await session.scalar(select(func.count()).select_from(UserModel)) or 0
 
-    date_30_days_ago = datetime.utcnow() - timedelta(days=30)
+def _count(model, *where):
+    return select(func.count()).select_from(model).where(*where).scalar_subquery()
 
-    # новых пользователей за 30 дней
-    new_users_last_30_days = (
-        await session.scalar(
-            select(func.count())
-            .select_from(UserModel)
-            .where(UserModel.created_at >= date_30_days_ago)
-        )
-    ) or 0
 
-    # === HIKES ===
-    total_hikes = await session.scalar(select(func.count()).select_from(HikeModel)) or 0
+def _count_by(column):
+    grouped = (
+        select(cast(column, String).label("key"), func.count().label("count"))
+        .where(column.is_not(None))
+        .group_by(column)
+        .subquery()
+    )
+    return select(
+        func.json_object_agg(grouped.c.key, grouped.c.count, type_=JSON)
+    ).scalar_subquery()
+
 
-    hikes_by_status_query = await session.execute(
-        select(HikeModel.status, func.count()).group_by(HikeModel.status)
+def statistics_query():
+    """Вся статистика одним запросом: каждая метрика — подзапрос."""
+    since = datetime.now(timezone.utc) - timedelta(days=30)
+    return select(
+        _count(UserModel).label("total_users"),
+        _count(UserModel, UserModel.created_at >= since).label(
+            "new_users_last_30_days"
+        ),
+        _count(HikeModel).label("total_hikes"),
+        _count_by(HikeModel.status).label("hikes_by_status"),
+        _count(ApplicationModel).label("total_applications"),
+        _count_by(ApplicationModel.status).label("applications_by_status"),
+        _count(ArticleModel).label("total_articles"),
+        _count(NewsModel).label("total_news"),
+        _count(PassModel).label("total_passes"),
     )
-    hikes_by_status = {
-        status.value: count for status, count in hikes_by_status_query.all()
-    }
 
-    # === APPLICATIONS ===
-    total_applications = (
-        await session.scalar(select(func.count()).select_from(ApplicationModel)) or 0
+
+async def compute_statistics(session: AsyncSession) -> StatisticsDetail:
+    row = (await session.execute(statistics_query())).one()._asdict()
+    for field in GROUPED_FIELDS:
+        row[field] = row[field] or {}
+    return StatisticsDetail(**row)
+
+
+def _to_counters(data: StatisticsDetail) -> dict[str, int]:
+    counters = {}
+    for field, value in data.model_dump(exclude={"refreshed_at"}).items():
+        if field in GROUPED_FIELDS:
+            for key, count in value.items():
+                counters[f"{field}.{key}"] = count
+        else:
+            counters[field] = value
+    return counters
+
+
+def _from_counters(rows) -> StatisticsDetail:
+    data: dict = {field: {} for field in GROUPED_FIELDS}
+    for name, value, _ in rows:
+        field, _, key = name.partition(".")
+        if key:
+            data[field][key] = value
+        else:
+            data[field] = value
+    data["refreshed_at"] = min(refreshed_at for _, _, refreshed_at in rows)
+    return StatisticsDetail(**data)
+
+
+async def refresh_statistics_counters(session: AsyncSession) -> bool:
+    """Пересчитывает снимок счётчиков. False — пересчёт уже идёт в другом воркере."""
+    locked = await session.scalar(
+        select(func.pg_try_advisory_xact_lock(STATISTICS_LOCK_ID))
     )
+    if not locked:
+        await session.rollback()
+        return False
 
-    applications_by_status_query = await session.execute(
-        select(ApplicationModel.status, func.count()).group_by(ApplicationModel.status)
+    counters = _to_counters(await compute_statistics(session))
+    await session.execute(delete(statistics_counters))
+    await session.execute(
+        insert(statistics_counters),
+        [{"name": name, "value": value} for name, value in counters.items()],
     )
-    applications_by_status = {
-        status.value: count for status, count in applications_by_status_query.all()
-    }
+    await session.commit()
+    return True
+
+
+async def get_statistics_counters(
+    session: AsyncSession,
+) -> Optional[StatisticsDetail]:
+    """Снимок счётчиков, если он не старше STATISTICS_MAX_STALENESS_SECONDS."""
+    rows = (
+        await session.execute(
+            select(
+                statistics_counters.c.name,
+                statistics_counters.c.value,
+                statistics_counters.c.refreshed_at,
+            )
+        )
+    ).all()
+    if not rows:
+        return None
+
+    data = _from_counters(rows)
+    max_age = timedelta(seconds=settings.STATISTICS_MAX_STALENESS_SECONDS)
+    if datetime.now(timezone.utc) - data.refreshed_at > max_age:
+        return None
+    return data
+
+
+async def get_admin_statistics_data(session: AsyncSession) -> StatisticsDetail:
+    """Формирует статистику для админ-панели"""
+    if settings.STATISTICS_COUNTERS:
+        data = await get_statistics_counters(session)
+        if data is not None:
+            return data
+    # Счётчики выключены или устарели — считаем по таблицам
+    return await compute_statistics(session)
+
+
+# Источник (таблица) -> шаблон его метрик и пересчёт за дни :days (UTC).
+# Соединение с unnest даёт диапазонный поиск по индексу на каждый день.
+DAILY_ROLLUPS = {
+    "users": (
+        "registrations",
+        """
+        SELECT 'registrations', d.day, count(*)
+        FROM unnest(CAST(:days AS date[])) AS d(day)
+        JOIN users u
+          ON u.created_at >= d.day::timestamp AT TIME ZONE 'UTC'
+         AND u.created_at < (d.day + 1)::timestamp AT TIME ZONE 'UTC'
+        GROUP BY d.day
+        """,
+    ),
+    "applications": (
+        "applications.%",
+        """
+        SELECT 'applications.' || a.status::text, d.day, count(*)
+        FROM unnest(CAST(:days AS date[])) AS d(day)
+        JOIN applications a
+          ON a.created_at >= d.day AND a.created_at < d.day + 1
+        WHERE a.status IS NOT NULL
+        GROUP BY a.status, d.day
+        """,
+    ),
+    "hikes": (
+        "hikes",
+        """
+        SELECT 'hikes', h.start_date, count(*)
+        FROM hikes h
+        WHERE h.start_date = ANY(CAST(:days AS date[]))
+        GROUP BY h.start_date
+        """,
+    ),
+    "news": (
+        "news_published",
+        """
+        SELECT 'news_published', d.day, count(*)
+        FROM unnest(CAST(:days AS date[])) AS d(day)
+        JOIN news n
+          ON n.status = 'PUBLISHED'
+         AND n.created_at >= d.day::timestamp AT TIME ZONE 'UTC'
+         AND n.created_at < (d.day + 1)::timestamp AT TIME ZONE 'UTC'
+        GROUP BY d.day
+        """,
+    ),
+    "articles": (
+        "articles_published",
+        """
+        SELECT 'articles_published', d.day, count(*)
+        FROM unnest(CAST(:days AS date[])) AS d(day)
+        JOIN articles a
+          ON a.status = 'PUBLISHED'
+         AND a.created_at >= d.day::timestamp AT TIME ZONE 'UTC'
+         AND a.created_at < (d.day + 1)::timestamp AT TIME ZONE 'UTC'
+        GROUP BY d.day
+        """,
+    ),
+}
+
+TIMESERIES_METRICS = [
+    "registrations",
+    *(f"applications.{status.value}" for status in ApplicationStatus),
+    "hikes",
+    "news_published",
+    "articles_published",
+]
+
 
-    # === ARTICLES ===
-    total_articles = (
-        await session.scalar(select(func.count()).select_from(ArticleModel)) or 0
+async def refresh_statistics_daily(session: AsyncSession) -> int:
+    """Пересчитывает дневные агрегаты за дни, отмеченные триггерами.
+
+    Отметки забираются и агрегаты пишутся в одной транзакции: при ошибке
+    отметки остаются до следующего запуска. Возвращает число пересчитанных
+    пар (источник, день).
+    """
+    locked = await session.scalar(
+        select(func.pg_try_advisory_xact_lock(STATISTICS_DAILY_LOCK_ID))
     )
+    if not locked:
+        await session.rollback()
+        return 0
+
+    dirty = (
+        await session.execute(
+            delete(statistics_dirty_days).returning(
+                statistics_dirty_days.c.source, statistics_dirty_days.c.day
+            )
+        )
+    ).all()
+
+    days_by_source = defaultdict(list)
+    for source, day in dirty:
+        days_by_source[source].append(day)
+
+    for source, days in days_by_source.items():
+        metric_pattern, rollup = DAILY_ROLLUPS[source]
+        await session.execute(
+            delete(statistics_daily).where(
+                statistics_daily.c.metric.like(metric_pattern),
+                statistics_daily.c.day.in_(days),
+            )
+        )
+        await session.execute(
+            text(f"INSERT INTO statistics_daily (metric, day, value) {rollup}"),
+            {"days": days},
+        )
+
+    await session.commit()
+    return len(dirty)
+
+
+def _period_start(day: date, interval: str) -> date:
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day
 
-    # === NEWS ===
-    total_news = await session.scalar(select(func.count()).select_from(NewsModel)) or 0
 
-    # === PASSES ===
-    total_passes = (
-        await session.scalar(select(func.count()).select_from(PassModel)) or 0
+def _next_period(day: date, interval: str) -> date:
+    if interval == "week":
+        return day + timedelta(weeks=1)
+    if interval == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def timeseries_periods(start: date, end: date, interval: str) -> list[date]:
+    periods = []
+    period = _period_start(start, interval)
+    while period <= end:
+        periods.append(period)
+        period = _next_period(period, interval)
+    return periods
+
+
+async def get_statistics_timeseries(
+    session: AsyncSession, interval: str, start: date, end: date
+) -> StatisticsTimeseries:
+    """Временные ряды из statistics_daily, без обращения к исходным таблицам."""
+    period = cast(func.date_trunc(interval, statistics_daily.c.day), Date)
+    rows = await session.execute(
+        select(statistics_daily.c.metric, period, func.sum(statistics_daily.c.value))
+        .where(statistics_daily.c.day.between(start, end))
+        .group_by(statistics_daily.c.metric, period)
     )
 
-    # === RETURN RESULT ===
-    return StatisticsDetail(
-        total_users=total_users,
-        new_users_last_30_days=new_users_last_30_days,
-        total_hikes=total_hikes,
-        hikes_by_status=hikes_by_status,
-        total_applications=total_applications,
-        applications_by_status=applications_by_status,
-        total_articles=total_articles,
-        total_news=total_news,
-        total_passes=total_passes,
+    periods = timeseries_periods(start, end, interval)
+    index = {period: i for i, period in enumerate(periods)}
+    series = {metric: [0] * len(periods) for metric in TIMESERIES_METRICS}
+    for metric, period_start, value in rows:
+        if metric in series:
+            series[metric][index[period_start]] = value
+
+    return StatisticsTimeseries(
+        interval=interval, start=start, end=end, periods=periods, series=series
     )
@@ -1,42 +1,103 @@
+import hashlib
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import UserModel
-from sqlalchemy import select, or_, delete
+from core.config import settings
+from sqlalchemy import select, delete, update, func, or_
 
 from models.tokens import TokenModel
 
 
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _expires_at() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(
+        days=settings.REFRESH_TOKEN_EXPIRES_DAYS
+    )
+
+
 async def save_token(
     session: AsyncSession,
     refresh_token: str,
     user_id: int,
+    family: uuid.UUID,
+    device: Optional[str] = None,
 ):
-    token_data = await session.scalar(
-        select(TokenModel).where(TokenModel.user_id == user_id)
+    new_token = TokenModel(
+        token_hash=_digest(refresh_token),
+        family=family,
+        user_id=user_id,
+        device=device[:255] if device else None,
+        expires_at=_expires_at(),
     )
-    if token_data:
-        token_data.token = refresh_token
-        await session.commit()
-        await session.refresh(token_data)
-        return token_data
-    else:
-        new_token = TokenModel(
-            token=refresh_token,
-            user_id=user_id,
+    session.add(new_token)
+    await session.commit()
+    return new_token
+
+
+async def rotate_token(
+    session: AsyncSession,
+    refresh_token: str,
+    new_refresh_token: str,
+    family: uuid.UUID,
+) -> Optional[int]:
+    """Атомарно заменяет текущий токен сессии на новый.
+
+    Предыдущий токен тоже принимается REFRESH_TOKEN_REUSE_GRACE_SECONDS после
+    ротации: так вторая вкладка, отправившая его одновременно с первой, просто
+    получает свою пару токенов. Возвращает user_id или None, если токен уже
+    заменён (и окно прошло), отозван или истёк.
+    """
+    digest = _digest(refresh_token)
+    grace = timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+    user_id = await session.scalar(
+        update(TokenModel)
+        .where(
+            TokenModel.family == family,
+            TokenModel.expires_at > func.now(),
+            or_(
+                TokenModel.token_hash == digest,
+                (TokenModel.previous_hash == digest)
+                & (TokenModel.rotated_at > func.now() - grace),
+            ),
         )
-        session.add(new_token)
-        await session.commit()
-        await session.refresh(new_token)
-        return new_token
+        .values(
+            # В SET справа старые значения строки: предыдущим становится текущий
+            previous_hash=TokenModel.token_hash,
+            token_hash=_digest(new_refresh_token),
+            rotated_at=func.now(),
+            expires_at=_expires_at(),
+            last_used_at=func.now(),
+        )
+        .returning(TokenModel.user_id)
+    )
+    await session.commit()
+    return user_id
+
+
+async def revoke_token_family(
+    session: AsyncSession, family: uuid.UUID
+) -> Optional[int]:
+    """Удаляет сессию, возвращает её user_id или None, если её уже нет."""
+    user_id = await session.scalar(
+        delete(TokenModel)
+        .where(TokenModel.family == family)
+        .returning(TokenModel.user_id)
+    )
+    await session.commit()
+    return user_id
 
 
 async def remove_token(
     token: str,
     session: AsyncSession,
 ):
-    stmt = delete(TokenModel).where(TokenModel.token == token)
+    stmt = delete(TokenModel).where(TokenModel.token_hash == _digest(token))
     await session.execute(stmt)
     await session.commit()
 
@@ -46,6 +107,20 @@ async def find_token(
     session: AsyncSession,
 ):
     token_data = await session.scalar(
-        select(TokenModel).where(TokenModel.token == token)
+        select(TokenModel).where(TokenModel.token_hash == _digest(token))
     )
     return token_data
+
+
+async def delete_expired_tokens(session: AsyncSession, batch_size: int) -> int:
+    expired_ids = (
+        select(TokenModel.id)
+        .where(TokenModel.expires_at <= func.now())
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        delete(TokenModel).where(TokenModel.id.in_(expired_ids))
+    )
+    await session.commit()
+    return result.rowcount
@@ -2,10 +2,16 @@ from typing import Optional
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import joinedload
 
+from core.cache import invalidate_principal
+from core.pagination import PageParams, paginate
+from core.security import permissions_revocations
+from crud.loaders import ADMIN_LIST, AUTH, PROFILE
+from crud.utils import update_returning
 from models import UserModel, HikeParticipantModel
-from sqlalchemy import select, or_
+from sqlalchemy import ARRAY, String, case, cast, func, select, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from schemas import RegisterUser, UserUpdate
 from schemas.users import UserAdminUpdate
@@ -17,23 +23,25 @@ async def get_user_by_email_or_username(
     email: Optional[str],
 ) -> Optional[UserModel]:
     db_user = await session.scalar(
-        select(UserModel).where(
-            or_(UserModel.username == username, UserModel.email == email)
-        )
+        select(UserModel)
+        .where(or_(UserModel.username == username, UserModel.email == email))
+        .options(*AUTH.options())
     )
     return db_user
 
 
-async def get_users(session: AsyncSession):
-    result = await session.scalars(select(UserModel))
-    return result.all()
+async def get_users(session: AsyncSession, page: PageParams):
+    return await paginate(
+        session,
+        select(UserModel).options(*ADMIN_LIST.options()),
+        [UserModel.created_at, UserModel.id],
+        page,
+    )
 
 
 async def get_user_by_id(session: AsyncSession, user_id: int) -> Optional[UserModel]:
     db_user = await session.scalar(
-        select(UserModel)
-        .where((UserModel.id == user_id))
-        .options(selectinload(UserModel.hike_participations))
+        select(UserModel).where((UserModel.id == user_id)).options(*PROFILE.options())
     )
     return db_user
 
@@ -44,7 +52,7 @@ async def get_user_by_username(
     db_user = await session.scalar(
         select(UserModel)
         .where((UserModel.username == username))
-        .options(selectinload(UserModel.hike_participations))
+        .options(*PROFILE.options())
     )
     return db_user
 
@@ -53,29 +61,39 @@ async def create_new_user(
     session: AsyncSession,
     user: RegisterUser,
     hashed_password: str,
-) -> UserModel:
-    new_user = UserModel(
-        username=user.username,
-        email=user.email,
-        password=hashed_password,
-        first_name=user.first_name.title(),
-        last_name=user.last_name.title(),
-        middle_name=user.middle_name.title() if user.middle_name else None,
+) -> Optional[UserModel]:
+    """Занятость username и email проверяют уникальные ограничения таблицы.
+
+    None — такой пользователь уже есть; транзакция откатывается вместе со всем,
+    что было добавлено в сессию до вызова.
+    """
+    new_user = await session.scalar(
+        pg_insert(UserModel)
+        .values(
+            username=user.username,
+            email=user.email,
+            password=hashed_password,
+            first_name=user.first_name.title(),
+            last_name=user.last_name.title(),
+            middle_name=user.middle_name.title() if user.middle_name else None,
+        )
+        .on_conflict_do_nothing()
+        .returning(UserModel)
     )
-    session.add(new_user)
+    if new_user is None:
+        await session.rollback()
+        return None
     await session.commit()
-    await session.refresh(new_user)
     return new_user
 
 
 async def activate_user(session: AsyncSession, username: str):
-    user = await session.scalar(select(UserModel).where(UserModel.username == username))
+    user = await update_returning(
+        session, UserModel, [UserModel.username == username], {"is_activated": True}
+    )
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-
-    user.is_activated = True
-    await session.commit()
     return user
 
 
@@ -87,47 +105,69 @@ async def delete_user_by_id(session: AsyncSession, user_id: int):
 
     await session.delete(user)
     await session.commit()
+    invalidate_principal(user.username)
+    permissions_revocations.revoke(user.id, user.permissions_version + 1)
     return user
 
 
 async def update_user_avatar(session: AsyncSession, file_url: str, user_id: int):
-    user = await session.scalar(select(UserModel).where(UserModel.id == user_id))
+    user = await update_returning(
+        session, UserModel, [UserModel.id == user_id], {"avatar": file_url}
+    )
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.avatar = file_url
-
-    await session.commit()
-    await session.refresh(user)
+    invalidate_principal(user.username)
     return user
 
 
-async def update_user(
-    session: AsyncSession, user_data: UserModel, update_data: UserUpdate
-):
-
-    update_data = update_data.model_dump(exclude_unset=True)
+async def update_user(session: AsyncSession, user_id: int, update_data: UserUpdate):
+    user_data = await update_returning(
+        session,
+        UserModel,
+        [UserModel.id == user_id],
+        update_data.model_dump(exclude_unset=True),
+    )
 
-    for field, value in update_data.items():
-        setattr(user_data, field, value)
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    await session.commit()
-    await session.refresh(user_data)
+    invalidate_principal(user_data.username)
     return user_data
 
 
 async def update_admin_user(
-    session: AsyncSession, user_data: UserModel, update_data: UserAdminUpdate
+    session: AsyncSession, user_id: int, update_data: UserAdminUpdate
 ):
 
     update_data = update_data.model_dump(exclude_unset=True)
 
-    for field, value in update_data.items():
-        setattr(user_data, field, value)
+    roles_changed = "roles" in update_data
+    if roles_changed:
+        # Версия прав растёт, только если набор ролей действительно изменился
+        new_roles = cast(update_data["roles"] or [], ARRAY(String))
+        old_roles = func.coalesce(UserModel.roles, cast([], ARRAY(String)))
+        update_data["permissions_version"] = case(
+            (
+                old_roles.op("@>", is_comparison=True)(new_roles)
+                & old_roles.op("<@", is_comparison=True)(new_roles),
+                UserModel.permissions_version,
+            ),
+            else_=UserModel.permissions_version + 1,
+        )
 
-    await session.commit()
-    await session.refresh(user_data)
+    user_data = await update_returning(
+        session, UserModel, [UserModel.id == user_id], update_data
+    )
+
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    invalidate_principal(user_data.username)
+    if roles_changed:
+        # Повторный отзыв с той же версией ничего не меняет
+        permissions_revocations.revoke(user_data.id, user_data.permissions_version)
     return user_data
 
 
@@ -141,18 +181,28 @@ async def get_user_hike_participations(session: AsyncSession, user_id: int):
 
 
 async def ban_user_by_id(session: AsyncSession, user_id: int):
-    user_data = await session.scalar(select(UserModel).where(UserModel.id == user_id))
+    user_data = await update_returning(
+        session,
+        UserModel,
+        [UserModel.id == user_id],
+        {"is_banned": True, "permissions_version": UserModel.permissions_version + 1},
+    )
 
-    user_data.is_banned = True
-    await session.commit()
-    await session.refresh(user_data)
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    invalidate_principal(user_data.username)
+    permissions_revocations.revoke(user_data.id, user_data.permissions_version)
     return user_data
 
 
 async def unban_user_by_id(session: AsyncSession, user_id: int):
-    user_data = await session.scalar(select(UserModel).where(UserModel.id == user_id))
+    user_data = await update_returning(
+        session, UserModel, [UserModel.id == user_id], {"is_banned": False}
+    )
 
-    user_data.is_banned = False
-    await session.commit()
-    await session.refresh(user_data)
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    invalidate_principal(user_data.username)
     return user_data
@@ -0,0 +1,22 @@
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def update_returning(
+    session: AsyncSession, model, where: list, values: dict, options: tuple = ()
+) -> Optional[object]:
+    """UPDATE ... RETURNING: изменённая строка приходит в ответе на сам UPDATE,
+    без предварительного SELECT и refresh после commit.
+
+    Возвращает объект модели или None, если под условие не попала ни одна строка.
+    """
+    if not values:
+        return await session.scalar(select(model).where(*where).options(*options))
+
+    obj = await session.scalar(
+        update(model).where(*where).values(**values).returning(model).options(*options)
+    )
+    await session.commit()
+    return obj
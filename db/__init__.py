@@ -1,7 +1,8 @@
 __all__ = {
     "db_helper",
     "get_async_session",
+    "get_primary_session",
 }
 
 from .engine import db_helper
-from .session import get_async_session
+from .session import get_async_session, get_primary_session
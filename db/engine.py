@@ -1,17 +1,45 @@
+import asyncio
 import secrets
 from passlib.hash import bcrypt
 
 from models import UserModel
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from core.config import settings
-from services.email import send_email
+from db.pool import InstrumentedAsyncPool
+from db.querycount import instrument
+from db.replica import Replica
+from services.email import queue_email
+
+
+def engine_options() -> dict:
+    return {
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "timeout": settings.DB_CONNECT_TIMEOUT,
+            "command_timeout": settings.DB_COMMAND_TIMEOUT,
+        },
+    }
+
+
+def replica_engine_options() -> dict:
+    options = engine_options()
+    # Реплика принимает только чтение, даже если кто-то попробует записать
+    options["connect_args"]["server_settings"] = {"default_transaction_read_only": "on"}
+    return options
 
 
 class DatabaseHelper:
-    def __init__(self, url: str, echo: bool = False):
+    def __init__(self, url: str, echo: bool = False, replica_urls: list[str] = ()):
         self.engine = create_async_engine(
             url=url,
             echo=echo,
+            **engine_options(),
         )
         self.session_factory = async_sessionmaker(
             bind=self.engine,
@@ -19,6 +47,42 @@ class DatabaseHelper:
             autocommit=False,
             expire_on_commit=False,
         )
+        self.replicas = [
+            Replica(replica_url, echo=echo, **replica_engine_options())
+            for replica_url in replica_urls
+        ]
+        self._replica_turn = 0
+        for engine in [self.engine, *(replica.engine for replica in self.replicas)]:
+            instrument(engine)
+
+    def read_session_factory(self) -> async_sessionmaker:
+        """Фабрика сессий для чтения: реплика по кругу или primary,
+        если ни одна реплика не укладывается в REPLICA_MAX_LAG_SECONDS."""
+        available = [replica for replica in self.replicas if replica.available]
+        if not available:
+            return self.session_factory
+        self._replica_turn += 1
+        return available[self._replica_turn % len(available)].session_factory
+
+    async def monitor_replicas(self):
+        while True:
+            await asyncio.gather(*(replica.check_lag() for replica in self.replicas))
+            await asyncio.sleep(settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS)
+
+    async def prefill_pool(self):
+        """Открывает pool_size соединений заранее, чтобы первые запросы
+        после старта не ждали подключения."""
+        connections = await asyncio.gather(
+            *(self.engine.connect().start() for _ in range(settings.DB_POOL_SIZE))
+        )
+        for connection in connections:
+            await connection.close()
+
+    def pool_stats(self) -> dict:
+        return self.engine.pool.stats()
+
+    def replica_stats(self) -> list[dict]:
+        return [replica.stats() for replica in self.replicas]
 
     async def create_random_user(self):
         async with self.session_factory() as session:
@@ -37,16 +101,17 @@ class DatabaseHelper:
                 roles=["guest", "admin"],
             )
             session.add(user)
-            await session.commit()
-
-            await send_email(
+            queue_email(
+                session,
                 subject="Admin credentials created",
                 recipients=[f"{settings.ADMIN_EMAIL}"],
                 body=f"Username: {username}\nPassword: {password_raw}",
             )
+            await session.commit()
 
 
 db_helper = DatabaseHelper(
     url=settings.DATABASE_URL,
     echo=settings.DEBUG,
+    replica_urls=settings.DATABASE_REPLICA_URLS,
 )
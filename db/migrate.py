@@ -0,0 +1,214 @@
+"""Версионные миграции схемы.
+
+Миграция — файл migrations/NNNN_name.sql, применяется целиком в одной
+транзакции. Файлы с первой строкой `-- migrate: no-transaction` выполняются
+по одному оператору без транзакции (нужно для CREATE INDEX CONCURRENTLY).
+Миграция данных, которую не выразить в SQL, — файл migrations/NNNN_name.py
+с функцией `async def upgrade(connection)`: она получает соединение asyncpg
+и выполняется в одной транзакции.
+Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс, который
+IF NOT EXISTS пропустил бы; такой индекс удаляется перед повторным созданием.
+Применённые версии записываются в таблицу schema_version.
+
+    python -m db.migrate upgrade [--to N]
+    python -m db.migrate current
+    python -m db.migrate new <name>
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import re
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+MIGRATION_NAME = re.compile(r"(\d{4})_(\w+)\.(sql|py)")
+# Ключ advisory lock, чтобы параллельные деплои не применяли миграции одновременно
+MIGRATION_LOCK_ID = 7_201_105
+NO_TRANSACTION = "-- migrate: no-transaction"
+
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL
+)
+"""
+
+RECORD_VERSION = "INSERT INTO schema_version (version, name) VALUES ($1, $2)"
+
+CONCURRENT_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"([\w.\"]+)",
+    re.IGNORECASE,
+)
+INVALID_INDEX = """
+SELECT indexrelid::regclass::text FROM pg_index
+WHERE indexrelid = to_regclass($1) AND NOT indisvalid
+"""
+
+
+def load_migrations() -> list[tuple[int, str, Path]]:
+    migrations = []
+    for path in sorted(MIGRATIONS_DIR.glob("[0-9]*.*")):
+        match = MIGRATION_NAME.fullmatch(path.name)
+        if not match:
+            raise RuntimeError(f"Invalid migration file name: {path.name}")
+        migrations.append((int(match[1]), match[2], path))
+
+    versions = [version for version, _, _ in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError("Duplicate migration versions")
+    return migrations
+
+
+def load_python_migration(path: Path):
+    spec = importlib.util.spec_from_file_location(f"migrations.{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.upgrade
+
+
+def split_statements(sql: str) -> list[str]:
+    statements = []
+    for chunk in sql.split(";\n"):
+        code = [line for line in chunk.splitlines() if not line.startswith("--")]
+        if "".join(code).strip():
+            statements.append(chunk.strip())
+    return statements
+
+
+async def drop_invalid_index(raw, statement: str):
+    """Удаляет невалидный индекс, который создаёт statement, если он остался."""
+    code = "\n".join(
+        line for line in statement.splitlines() if not line.startswith("--")
+    )
+    match = CONCURRENT_INDEX.match(code.strip())
+    if not match:
+        return
+    name = await raw.fetchval(INVALID_INDEX, match[1])
+    if name:
+        logger.warning("Dropping invalid index %s left by a failed migration", name)
+        await raw.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def head_version() -> int:
+    migrations = load_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+async def check_schema_version(engine: AsyncEngine):
+    """Проверка при старте приложения — один запрос, без DDL."""
+    expected = head_version()
+    try:
+        async with engine.connect() as conn:
+            current = await conn.scalar(
+                text("SELECT coalesce(max(version), 0) FROM schema_version")
+            )
+    except ProgrammingError:
+        current = 0
+
+    if current < expected:
+        raise RuntimeError(
+            f"Database schema is at version {current}, expected {expected}. "
+            "Run `python -m db.migrate upgrade`"
+        )
+    if current > expected:
+        logger.warning(
+            "Database schema version %s is newer than code version %s",
+            current,
+            expected,
+        )
+
+
+async def upgrade(engine: AsyncEngine, target: int | None = None) -> list[int]:
+    applied = []
+    async with engine.connect() as conn:
+        # Многооператорные скрипты выполняются напрямую через asyncpg
+        raw = (await conn.get_raw_connection()).driver_connection
+        await raw.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_ID)
+        try:
+            await raw.execute(SCHEMA_VERSION_DDL)
+            current = await raw.fetchval(
+                "SELECT coalesce(max(version), 0) FROM schema_version"
+            )
+            for version, name, path in load_migrations():
+                if version <= current or (target is not None and version > target):
+                    continue
+                sql = path.read_text(encoding="utf-8")
+                if path.suffix == ".py":
+                    migrate_data = load_python_migration(path)
+                    async with raw.transaction():
+                        await migrate_data(raw)
+                        await raw.execute(RECORD_VERSION, version, name)
+                elif sql.startswith(NO_TRANSACTION):
+                    for statement in split_statements(sql):
+                        await drop_invalid_index(raw, statement)
+                        await raw.execute(statement)
+                    await raw.execute(RECORD_VERSION, version, name)
+                else:
+                    async with raw.transaction():
+                        await raw.execute(sql)
+                        await raw.execute(RECORD_VERSION, version, name)
+                logger.info("Applied migration %s", path.name)
+                applied.append(version)
+        finally:
+            await raw.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_ID)
+    return applied
+
+
+async def current_version(engine: AsyncEngine) -> int:
+    try:
+        async with engine.connect() as conn:
+            return await conn.scalar(
+                text("SELECT coalesce(max(version), 0) FROM schema_version")
+            )
+    except ProgrammingError:
+        return 0
+
+
+def new_migration(name: str) -> Path:
+    if not re.fullmatch(r"\w+", name):
+        raise ValueError("Migration name may contain only letters, digits and _")
+    path = MIGRATIONS_DIR / f"{head_version() + 1:04d}_{name}.sql"
+    path.write_text(f"-- {name}\n", encoding="utf-8")
+    return path
+
+
+async def main(args: argparse.Namespace):
+    engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        if args.command == "upgrade":
+            applied = await upgrade(engine, args.to)
+            print(f"Applied: {applied}" if applied else "Already up to date")
+        elif args.command == "current":
+            print(f"Current: {await current_version(engine)}, head: {head_version()}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m db.migrate")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, help="stop at this version")
+    commands.add_parser("current", help="show applied and latest versions")
+    new_parser = commands.add_parser("new", help="create an empty migration")
+    new_parser.add_argument("name")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.command == "new":
+        print(new_migration(args.name))
+    else:
+        asyncio.run(main(args))
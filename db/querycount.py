@@ -0,0 +1,153 @@
+"""Счётчик SQL-запросов в рамках одного HTTP-запроса.
+
+Обработчики событий движка складывают число запросов и время их выполнения
+в QueryStats текущего запроса (ContextVar). Одинаковые запросы, повторённые
+DB_N_PLUS_ONE_THRESHOLD раз и больше, логируются как вероятный N+1.
+
+В тестах бюджет запросов проверяется так:
+
+    with query_budget(3):
+        client.get("/api/archive/hikes")
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.duration += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        return {
+            statement: count
+            for statement, count in self.statements.items()
+            if count >= threshold
+        }
+
+
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+# Открытые query_budget; сюда попадают итоги каждого завершённого запроса,
+# в том числе обработанного в другом потоке (TestClient)
+_observers: list[list[QueryStats]] = []
+_observers_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - context._query_started)
+
+
+def instrument(engine: AsyncEngine):
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries(name: str = "") -> Iterator[QueryStats]:
+    stats = QueryStats(name)
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+        _report(stats)
+
+
+def _report(stats: QueryStats):
+    for statement, count in stats.repeated(settings.DB_N_PLUS_ONE_THRESHOLD).items():
+        logger.warning(
+            "Possible N+1 in %s: statement executed %d times: %s",
+            stats.name,
+            count,
+            " ".join(statement.split())[:500],
+        )
+    with _observers_lock:
+        for observer in _observers:
+            observer.append(stats)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[list[QueryStats]]:
+    """Проверяет, что каждый запрос внутри блока укладывается в max_queries."""
+    collected: list[QueryStats] = []
+    with _observers_lock:
+        _observers.append(collected)
+    try:
+        # Запросы, выполненные прямо в блоке, а не через HTTP
+        with track_queries("query_budget"):
+            yield collected
+    finally:
+        with _observers_lock:
+            _observers.remove(collected)
+
+    over = [stats for stats in collected if stats.count > max_queries]
+    if over:
+        details = "\n".join(
+            f"{stats.name}: {stats.count} queries\n"
+            + "\n".join(
+                f"  {count} x {' '.join(statement.split())[:200]}"
+                for statement, count in stats.statements.most_common()
+            )
+            for stats in over
+        )
+        raise AssertionError(f"Query budget of {max_queries} exceeded:\n{details}")
+
+
+class QueryCountMiddleware:
+    """ASGI-middleware: считает запросы к базе на каждый HTTP-запрос.
+
+    При DB_QUERY_STATS_HEADERS добавляет в ответ X-DB-Queries и X-DB-Time-Ms.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with track_queries(f"{scope['method']} {scope['path']}") as stats:
+
+            async def send_with_stats(message):
+                if (
+                    message["type"] == "http.response.start"
+                    and settings.DB_QUERY_STATS_HEADERS
+                ):
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode()))
+                    headers.append(
+                        (b"x-db-time-ms", f"{stats.duration * 1000:.3f}".encode())
+                    )
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
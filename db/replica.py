@@ -0,0 +1,55 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# На primary (не в recovery) и на догнавшей реплике отставание считаем нулевым
+LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery()
+            OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class Replica:
+    def __init__(self, url: str, **engine_kwargs):
+        self.engine = create_async_engine(url=url, **engine_kwargs)
+        self.session_factory = async_sessionmaker(
+            bind=self.engine,
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
+        )
+        # None — отставание неизвестно или реплика недоступна
+        self.lag: Optional[float] = None
+
+    @property
+    def available(self) -> bool:
+        return self.lag is not None and self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+    async def check_lag(self):
+        try:
+            async with self.engine.connect() as conn:
+                lag = await conn.scalar(LAG_QUERY)
+        except Exception as error:
+            logger.warning("Replica %r is unavailable: %s", self.engine.url, error)
+            self.lag = None
+        else:
+            self.lag = float(lag) if lag is not None else None
+
+    def stats(self) -> dict:
+        return {
+            "url": self.engine.url.render_as_string(hide_password=True),
+            "lag_seconds": self.lag,
+            "available": self.available,
+            "pool": self.engine.pool.stats(),
+        }
@@ -1,8 +1,42 @@
 from typing import AsyncGenerator
+
+from fastapi import Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
 from db.engine import db_helper
 
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+PRIMARY_STICKY_COOKIE = "db_primary"
+
+
+async def get_async_session(
+    request: Request, response: Response
+) -> AsyncGenerator[AsyncSession, None]:
+    """Безопасные методы читают с реплики, остальные идут в primary.
+
+    После записи клиент получает cookie и REPLICA_STICKY_SECONDS читает
+    с primary, чтобы видеть собственные изменения.
+    """
+    session_factory = db_helper.session_factory
+    if db_helper.replicas:
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                key=PRIMARY_STICKY_COOKIE,
+                value="1",
+                httponly=True,
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                secure=settings.COOKIE_SECURE,
+                samesite="lax",
+            )
+        elif not request.cookies.get(PRIMARY_STICKY_COOKIE):
+            session_factory = db_helper.read_session_factory()
+
+    async with session_factory() as session:
+        yield session
+
 
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+async def get_primary_session() -> AsyncGenerator[AsyncSession, None]:
+    """Для GET-обработчиков, которые пишут в базу."""
     async with db_helper.session_factory() as session:
         yield session
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import uvicorn
@@ -17,10 +18,19 @@ from api import (
     application_router,
     file_router,
     statistics_router,
+    metrics_router,
 )
 from core.config import settings
+from core.gpx import shutdown_gpx_executor
+from core.security import password_executor
 from db import db_helper
-from models import Base
+from db.migrate import check_schema_version
+from db.querycount import QueryCountMiddleware
+from services.email import load_templates
+from services.newsletter import run_newsletter_worker
+from services.outbox import run_outbox_worker
+from services.statistics import run_statistics_refresher, run_statistics_rollup
+from services.sweeper import run_sweeper
 from models import (
     UserModel,
     HikeParticipantModel,
@@ -33,11 +43,26 @@ from models import (
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    async with db_helper.engine.begin() as conn:
-        # await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+    await check_schema_version(db_helper.engine)
     # await db_helper.create_random_user()
+    if settings.DB_POOL_PREFILL:
+        await db_helper.prefill_pool()
+    load_templates()
+    tasks = [
+        asyncio.create_task(run_sweeper()),
+        asyncio.create_task(run_outbox_worker()),
+        asyncio.create_task(run_newsletter_worker()),
+        asyncio.create_task(run_statistics_rollup()),
+    ]
+    if db_helper.replicas:
+        tasks.append(asyncio.create_task(db_helper.monitor_replicas()))
+    if settings.STATISTICS_COUNTERS:
+        tasks.append(asyncio.create_task(run_statistics_refresher()))
     yield
+    for task in tasks:
+        task.cancel()
+    password_executor.shutdown(wait=False)
+    shutdown_gpx_executor()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -53,7 +78,9 @@ app.include_router(club_participant_router)
 app.include_router(additional_router)
 app.include_router(file_router)
 app.include_router(statistics_router)
+app.include_router(metrics_router)
 
+app.add_middleware(QueryCountMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -66,6 +93,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Geometry-Tolerance", "X-Geometry-Points"],
 )
 
 
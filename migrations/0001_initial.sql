@@ -0,0 +1,205 @@
+-- Схема на момент перехода с create_all на миграции.
+-- IF NOT EXISTS: базы, созданные через create_all, принимают миграцию без изменений.
+
+DO $$
+BEGIN
+    CREATE TYPE applicationstatus AS ENUM ('pending', 'approved', 'rejected');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+DO $$
+BEGIN
+    CREATE TYPE itemstatus AS ENUM ('DRAFT', 'REVIEW', 'PUBLISHED', 'ARCHIVED');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS users (
+    username VARCHAR NOT NULL,
+    email VARCHAR NOT NULL,
+    password VARCHAR NOT NULL,
+    avatar VARCHAR,
+    first_name VARCHAR(64) NOT NULL,
+    last_name VARCHAR(64) NOT NULL,
+    middle_name VARCHAR(64),
+    is_activated BOOLEAN NOT NULL,
+    roles VARCHAR[] NOT NULL,
+    is_banned BOOLEAN NOT NULL,
+    description TEXT,
+    phone_number VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    id SERIAL NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (username),
+    UNIQUE (email)
+);
+
+CREATE INDEX IF NOT EXISTS ix_users_id ON users (id);
+
+CREATE TABLE IF NOT EXISTS applications (
+    id SERIAL NOT NULL,
+    user_id INTEGER NOT NULL,
+    first_name VARCHAR NOT NULL,
+    last_name VARCHAR NOT NULL,
+    middle_name VARCHAR,
+    date_of_birth DATE NOT NULL,
+    email VARCHAR NOT NULL,
+    phone_number VARCHAR NOT NULL,
+    vk_profile VARCHAR,
+    experience VARCHAR NOT NULL,
+    previous_school VARCHAR,
+    how_heard VARCHAR,
+    question VARCHAR,
+    wishes VARCHAR,
+    consent BOOLEAN NOT NULL,
+    status applicationstatus NOT NULL,
+    comment VARCHAR,
+    created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_applications_id ON applications (id);
+
+CREATE TABLE IF NOT EXISTS articles (
+    title VARCHAR(255) NOT NULL,
+    slug VARCHAR(255) NOT NULL,
+    status itemstatus NOT NULL,
+    content_json JSONB,
+    content_html TEXT,
+    cover_s3_url VARCHAR,
+    author VARCHAR NOT NULL,
+    created_by INTEGER NOT NULL,
+    updated_by INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    id SERIAL NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (slug),
+    FOREIGN KEY(created_by) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY(updated_by) REFERENCES users (id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_articles_id ON articles (id);
+
+CREATE TABLE IF NOT EXISTS club_participants (
+    id SERIAL NOT NULL,
+    user_id INTEGER NOT NULL,
+    avatar_club VARCHAR NOT NULL,
+    description TEXT,
+    PRIMARY KEY (id, user_id),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_club_participants_id ON club_participants (id);
+
+CREATE TABLE IF NOT EXISTS hikes (
+    id SERIAL NOT NULL,
+    name VARCHAR NOT NULL,
+    slug VARCHAR(255) NOT NULL,
+    tourism_type VARCHAR NOT NULL,
+    complexity VARCHAR NOT NULL,
+    region VARCHAR,
+    leader_id INTEGER,
+    participants_count INTEGER NOT NULL,
+    duration_days INTEGER,
+    distance_km FLOAT,
+    difficulty_distribution JSON,
+    route TEXT NOT NULL,
+    geojson_data JSON,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    description TEXT,
+    photos_archive VARCHAR,
+    report_s3_key VARCHAR NOT NULL,
+    route_s3_key VARCHAR NOT NULL,
+    status itemstatus NOT NULL,
+    created_by INTEGER NOT NULL,
+    updated_by INTEGER,
+    PRIMARY KEY (id),
+    FOREIGN KEY(leader_id) REFERENCES users (id) ON DELETE SET NULL,
+    FOREIGN KEY(created_by) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY(updated_by) REFERENCES users (id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_hikes_id ON hikes (id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_hikes_slug ON hikes (slug);
+
+CREATE TABLE IF NOT EXISTS news (
+    title VARCHAR(255) NOT NULL,
+    summary VARCHAR(255) NOT NULL,
+    slug VARCHAR(255) NOT NULL,
+    content_json JSONB,
+    content_html TEXT,
+    cover_s3_url VARCHAR,
+    status itemstatus NOT NULL,
+    created_by INTEGER NOT NULL,
+    updated_by INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    id SERIAL NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (slug),
+    FOREIGN KEY(created_by) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY(updated_by) REFERENCES users (id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_news_id ON news (id);
+
+CREATE TABLE IF NOT EXISTS passes (
+    name VARCHAR NOT NULL,
+    slug VARCHAR(255) NOT NULL,
+    region VARCHAR NOT NULL,
+    complexity VARCHAR NOT NULL,
+    height INTEGER NOT NULL,
+    description TEXT,
+    longitude FLOAT NOT NULL,
+    latitude FLOAT NOT NULL,
+    photos VARCHAR[],
+    status itemstatus NOT NULL,
+    created_by INTEGER NOT NULL,
+    updated_by INTEGER NOT NULL,
+    id SERIAL NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(created_by) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY(updated_by) REFERENCES users (id) ON DELETE SET NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_passes_id ON passes (id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_passes_slug ON passes (slug);
+
+CREATE TABLE IF NOT EXISTS tokens (
+    token VARCHAR NOT NULL,
+    user_id INTEGER NOT NULL,
+    id SERIAL NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (token),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_tokens_id ON tokens (id);
+
+CREATE TABLE IF NOT EXISTS hike_participants (
+    id SERIAL NOT NULL,
+    user_id INTEGER NOT NULL,
+    hike_id INTEGER NOT NULL,
+    role VARCHAR NOT NULL,
+    PRIMARY KEY (id, user_id, hike_id),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE,
+    FOREIGN KEY(hike_id) REFERENCES hikes (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_hike_participants_id ON hike_participants (id);
+
+CREATE TABLE IF NOT EXISTS hike_pass_association (
+    hike_id INTEGER NOT NULL,
+    pass_id INTEGER NOT NULL,
+    PRIMARY KEY (hike_id, pass_id),
+    FOREIGN KEY(hike_id) REFERENCES hikes (id) ON DELETE CASCADE,
+    FOREIGN KEY(pass_id) REFERENCES passes (id) ON DELETE CASCADE
+);
@@ -0,0 +1,67 @@
+-- Версия прав в access-токенах, хэшированные refresh-сессии,
+-- общий rate limiter и outbox писем.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS permissions_version INTEGER DEFAULT '0' NOT NULL;
+
+-- Старые refresh-токены хранились открытым текстом, пользователи войдут заново
+DROP TABLE IF EXISTS tokens;
+
+CREATE TABLE IF NOT EXISTS refresh_sessions (
+    token_hash BYTEA NOT NULL,
+    family UUID NOT NULL,
+    user_id INTEGER NOT NULL,
+    device VARCHAR(255),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    last_used_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    id SERIAL NOT NULL,
+    PRIMARY KEY (id),
+    UNIQUE (token_hash),
+    FOREIGN KEY(user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_refresh_sessions_expires_at ON refresh_sessions (expires_at);
+
+CREATE INDEX IF NOT EXISTS ix_refresh_sessions_family ON refresh_sessions (family);
+
+CREATE INDEX IF NOT EXISTS ix_refresh_sessions_id ON refresh_sessions (id);
+
+CREATE INDEX IF NOT EXISTS ix_refresh_sessions_user_id ON refresh_sessions (user_id);
+
+CREATE TABLE IF NOT EXISTS rate_limits (
+    key VARCHAR(255) NOT NULL,
+    "window" BIGINT NOT NULL,
+    hits INTEGER NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (key, "window")
+);
+
+CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at);
+
+DO $$
+BEGIN
+    CREATE TYPE outboxstatus AS ENUM ('pending', 'sent', 'failed');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    subject VARCHAR NOT NULL,
+    recipients VARCHAR[] NOT NULL,
+    subtype VARCHAR(16) NOT NULL,
+    body TEXT,
+    template_name VARCHAR,
+    template_body JSONB,
+    status outboxstatus NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    last_error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    sent_at TIMESTAMP WITH TIME ZONE,
+    id SERIAL NOT NULL,
+    PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_email_outbox_id ON email_outbox (id);
+
+CREATE INDEX IF NOT EXISTS ix_email_outbox_pending ON email_outbox (next_attempt_at) WHERE status = 'pending';
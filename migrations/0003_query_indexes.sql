@@ -0,0 +1,45 @@
+-- migrate: no-transaction
+-- Индексы под фильтры из crud/* и внешние ключи на users (каскадное удаление).
+-- CONCURRENTLY не блокирует запись, поэтому миграция идёт вне транзакции.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at ON users (created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_pending ON applications (id) WHERE status = 'pending';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_user_id ON applications (user_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_created_by ON articles (created_by);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_status ON articles (status);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_updated_by ON articles (updated_by);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_club_participants_user_id ON club_participants (user_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hikes_created_by ON hikes (created_by);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hikes_leader_id ON hikes (leader_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hikes_status ON hikes (status);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hikes_updated_by ON hikes (updated_by);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_news_created_at ON news (created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_news_created_by ON news (created_by);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_news_status_created_at ON news (status, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_news_updated_by ON news (updated_by);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_passes_created_by ON passes (created_by);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_passes_status ON passes (status);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_passes_updated_by ON passes (updated_by);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hike_participants_hike_id ON hike_participants (hike_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hike_participants_user_id ON hike_participants (user_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hike_pass_association_pass_id ON hike_pass_association (pass_id);
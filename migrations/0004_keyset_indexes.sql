@@ -0,0 +1,37 @@
+-- migrate: no-transaction
+-- Индексы под keyset-пагинацию списков: сортировка (created_at, id) или
+-- (start_date, id), с ведущим status для фильтра. Заменяют одноколоночные.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_created_at_id ON applications (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_applications_status_created_at_id ON applications (status, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_created_at_id ON articles (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_articles_status_created_at_id ON articles (status, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hikes_start_date_id ON hikes (start_date, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_hikes_status_start_date_id ON hikes (status, start_date, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_news_created_at_id ON news (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_news_status_created_at_id ON news (status, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_passes_status_id ON passes (status, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at_id ON users (created_at, id);
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_applications_pending;
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_articles_status;
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_hikes_status;
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_news_created_at;
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_news_status_created_at;
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_passes_status;
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_users_created_at;
@@ -0,0 +1,13 @@
+-- Один пользователь — одна запись в походе: уникальность (hike_id, user_id)
+-- нужна для массового добавления через INSERT ... ON CONFLICT DO NOTHING.
+
+-- Дубликаты, накопленные до ограничения, схлопываются до первой записи
+DELETE FROM hike_participants p
+USING hike_participants d
+WHERE p.hike_id = d.hike_id AND p.user_id = d.user_id AND p.id > d.id;
+
+ALTER TABLE hike_participants
+    ADD CONSTRAINT uq_hike_participants_hike_id_user_id UNIQUE (hike_id, user_id);
+
+-- Индекс ограничения начинается с hike_id и заменяет одноколоночный
+DROP INDEX IF EXISTS ix_hike_participants_hike_id;
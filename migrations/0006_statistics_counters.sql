@@ -0,0 +1,8 @@
+-- Снимок счётчиков для /api/statistics: чтение не зависит от размера таблиц.
+
+CREATE TABLE IF NOT EXISTS statistics_counters (
+    name VARCHAR(64) NOT NULL,
+    value INTEGER NOT NULL,
+    refreshed_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    PRIMARY KEY (name)
+);
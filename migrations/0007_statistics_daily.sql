@@ -0,0 +1,113 @@
+-- Дневные агрегаты для /api/statistics/timeseries.
+-- Триггеры отмечают затронутые дни в statistics_dirty_days, фоновая задача
+-- пересчитывает только эти дни. Дни считаются в UTC.
+
+CREATE TABLE IF NOT EXISTS statistics_daily (
+    metric VARCHAR(64) NOT NULL,
+    day DATE NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (metric, day)
+);
+
+CREATE TABLE IF NOT EXISTS statistics_dirty_days (
+    source VARCHAR(32) NOT NULL,
+    day DATE NOT NULL,
+    PRIMARY KEY (source, day)
+);
+
+CREATE OR REPLACE FUNCTION statistics_mark_dirty(source VARCHAR, day DATE)
+RETURNS void AS $$
+    INSERT INTO statistics_dirty_days (source, day)
+    SELECT $1, $2
+    WHERE $2 IS NOT NULL
+    ON CONFLICT DO NOTHING;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION statistics_mark_users() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM statistics_mark_dirty('users', (OLD.created_at AT TIME ZONE 'UTC')::date);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM statistics_mark_dirty('users', (NEW.created_at AT TIME ZONE 'UTC')::date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- applications.created_at хранится без часового пояса, в UTC
+CREATE OR REPLACE FUNCTION statistics_mark_applications() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM statistics_mark_dirty('applications', OLD.created_at::date);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM statistics_mark_dirty('applications', NEW.created_at::date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION statistics_mark_hikes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM statistics_mark_dirty('hikes', OLD.start_date);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM statistics_mark_dirty('hikes', NEW.start_date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Общая для news и articles: источник — имя таблицы
+CREATE OR REPLACE FUNCTION statistics_mark_publications() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        PERFORM statistics_mark_dirty(TG_TABLE_NAME::varchar, (OLD.created_at AT TIME ZONE 'UTC')::date);
+    END IF;
+    IF TG_OP <> 'DELETE' THEN
+        PERFORM statistics_mark_dirty(TG_TABLE_NAME::varchar, (NEW.created_at AT TIME ZONE 'UTC')::date);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS statistics_users ON users;
+CREATE TRIGGER statistics_users
+    AFTER INSERT OR DELETE OR UPDATE OF created_at ON users
+    FOR EACH ROW EXECUTE FUNCTION statistics_mark_users();
+
+DROP TRIGGER IF EXISTS statistics_applications ON applications;
+CREATE TRIGGER statistics_applications
+    AFTER INSERT OR DELETE OR UPDATE OF status, created_at ON applications
+    FOR EACH ROW EXECUTE FUNCTION statistics_mark_applications();
+
+DROP TRIGGER IF EXISTS statistics_hikes ON hikes;
+CREATE TRIGGER statistics_hikes
+    AFTER INSERT OR DELETE OR UPDATE OF start_date ON hikes
+    FOR EACH ROW EXECUTE FUNCTION statistics_mark_hikes();
+
+DROP TRIGGER IF EXISTS statistics_news ON news;
+CREATE TRIGGER statistics_news
+    AFTER INSERT OR DELETE OR UPDATE OF status, created_at ON news
+    FOR EACH ROW EXECUTE FUNCTION statistics_mark_publications();
+
+DROP TRIGGER IF EXISTS statistics_articles ON articles;
+CREATE TRIGGER statistics_articles
+    AFTER INSERT OR DELETE OR UPDATE OF status, created_at ON articles
+    FOR EACH ROW EXECUTE FUNCTION statistics_mark_publications();
+
+-- Существующие данные: все дни помечаются, первый запуск задачи их посчитает
+INSERT INTO statistics_dirty_days (source, day)
+SELECT DISTINCT 'users', (created_at AT TIME ZONE 'UTC')::date FROM users
+UNION
+SELECT DISTINCT 'applications', created_at::date FROM applications
+WHERE created_at IS NOT NULL
+UNION
+SELECT DISTINCT 'hikes', start_date FROM hikes
+UNION
+SELECT DISTINCT 'news', (created_at AT TIME ZONE 'UTC')::date FROM news
+UNION
+SELECT DISTINCT 'articles', (created_at AT TIME ZONE 'UTC')::date FROM articles
+ON CONFLICT DO NOTHING;
@@ -0,0 +1,20 @@
+-- Не больше одной активной (pending или approved) заявки на пользователя.
+-- Частичный уникальный индекс заменяет проверку SELECT перед INSERT.
+
+-- Лишние активные заявки, накопленные до индекса, отклоняются: остаётся
+-- одобренная, а среди одинаковых по статусу — самая новая
+UPDATE applications a
+SET status = 'rejected', comment = 'Дубликат активной заявки', updated_at = now() AT TIME ZONE 'UTC'
+FROM (
+    SELECT id, row_number() OVER (
+        PARTITION BY user_id
+        ORDER BY status = 'approved' DESC, created_at DESC, id DESC
+    ) AS rn
+    FROM applications
+    WHERE status IN ('pending', 'approved')
+) d
+WHERE a.id = d.id AND d.rn > 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_applications_user_id_active
+    ON applications (user_id)
+    WHERE status IN ('pending', 'approved');
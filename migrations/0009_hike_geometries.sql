@@ -0,0 +1,11 @@
+-- Упрощённые версии трека похода (уровни детализации) для карт.
+-- Заполняются при загрузке GPX; для походов, загруженных раньше, —
+-- при первом запросе упрощённой геометрии.
+
+CREATE TABLE IF NOT EXISTS hike_geometries (
+    hike_id INTEGER NOT NULL REFERENCES hikes (id) ON DELETE CASCADE,
+    tolerance_m DOUBLE PRECISION NOT NULL,
+    points INTEGER NOT NULL,
+    geojson JSON NOT NULL,
+    PRIMARY KEY (hike_id, tolerance_m)
+);
@@ -0,0 +1,15 @@
+-- Метрики трека, посчитанные при загрузке GPX: списки и фильтры читают
+-- столбцы, а не geojson_data. Для походов, загруженных раньше, столбцы
+-- пустые до следующей загрузки GPX.
+
+ALTER TABLE hikes
+    ADD COLUMN IF NOT EXISTS track_distance_km DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS elevation_gain_m DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS elevation_loss_m DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS max_elevation_m DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS moving_time_s INTEGER,
+    ADD COLUMN IF NOT EXISTS bbox_west DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS bbox_south DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS bbox_east DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS bbox_north DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS daily_splits JSON;
@@ -0,0 +1,86 @@
+"""Уровни детализации хранятся готовыми сжатыми телами ответа
+/api/archive/hikes/{id}/geometry: GeoJSON и encoded polyline. Исходный трек —
+уровень с допуском 0.
+
+Уже построенные уровни не пересчитываются: их geojson перекодируется в оба
+тела, а уровень 0 добавляется из hikes.geojson_data. Походы без уровней
+достраивает 0014_backfill_hike_geometries.
+"""
+
+import json
+import logging
+
+from core.geometry import count_points, level_bodies
+
+logger = logging.getLogger("db.migrate")
+
+ADD_COLUMNS = """
+ALTER TABLE hike_geometries
+    ALTER COLUMN geojson DROP NOT NULL,
+    ADD COLUMN IF NOT EXISTS geojson_gz BYTEA,
+    ADD COLUMN IF NOT EXISTS polyline_gz BYTEA
+"""
+
+HIKES_WITH_LEVELS = "SELECT DISTINCT hike_id FROM hike_geometries ORDER BY hike_id"
+
+HIKE_LEVELS = """
+SELECT tolerance_m, geojson::text AS geojson FROM hike_geometries
+WHERE hike_id = $1 AND geojson IS NOT NULL
+"""
+
+# JSON null (так ORM пишет None) — тоже поход без трека
+SOURCE_TRACK = """
+SELECT geojson_data::text FROM hikes
+WHERE id = $1 AND json_typeof(geojson_data) = 'object'
+"""
+
+UPDATE_LEVEL = """
+UPDATE hike_geometries SET geojson_gz = $3, polyline_gz = $4
+WHERE hike_id = $1 AND tolerance_m = $2
+"""
+
+INSERT_SOURCE_LEVEL = """
+INSERT INTO hike_geometries (hike_id, tolerance_m, points, geojson_gz, polyline_gz)
+VALUES ($1, 0, $2, $3, $4)
+ON CONFLICT (hike_id, tolerance_m) DO NOTHING
+"""
+
+DROP_OLD_COLUMN = """
+ALTER TABLE hike_geometries
+    DROP COLUMN geojson,
+    ALTER COLUMN geojson_gz SET NOT NULL,
+    ALTER COLUMN polyline_gz SET NOT NULL
+"""
+
+
+async def upgrade(connection):
+    await connection.execute(ADD_COLUMNS)
+    hike_ids = [row["hike_id"] for row in await connection.fetch(HIKES_WITH_LEVELS)]
+    for hike_id in hike_ids:
+        # По одному походу: треки бывают на сотни тысяч точек
+        levels = await connection.fetch(HIKE_LEVELS, hike_id)
+        bodies = [
+            (level["tolerance_m"], level_bodies(json.loads(level["geojson"])))
+            for level in levels
+        ]
+        await connection.executemany(
+            UPDATE_LEVEL,
+            [
+                (hike_id, tolerance, body["geojson_gz"], body["polyline_gz"])
+                for tolerance, body in bodies
+            ],
+        )
+
+        geojson = await connection.fetchval(SOURCE_TRACK, hike_id)
+        if geojson is not None:
+            source = json.loads(geojson)
+            body = level_bodies(source)
+            await connection.execute(
+                INSERT_SOURCE_LEVEL,
+                hike_id,
+                count_points(source),
+                body["geojson_gz"],
+                body["polyline_gz"],
+            )
+    await connection.execute(DROP_OLD_COLUMN)
+    logger.info("Encoded track levels for %d hikes", len(hike_ids))
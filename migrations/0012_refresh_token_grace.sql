@@ -0,0 +1,7 @@
+-- Предыдущий токен сессии принимается ещё REFRESH_TOKEN_REUSE_GRACE_SECONDS
+-- после ротации: две вкладки, обновляющие токен одновременно, не считаются
+-- повторным использованием.
+
+ALTER TABLE refresh_sessions
+    ADD COLUMN IF NOT EXISTS previous_hash BYTEA,
+    ADD COLUMN IF NOT EXISTS rotated_at TIMESTAMP WITH TIME ZONE;
@@ -0,0 +1,33 @@
+-- Задачи рассылки новостей хранятся в базе, а не в памяти процесса: прогресс
+-- виден с любого воркера, а задачу выполняет только взявший её advisory lock.
+
+DO $$
+BEGIN
+    CREATE TYPE newsletterstatus AS ENUM ('pending', 'running', 'done', 'failed');
+EXCEPTION
+    WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS newsletter_jobs (
+    news_id INTEGER NOT NULL,
+    status newsletterstatus NOT NULL,
+    total INTEGER NOT NULL,
+    sent INTEGER NOT NULL,
+    deferred INTEGER NOT NULL,
+    last_user_id INTEGER NOT NULL,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now() NOT NULL,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    id SERIAL NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(news_id) REFERENCES news (id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS ix_newsletter_jobs_id ON newsletter_jobs (id);
+
+CREATE INDEX IF NOT EXISTS ix_newsletter_jobs_news_id ON newsletter_jobs (news_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_newsletter_jobs_news_id_active
+    ON newsletter_jobs (news_id)
+    WHERE status IN ('pending', 'running');
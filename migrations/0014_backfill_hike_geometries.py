@@ -0,0 +1,58 @@
+"""Уровни hike_geometries для походов, у которых их ещё нет.
+
+Раньше недостающие уровни строил первый GET-запрос геометрии, но GET читает
+с реплики, где запись запрещена. Теперь уровни строятся только при загрузке
+GPX, а для походов, загруженных до этого, — здесь.
+
+Допуски уровней зафиксированы в миграции, а не берутся из
+settings.GPX_LOD_TOLERANCES_M: результат не зависит от окружения деплоя.
+Выбор уровня работает с любым набором допусков, так что новые GPX могут
+строиться по другому списку.
+"""
+
+import json
+import logging
+
+from core.geometry import geometry_levels
+
+logger = logging.getLogger("db.migrate")
+
+# Значение GPX_LOD_TOLERANCES_M по умолчанию на момент миграции
+TOLERANCES_M = [2, 10, 40, 160, 640]
+
+HIKES_WITHOUT_LEVELS = """
+SELECT id FROM hikes h
+-- Поход без трека хранит и SQL NULL, и JSON null (так ORM пишет None)
+WHERE json_typeof(geojson_data) = 'object'
+  AND NOT EXISTS (SELECT 1 FROM hike_geometries g WHERE g.hike_id = h.id)
+ORDER BY id
+"""
+
+INSERT_LEVEL = """
+INSERT INTO hike_geometries (hike_id, tolerance_m, points, geojson_gz, polyline_gz)
+VALUES ($1, $2, $3, $4, $5)
+"""
+
+
+async def upgrade(connection):
+    hike_ids = [row["id"] for row in await connection.fetch(HIKES_WITHOUT_LEVELS)]
+    for hike_id in hike_ids:
+        # По одному походу: треки бывают на сотни тысяч точек
+        geojson = await connection.fetchval(
+            "SELECT geojson_data::text FROM hikes WHERE id = $1", hike_id
+        )
+        levels = geometry_levels(json.loads(geojson), TOLERANCES_M)
+        await connection.executemany(
+            INSERT_LEVEL,
+            [
+                (
+                    hike_id,
+                    level["tolerance_m"],
+                    level["points"],
+                    level["geojson_gz"],
+                    level["polyline_gz"],
+                )
+                for level in levels
+            ],
+        )
+    logger.info("Built track levels for %d hikes", len(hike_ids))
@@ -3,6 +3,7 @@ __all__ = {
     "UserModel",
     "Base",
     "HikeModel",
+    "hike_geometries",
     "HikeParticipantModel",
     "ClubParticipantModel",
     "PassModel",
@@ -11,11 +12,19 @@ __all__ = {
     "NewsModel",
     "ApplicationModel",
     "ApplicationStatus",
+    "rate_limits",
+    "statistics_counters",
+    "statistics_daily",
+    "statistics_dirty_days",
+    "EmailOutboxModel",
+    "OutboxStatus",
+    "NewsletterJobModel",
+    "NewsletterStatus",
 }
 
 from .base import Base
 from .tokens import TokenModel
-from .hikes import HikeModel
+from .hikes import HikeModel, hike_geometries
 from .passes import PassModel
 from .users import UserModel
 from .participants import HikeParticipantModel, ClubParticipantModel
@@ -23,3 +32,7 @@ from .associations import hike_pass_association
 from .articles import ArticleModel
 from .news import NewsModel
 from .applications import ApplicationModel, ApplicationStatus
+from .rate_limits import rate_limits
+from .statistics import statistics_counters, statistics_daily, statistics_dirty_days
+from .outbox import EmailOutboxModel, OutboxStatus
+from .newsletter import NewsletterJobModel, NewsletterStatus
@@ -1,7 +1,17 @@
 from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, String, Date, Boolean, DateTime, Enum, ForeignKey
+from sqlalchemy import (
+    Integer,
+    String,
+    Date,
+    Boolean,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    text,
+)
 from datetime import datetime
 import enum
 
@@ -19,10 +29,21 @@ class ApplicationStatus(str, enum.Enum):
 
 class ApplicationModel(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        Index("ix_applications_created_at_id", "created_at", "id"),
+        Index("ix_applications_status_created_at_id", "status", "created_at", "id"),
+        # Не больше одной активной заявки на пользователя
+        Index(
+            "ux_applications_user_id_active",
+            "user_id",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'approved')"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
 
     first_name: Mapped[str] = mapped_column(String, nullable=False)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, TIMESTAMP, func, Text, ForeignKey
+from sqlalchemy import String, TIMESTAMP, func, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -13,6 +13,10 @@ from enums import ItemStatus
 
 class ArticleModel(Base):
     __tablename__ = "articles"
+    __table_args__ = (
+        Index("ix_articles_created_at_id", "created_at", "id"),
+        Index("ix_articles_status_created_at_id", "status", "created_at", "id"),
+    )
 
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     slug: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
@@ -26,10 +30,10 @@ class ArticleModel(Base):
     author: Mapped[str] = mapped_column()
 
     created_by: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     updated_by: Mapped[Optional[int]] = mapped_column(
-        ForeignKey("users.id", ondelete="SET NULL"), nullable=False
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=False, index=True
     )
 
     created_by_user: Mapped["UserModel"] = relationship(
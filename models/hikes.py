@@ -1,6 +1,18 @@
 from datetime import date
 from typing import List, Optional, TYPE_CHECKING
-from sqlalchemy import String, Text, JSON, Date, ForeignKey, Integer, Float
+from sqlalchemy import (
+    Column,
+    String,
+    Table,
+    Text,
+    JSON,
+    Date,
+    ForeignKey,
+    Integer,
+    Float,
+    Index,
+    LargeBinary,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from enums import ItemStatus
@@ -15,6 +27,11 @@ if TYPE_CHECKING:
 
 class HikeModel(Base):
     __tablename__ = "hikes"
+    __table_args__ = (
+        # Keyset-пагинация архива: (start_date, id) с фильтром по статусу и без
+        Index("ix_hikes_start_date_id", "start_date", "id"),
+        Index("ix_hikes_status_start_date_id", "status", "start_date", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(String, nullable=False)
@@ -31,7 +48,7 @@ class HikeModel(Base):
 
     # Руководитель (связь с UserModel)
     leader_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True
     )
     leader: Mapped[Optional["UserModel"]] = relationship(
         "UserModel", foreign_keys=[leader_id], back_populates="led_hikes"
@@ -43,6 +60,18 @@ class HikeModel(Base):
     distance_km: Mapped[Optional[float]] = mapped_column(Float)
     difficulty_distribution: Mapped[Optional[dict]] = mapped_column(JSON)
 
+    # Метрики трека, считаются при загрузке GPX (core/track_metrics.py)
+    track_distance_km: Mapped[Optional[float]] = mapped_column(Float)
+    elevation_gain_m: Mapped[Optional[float]] = mapped_column(Float)
+    elevation_loss_m: Mapped[Optional[float]] = mapped_column(Float)
+    max_elevation_m: Mapped[Optional[float]] = mapped_column(Float)
+    moving_time_s: Mapped[Optional[int]] = mapped_column(Integer)
+    bbox_west: Mapped[Optional[float]] = mapped_column(Float)
+    bbox_south: Mapped[Optional[float]] = mapped_column(Float)
+    bbox_east: Mapped[Optional[float]] = mapped_column(Float)
+    bbox_north: Mapped[Optional[float]] = mapped_column(Float)
+    daily_splits: Mapped[Optional[list]] = mapped_column(JSON)
+
     # Маршрут и данные
     route: Mapped[str] = mapped_column(Text, nullable=False)
     geojson_data: Mapped[Optional[dict]] = mapped_column(JSON)
@@ -60,10 +89,10 @@ class HikeModel(Base):
 
     # Авторство
     created_by: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     updated_by: Mapped[Optional[int]] = mapped_column(
-        ForeignKey("users.id", ondelete="SET NULL")
+        ForeignKey("users.id", ondelete="SET NULL"), index=True
     )
 
     created_by_user: Mapped["UserModel"] = relationship(
@@ -100,3 +129,26 @@ class HikeModel(Base):
         if self.leader:
             return self.leader.email
         return None
+
+    @property
+    def bbox(self) -> Optional[list[float]]:
+        if self.bbox_west is None:
+            return None
+        return [self.bbox_west, self.bbox_south, self.bbox_east, self.bbox_north]
+
+
+# Исходный трек (допуск 0) и его упрощённые версии, по строке на допуск:
+# сжатые тела ответа /hikes/{id}/geometry (см. core/geometry.py)
+hike_geometries = Table(
+    "hike_geometries",
+    Base.metadata,
+    Column(
+        "hike_id",
+        ForeignKey("hikes.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("tolerance_m", Float, primary_key=True),
+    Column("points", Integer, nullable=False),
+    Column("geojson_gz", LargeBinary, nullable=False),
+    Column("polyline_gz", LargeBinary, nullable=False),
+)
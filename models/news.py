@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import String, TIMESTAMP, func, Text, ForeignKey
+from sqlalchemy import String, TIMESTAMP, func, Text, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -12,6 +12,11 @@ from .users import UserModel
 
 class NewsModel(Base):
     __tablename__ = "news"
+    __table_args__ = (
+        # Лента новостей: фильтр по статусу, keyset по (created_at, id)
+        Index("ix_news_created_at_id", "created_at", "id"),
+        Index("ix_news_status_created_at_id", "status", "created_at", "id"),
+    )
 
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     summary: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -25,10 +30,10 @@ class NewsModel(Base):
     status: Mapped[ItemStatus] = mapped_column(nullable=False, default=ItemStatus.DRAFT)
 
     created_by: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     updated_by: Mapped[Optional[int]] = mapped_column(
-        ForeignKey("users.id", ondelete="SET NULL"), nullable=False
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=False, index=True
     )
 
     created_by_user: Mapped["UserModel"] = relationship(
@@ -0,0 +1,56 @@
+import enum
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Enum, ForeignKey, Index, Integer, Text, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import TIMESTAMP
+
+from .base import Base
+
+
+class NewsletterStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class NewsletterJobModel(Base):
+    """Задача рассылки новости.
+
+    Выполняет её тот воркер, который взял advisory lock на id задачи; lock
+    держится транзакцией, читающей получателей, и снимается при обрыве
+    соединения. Получатели обходятся по возрастанию id, last_user_id —
+    последний обработанный, с него продолжается прерванная задача.
+    """
+
+    __tablename__ = "newsletter_jobs"
+
+    news_id: Mapped[int] = mapped_column(
+        ForeignKey("news.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    status: Mapped[NewsletterStatus] = mapped_column(
+        Enum(NewsletterStatus), nullable=False, default=NewsletterStatus.pending
+    )
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sent: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    deferred: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_user_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+    started_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    finished_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        # Не больше одной незавершённой рассылки на новость
+        Index(
+            "ux_newsletter_jobs_news_id_active",
+            "news_id",
+            unique=True,
+            postgresql_where=text("status IN ('pending', 'running')"),
+        ),
+    )
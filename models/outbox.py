@@ -0,0 +1,50 @@
+import enum
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import ARRAY, Enum, Index, Integer, String, Text, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import TIMESTAMP
+
+from .base import Base
+
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+
+class EmailOutboxModel(Base):
+    __tablename__ = "email_outbox"
+
+    subject: Mapped[str] = mapped_column(String, nullable=False)
+    recipients: Mapped[List[str]] = mapped_column(ARRAY(String), nullable=False)
+    subtype: Mapped[str] = mapped_column(String(16), nullable=False, default="plain")
+    body: Mapped[Optional[str]] = mapped_column(Text)
+    template_name: Mapped[Optional[str]] = mapped_column(String)
+    template_body: Mapped[Optional[dict]] = mapped_column(JSONB)
+
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus), nullable=False, default=OutboxStatus.pending
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        # Воркер выбирает только ожидающие письма — индекс держим маленьким
+        Index(
+            "ix_email_outbox_pending",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import String, ForeignKey, Text, Table, Column
+from sqlalchemy import String, ForeignKey, Text, Table, Column, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -13,10 +13,15 @@ if TYPE_CHECKING:
 
 class HikeParticipantModel(Base):
     __tablename__ = "hike_participants"
+    __table_args__ = (
+        UniqueConstraint(
+            "hike_id", "user_id", name="uq_hike_participants_hike_id_user_id"
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
     )
     hike_id: Mapped[int] = mapped_column(
         ForeignKey("hikes.id", ondelete="CASCADE"), primary_key=True
@@ -40,7 +45,7 @@ class ClubParticipantModel(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True
     )
     avatar_club: Mapped[str]
     description: Mapped[Optional[str]] = mapped_column(Text)
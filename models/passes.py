@@ -1,5 +1,5 @@
 from typing import List, Optional
-from sqlalchemy import String, Integer, Text, ARRAY, Float, ForeignKey
+from sqlalchemy import String, Integer, Text, ARRAY, Float, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from enums import ItemStatus
@@ -15,6 +15,7 @@ if TYPE_CHECKING:
 
 class PassModel(Base):
     __tablename__ = "passes"
+    __table_args__ = (Index("ix_passes_status_id", "status", "id"),)
 
     name: Mapped[str] = mapped_column(String, nullable=False)
     slug: Mapped[str] = mapped_column(String(255), unique=True, index=True)
@@ -28,10 +29,10 @@ class PassModel(Base):
     status: Mapped[ItemStatus] = mapped_column(nullable=False, default=ItemStatus.DRAFT)
 
     created_by: Mapped[int] = mapped_column(
-        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
     )
     updated_by: Mapped[Optional[int]] = mapped_column(
-        ForeignKey("users.id", ondelete="SET NULL"), nullable=False
+        ForeignKey("users.id", ondelete="SET NULL"), nullable=False, index=True
     )
 
     created_by_user: Mapped["UserModel"] = relationship(
@@ -0,0 +1,14 @@
+from sqlalchemy import BigInteger, Column, Integer, String, Table
+from sqlalchemy.types import TIMESTAMP
+
+from .base import Base
+
+# Счётчики запросов по фиксированным окнам, общие для всех воркеров
+rate_limits = Table(
+    "rate_limits",
+    Base.metadata,
+    Column("key", String(255), primary_key=True),
+    Column("window", BigInteger, primary_key=True),
+    Column("hits", Integer, nullable=False, default=1),
+    Column("expires_at", TIMESTAMP(timezone=True), nullable=False, index=True),
+)
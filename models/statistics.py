@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Date, Integer, String, Table, func
+from sqlalchemy.types import TIMESTAMP
+
+from .base import Base
+
+# Снимок счётчиков админ-статистики, пересчитывается фоновой задачей
+statistics_counters = Table(
+    "statistics_counters",
+    Base.metadata,
+    Column("name", String(64), primary_key=True),
+    Column("value", Integer, nullable=False),
+    Column(
+        "refreshed_at",
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+)
+
+# Дневные агрегаты для временных рядов статистики
+statistics_daily = Table(
+    "statistics_daily",
+    Base.metadata,
+    Column("metric", String(64), primary_key=True),
+    Column("day", Date, primary_key=True),
+    Column("value", Integer, nullable=False),
+)
+
+# Дни, затронутые изменениями с последнего пересчёта; заполняется триггерами
+statistics_dirty_days = Table(
+    "statistics_dirty_days",
+    Base.metadata,
+    Column("source", String(32), primary_key=True),
+    Column("day", Date, primary_key=True),
+)
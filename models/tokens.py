@@ -1,11 +1,37 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, LargeBinary, String, Uuid, func
+from sqlalchemy.types import TIMESTAMP
 
 from .base import Base
 
 
 class TokenModel(Base):
-    __tablename__ = "tokens"
+    """Сессия обновления: одна строка на устройство.
+
+    Хранится только sha256 от refresh-токена. family не меняется при ротации
+    и позволяет отозвать всю сессию при повторном использовании токена.
+    previous_hash — токен до последней ротации, он действителен ещё
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS после rotated_at.
+    """
+
+    __tablename__ = "refresh_sessions"
 
-    token: Mapped[str] = mapped_column(unique=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    token_hash: Mapped[bytes] = mapped_column(LargeBinary(32), unique=True)
+    family: Mapped[uuid.UUID] = mapped_column(Uuid, index=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    previous_hash: Mapped[Optional[bytes]] = mapped_column(LargeBinary(32))
+    rotated_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True))
+    device: Mapped[Optional[str]] = mapped_column(String(255))
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+    last_used_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
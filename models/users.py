@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, ARRAY, ForeignKey, Text, Boolean
+from sqlalchemy import String, ARRAY, ForeignKey, Text, Boolean, Integer, Index
 from sqlalchemy.sql import func
 from sqlalchemy.types import TIMESTAMP
 
@@ -16,6 +16,7 @@ if TYPE_CHECKING:
 
 class UserModel(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
 
     username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     email: Mapped[str] = mapped_column(String, unique=True, nullable=False)
@@ -27,10 +28,14 @@ class UserModel(Base):
     is_activated: Mapped[bool] = mapped_column(default=False)
     roles: Mapped[List[str]] = mapped_column(ARRAY(String), default=["guest"])
     is_banned: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Увеличивается при бане и смене ролей, чтобы отозвать выданные access-токены
+    permissions_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     description: Mapped[str] = mapped_column(Text, nullable=True)
     phone_number: Mapped[str] = mapped_column(String, nullable=True)
     applications: Mapped[list["ApplicationModel"]] = relationship(
-        back_populates="user", lazy="selectin"
+        back_populates="user", passive_deletes=True
     )
 
     led_hikes: Mapped[List["HikeModel"]] = relationship(
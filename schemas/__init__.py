@@ -11,6 +11,7 @@ __all__ = {
     "HikesRead",
     "HikeParticipantBase",
     "HikeParticipantRead",
+    "HikeParticipantImportResult",
     "ClubParticipantBase",
     "ClubParticipantRead",
     "ArticleBase",
@@ -21,6 +22,7 @@ __all__ = {
     "NewsReadList",
     "NewsRead",
     "NewsUpdate",
+    "NewsletterJobRead",
     "PassUpdate",
     "ApplicationOut",
     "ApplicationStatus",
@@ -36,6 +38,7 @@ from .hikes import HikeBase, HikeRead, HikesRead, HikeUpdate
 from .participants import (
     HikeParticipantBase,
     HikeParticipantRead,
+    HikeParticipantImportResult,
     ClubParticipantBase,
     ClubParticipantRead,
 )
@@ -43,7 +46,7 @@ from .passes import PassBase, PassRead, PassUpdate
 from .statistics import StatisticsDetail
 from .response import CreateResponse
 from .articles import ArticleBase, ArticleUpdate, ArticleRead, ArticlesRead
-from .news import NewsBase, NewsUpdate, NewsRead, NewsReadList
+from .news import NewsBase, NewsUpdate, NewsRead, NewsReadList, NewsletterJobRead
 from .users import (
     LoginUser,
     UserRead,
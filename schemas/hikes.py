@@ -77,6 +77,14 @@ class HikeUpdate(BaseModel):
     status: Optional[str] = Field(None, description="Статус публикации")
 
 
+class HikeDaySplit(BaseModel):
+    day: date = Field(..., description="Дата по местному времени трека")
+    distance_km: float
+    elevation_gain_m: float
+    elevation_loss_m: float
+    moving_time_s: int
+
+
 class HikesRead(BaseModel):
     id: int
     slug: str
@@ -89,6 +97,9 @@ class HikesRead(BaseModel):
     region: Optional[str]
     leader_fullname: Optional[str]
     status: str
+    duration_days: Optional[int]
+    distance_km: Optional[float]
+    elevation_gain_m: Optional[float]
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -99,6 +110,21 @@ class HikeRead(HikeBase):
         None, description="Данные маршрута в формате GeoJSON"
     )
     status: Optional[str] = Field(None, description="Статус публикации")
+    track_distance_km: Optional[float] = Field(
+        None, description="Длина трека по GPX в километрах"
+    )
+    elevation_gain_m: Optional[float] = Field(None, description="Набор высоты, м")
+    elevation_loss_m: Optional[float] = Field(None, description="Сброс высоты, м")
+    max_elevation_m: Optional[float] = Field(None, description="Максимальная высота, м")
+    moving_time_s: Optional[int] = Field(
+        None, description="Время движения по треку, секунды"
+    )
+    bbox: Optional[list[float]] = Field(
+        None, description="Границы трека: [запад, юг, восток, север]"
+    )
+    daily_splits: Optional[list[HikeDaySplit]] = Field(
+        None, description="Разбивка трека по дням"
+    )
     created_by: int
     updated_by: Optional[int]
     leader_fullname: Optional[str]
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional, Dict, Any
 
 from pydantic import BaseModel, Field, ConfigDict
@@ -52,3 +53,16 @@ class NewsRead(NewsBase):
     status: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class NewsletterJobRead(BaseModel):
+    id: int
+    news_id: int
+    status: str = Field(..., description="pending, running, done или failed")
+    total: int
+    sent: int
+    deferred: int = Field(..., description="Передано в outbox для повторной отправки")
+    error: Optional[str] = None
+    created_at: datetime
+    elapsed_seconds: float
+    emails_per_second: float
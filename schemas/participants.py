@@ -1,5 +1,5 @@
 from datetime import date
-from typing import Any
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -16,6 +16,18 @@ class HikeParticipantRead(HikeParticipantBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class HikeParticipantImportResult(BaseModel):
+    row: int = Field(..., description="Номер элемента в запросе или строки в CSV")
+    hike_id: Optional[int] = None
+    user_id: Optional[int] = None
+    role: Optional[str] = None
+    status: Literal[
+        "added", "exists", "duplicate", "hike_not_found", "user_not_found", "invalid"
+    ]
+    id: Optional[int] = Field(None, description="ID добавленной записи")
+    error: Optional[str] = None
+
+
 class ClubParticipantBase(BaseModel):
     user_id: int
     description: str
@@ -11,3 +11,6 @@ class CreateResponse(BaseModel, Generic[T]):
         None,
         description="Дополнительные данные (например, токен, пользователь, список объектов и т.д.)",
     )
+    next_cursor: Optional[str] = Field(
+        None, description="Курсор следующей страницы, если она есть"
+    )
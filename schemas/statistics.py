@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import Dict
+from datetime import date, datetime
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
 
 
 class StatisticsDetail(BaseModel):
@@ -12,3 +14,16 @@ class StatisticsDetail(BaseModel):
     total_articles: int
     total_news: int
     total_passes: int
+    refreshed_at: Optional[datetime] = Field(
+        None, description="Время снимка счётчиков; None — посчитано по таблицам"
+    )
+
+
+class StatisticsTimeseries(BaseModel):
+    interval: Literal["day", "week", "month"]
+    start: date
+    end: date
+    periods: List[date] = Field(..., description="Начало каждого периода")
+    series: Dict[str, List[int]] = Field(
+        ..., description="Метрика -> значения по периодам, в порядке periods"
+    )
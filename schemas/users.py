@@ -165,3 +165,10 @@ class UserHikeParticipantRead(BaseModel):
     hike_name: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class TokenPrincipal(BaseModel):
+    id: int
+    username: str
+    roles: List[str]
+    is_activated: bool
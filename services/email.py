@@ -1,6 +1,13 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from email.utils import formataddr
+from typing import Optional
+
+from fastapi_mail import ConnectionConfig, MessageSchema
+from fastapi_mail.msg import MailMsg
+from jinja2 import Template
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
+from models import EmailOutboxModel
 
 conf = ConnectionConfig(
     MAIL_USERNAME=settings.MAIL_USERNAME,
@@ -15,38 +22,87 @@ conf = ConnectionConfig(
     TEMPLATE_FOLDER="templates/email",
 )
 
+template_env = conf.template_engine()
+template_env.auto_reload = False
 
-async def send_email(subject: str, recipients: list[str], body: str):
-    message = MessageSchema(
-        subject=subject,
-        recipients=recipients,
-        body=body,
-        subtype="plain",
+# Скомпилированные шаблоны, заполняются при старте приложения
+templates: dict[str, Template] = {}
+
+
+def load_templates():
+    for name in template_env.list_templates(extensions=["html"]):
+        templates[name] = template_env.get_template(name)
+
+
+def get_template(name: str) -> Template:
+    template = templates.get(name)
+    if template is None:
+        template = templates[name] = template_env.get_template(name)
+    return template
+
+
+def queue_email(
+    session: AsyncSession,
+    subject: str,
+    recipients: list[str],
+    body: Optional[str] = None,
+    template_name: Optional[str] = None,
+    template_body: Optional[dict] = None,
+):
+    """Кладёт письмо в outbox в рамках текущей транзакции.
+
+    Отправкой занимается services.outbox после коммита.
+    """
+    session.add(
+        EmailOutboxModel(
+            subject=subject,
+            recipients=recipients,
+            subtype="html" if template_name else "plain",
+            body=body,
+            template_name=template_name,
+            template_body=template_body,
+        )
     )
-    fm = FastMail(conf)
-    await fm.send_message(message)
 
 
-async def send_verification_email(email: str, verify_link: str):
-    message = MessageSchema(
+def queue_verification_email(session: AsyncSession, email: str, verify_link: str):
+    queue_email(
+        session,
         subject="Подтверждение вашей почты",
         recipients=[email],
+        template_name="verify_email_updated.html",
         template_body={"verify_link": verify_link},
-        subtype="html",
     )
-    fm = FastMail(conf)
-    await fm.send_message(message, template_name="verify_email_updated.html")
 
 
-async def send_applicant_email(email: str, user_name: str):
-    message = MessageSchema(
+def queue_applicant_email(session: AsyncSession, email: str, user_name: str):
+    queue_email(
+        session,
         subject="Ваша заявка рассмотрена",
         recipients=[email],
+        template_name="application_email.html",
         template_body={
             "user_name": user_name,
             "profile_link": f"{settings.FRONTEND_URL}/user/profile/me",
         },
-        subtype="html",
     )
-    fm = FastMail(conf)
-    await fm.send_message(message, template_name="application_email.html")
+
+
+async def compose_message(
+    subject: str, recipients: list[str], body: str, subtype: str = "html"
+):
+    message = MessageSchema(
+        subject=subject,
+        recipients=recipients,
+        body=body,
+        subtype=subtype,
+    )
+    sender = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+    return await MailMsg(message)._message(sender)
+
+
+async def build_message(item: EmailOutboxModel):
+    body = item.body
+    if item.template_name:
+        body = get_template(item.template_name).render(**(item.template_body or {}))
+    return await compose_message(item.subject, item.recipients, body, item.subtype)
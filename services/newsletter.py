@@ -0,0 +1,261 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi_mail.connection import Connection
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from db import db_helper
+from models import NewsletterJobModel, NewsletterStatus, NewsModel, UserModel
+from services.email import compose_message, conf, get_template, queue_email
+
+logger = logging.getLogger(__name__)
+
+NEWSLETTER_TEMPLATE = "news_email.html"
+# Класс advisory lock задач рассылки; второй ключ — id задачи
+NEWSLETTER_LOCK_ID = 7_201_106
+ACTIVE_STATUSES = (NewsletterStatus.pending, NewsletterStatus.running)
+
+recipients_filter = (UserModel.is_activated.is_(True), UserModel.is_banned.is_(False))
+
+
+def job_snapshot(job: NewsletterJobModel) -> dict:
+    end = job.finished_at or datetime.now(timezone.utc)
+    elapsed = (end - job.started_at).total_seconds() if job.started_at else 0.0
+    return {
+        "id": job.id,
+        "news_id": job.news_id,
+        "status": job.status,
+        "total": job.total,
+        "sent": job.sent,
+        "deferred": job.deferred,
+        "error": job.error,
+        "created_at": job.created_at,
+        "elapsed_seconds": round(elapsed, 3),
+        "emails_per_second": round(job.sent / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+async def queue_newsletter(
+    session: AsyncSession, news_id: int
+) -> Optional[NewsletterJobModel]:
+    """Ставит рассылку в очередь; None — по новости уже идёт рассылка.
+
+    Проверку делает частичный уникальный индекс ux_newsletter_jobs_news_id_active.
+    Выполнит задачу run_newsletter_worker одного из процессов.
+    """
+    job = await session.scalar(
+        pg_insert(NewsletterJobModel)
+        .values(
+            news_id=news_id,
+            status=NewsletterStatus.pending,
+            total=0,
+            sent=0,
+            deferred=0,
+            last_user_id=0,
+        )
+        .on_conflict_do_nothing(
+            index_elements=[NewsletterJobModel.news_id],
+            index_where=text("status IN ('pending', 'running')"),
+        )
+        .returning(NewsletterJobModel)
+    )
+    if job is not None:
+        # Завершённые задачи старше последних NEWSLETTER_JOBS_KEEP не нужны
+        keep = (
+            select(NewsletterJobModel.id)
+            .order_by(NewsletterJobModel.id.desc())
+            .limit(settings.NEWSLETTER_JOBS_KEEP)
+        )
+        await session.execute(
+            delete(NewsletterJobModel).where(
+                NewsletterJobModel.status.not_in(ACTIVE_STATUSES),
+                NewsletterJobModel.id.not_in(keep),
+            )
+        )
+    await session.commit()
+    return job
+
+
+async def get_newsletter_job(
+    session: AsyncSession, job_id: int
+) -> Optional[NewsletterJobModel]:
+    return await session.get(NewsletterJobModel, job_id)
+
+
+async def _update_job(job_id: int, **values):
+    async with db_helper.session_factory() as session:
+        await session.execute(
+            update(NewsletterJobModel)
+            .where(NewsletterJobModel.id == job_id)
+            .values(**values)
+        )
+        await session.commit()
+
+
+async def _send_share(
+    connection: Connection, job_id: int, subject: str, context: dict, recipients
+) -> list:
+    """Отправляет часть пачки по одному соединению, возвращает неотправленных."""
+    template = get_template(NEWSLETTER_TEMPLATE)
+    failed = []
+    for _, email, first_name in recipients:
+        try:
+            body = template.render(user_name=first_name, **context)
+            message = await compose_message(subject, [email], body)
+            await connection.session.send_message(message)
+        except Exception as error:
+            logger.warning("Newsletter %s to %s failed: %s", job_id, email, error)
+            failed.append((email, first_name))
+    return failed
+
+
+async def _save_progress(
+    job_id: int, subject: str, context: dict, chunk: list, failed: list
+):
+    """Счётчики пачки и её неотправленные письма — одной транзакцией.
+
+    Неотправленные уходят в outbox, который повторит их с backoff. Если
+    процесс упадёт до этой записи, пачка будет разослана повторно.
+    """
+    async with db_helper.session_factory() as session:
+        for email, first_name in failed:
+            queue_email(
+                session,
+                subject=subject,
+                recipients=[email],
+                template_name=NEWSLETTER_TEMPLATE,
+                template_body={"user_name": first_name, **context},
+            )
+        await session.execute(
+            update(NewsletterJobModel)
+            .where(NewsletterJobModel.id == job_id)
+            .values(
+                sent=NewsletterJobModel.sent + len(chunk) - len(failed),
+                deferred=NewsletterJobModel.deferred + len(failed),
+                last_user_id=chunk[-1].id,
+            )
+        )
+        await session.commit()
+
+
+async def _run_newsletter(session: AsyncSession, job: NewsletterJobModel):
+    """Рассылает новость активированным и незаблокированным пользователям.
+
+    Получатели читаются серверным курсором пачками по NEWSLETTER_CHUNK_SIZE
+    в транзакции session, которая держит lock задачи; каждая пачка делится
+    между NEWSLETTER_SMTP_CONNECTIONS соединениями.
+    """
+    news = await session.get(NewsModel, job.news_id)
+    subject = news.title
+    context = {
+        "news_title": news.title,
+        "news_summary": news.summary,
+        "news_link": f"{settings.FRONTEND_URL}/news/{news.slug}",
+    }
+    if job.started_at is None:
+        total = await session.scalar(
+            select(func.count()).select_from(UserModel).where(*recipients_filter)
+        )
+        await _update_job(
+            job.id, status=NewsletterStatus.running, total=total, started_at=func.now()
+        )
+    else:
+        logger.info("Resuming newsletter %s after user %s", job.id, job.last_user_id)
+
+    async with AsyncExitStack() as stack:
+        connections = [
+            await stack.enter_async_context(Connection(conf))
+            for _ in range(max(settings.NEWSLETTER_SMTP_CONNECTIONS, 1))
+        ]
+        result = await session.stream(
+            select(UserModel.id, UserModel.email, UserModel.first_name)
+            .where(*recipients_filter, UserModel.id > job.last_user_id)
+            .order_by(UserModel.id)
+            .execution_options(yield_per=settings.NEWSLETTER_CHUNK_SIZE)
+        )
+        async for chunk in result.partitions():
+            shares = await asyncio.gather(
+                *(
+                    _send_share(
+                        connection,
+                        job.id,
+                        subject,
+                        context,
+                        chunk[i :: len(connections)],
+                    )
+                    for i, connection in enumerate(connections)
+                )
+            )
+            failed = [recipient for share in shares for recipient in share]
+            await _save_progress(job.id, subject, context, chunk, failed)
+
+
+async def run_next_newsletter() -> bool:
+    """Выполняет одну незавершённую задачу, которую не выполняет другой воркер.
+
+    Возвращает False, если таких задач нет. Задача в статусе running без
+    владельца lock осталась от упавшего процесса и продолжается с last_user_id.
+    """
+    async with db_helper.session_factory() as session:
+        job_ids = (
+            await session.scalars(
+                select(NewsletterJobModel.id)
+                .where(NewsletterJobModel.status.in_(ACTIVE_STATUSES))
+                .order_by(NewsletterJobModel.id)
+            )
+        ).all()
+        for job_id in job_ids:
+            # Lock транзакции: снимается при её завершении или обрыве соединения
+            locked = await session.scalar(
+                select(func.pg_try_advisory_xact_lock(NEWSLETTER_LOCK_ID, job_id))
+            )
+            if not locked:
+                continue
+            # Пока lock ждал очереди, прежний владелец мог завершить задачу
+            job = await session.scalar(
+                select(NewsletterJobModel).where(
+                    NewsletterJobModel.id == job_id,
+                    NewsletterJobModel.status.in_(ACTIVE_STATUSES),
+                )
+            )
+            if job is None:
+                continue
+
+            try:
+                await _run_newsletter(session, job)
+            except asyncio.CancelledError:
+                # Остановка процесса: задачу продолжит другой воркер
+                raise
+            except Exception as error:
+                logger.exception("Newsletter %s failed", job.id)
+                await _update_job(
+                    job.id,
+                    status=NewsletterStatus.failed,
+                    error=str(error)[:1000],
+                    finished_at=func.now(),
+                )
+            else:
+                await _update_job(
+                    job.id, status=NewsletterStatus.done, finished_at=func.now()
+                )
+            return True
+    return False
+
+
+async def run_newsletter_worker():
+    while True:
+        try:
+            ran = await run_next_newsletter()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Newsletter worker failed")
+            ran = False
+        if not ran:
+            await asyncio.sleep(settings.NEWSLETTER_POLL_INTERVAL_SECONDS)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from fastapi_mail.connection import Connection
+from sqlalchemy import select
+
+from core.config import settings
+from db import db_helper
+from models import EmailOutboxModel, OutboxStatus
+from services.email import build_message, conf
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    delay = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX_SECONDS))
+
+
+def _mark_failed(item: EmailOutboxModel, error: Exception):
+    item.attempts += 1
+    item.last_error = str(error)[:1000]
+    if item.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        item.status = OutboxStatus.failed
+    else:
+        item.next_attempt_at = datetime.now(timezone.utc) + _retry_delay(item.attempts)
+
+
+async def deliver_pending_emails() -> int:
+    """Отправляет одну пачку писем через одно SMTP-соединение.
+
+    Строки блокируются через SKIP LOCKED, поэтому несколько воркеров
+    не отправят одно письмо дважды. Возвращает размер пачки.
+    """
+    async with db_helper.session_factory() as session:
+        items = (
+            await session.scalars(
+                select(EmailOutboxModel)
+                .where(
+                    EmailOutboxModel.status == OutboxStatus.pending,
+                    EmailOutboxModel.next_attempt_at <= datetime.now(timezone.utc),
+                )
+                .order_by(EmailOutboxModel.next_attempt_at)
+                .limit(settings.OUTBOX_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        if not items:
+            return 0
+
+        remaining = list(items)
+        try:
+            async with Connection(conf) as connection:
+                while remaining:
+                    item = remaining.pop(0)
+                    try:
+                        message = await build_message(item)
+                        await connection.session.send_message(message)
+                    except Exception as error:
+                        logger.warning("Email %s failed: %s", item.id, error)
+                        _mark_failed(item, error)
+                    else:
+                        item.attempts += 1
+                        item.status = OutboxStatus.sent
+                        item.sent_at = datetime.now(timezone.utc)
+        except Exception as error:
+            # SMTP-соединение недоступно — откладываем неотправленный остаток
+            logger.warning("SMTP connection failed: %s", error)
+            for item in remaining:
+                _mark_failed(item, error)
+
+        await session.commit()
+        return len(items)
+
+
+async def run_outbox_worker():
+    while True:
+        try:
+            delivered = await deliver_pending_emails()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Outbox delivery failed")
+            delivered = 0
+        # Полная пачка — скорее всего, есть ещё письма, не ждём
+        if delivered < settings.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
@@ -0,0 +1,36 @@
+import asyncio
+import logging
+
+from core.config import settings
+from crud.statistics import refresh_statistics_counters, refresh_statistics_daily
+from db import db_helper
+
+logger = logging.getLogger(__name__)
+
+
+async def run_statistics_refresher():
+    """Пересчитывает снимок счётчиков статистики на primary."""
+    while True:
+        try:
+            async with db_helper.session_factory() as session:
+                await refresh_statistics_counters(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Statistics refresh failed")
+        await asyncio.sleep(settings.STATISTICS_REFRESH_INTERVAL_SECONDS)
+
+
+async def run_statistics_rollup():
+    """Пересчитывает дневные агрегаты за дни, изменившиеся с прошлого запуска."""
+    while True:
+        try:
+            async with db_helper.session_factory() as session:
+                refreshed = await refresh_statistics_daily(session)
+            if refreshed:
+                logger.info("Refreshed %d daily statistics rollups", refreshed)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Statistics rollup failed")
+        await asyncio.sleep(settings.STATISTICS_ROLLUP_INTERVAL_SECONDS)
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+
+from core.config import settings
+from core.ratelimit import delete_expired_windows
+from crud.tokens import delete_expired_tokens
+from db import db_helper
+
+logger = logging.getLogger(__name__)
+
+
+async def _sweep(delete_batch) -> int:
+    deleted = 0
+    async with db_helper.session_factory() as session:
+        while True:
+            batch = await delete_batch(session, settings.TOKEN_SWEEP_BATCH_SIZE)
+            deleted += batch
+            if batch < settings.TOKEN_SWEEP_BATCH_SIZE:
+                return deleted
+
+
+async def sweep_expired_tokens() -> int:
+    return await _sweep(delete_expired_tokens)
+
+
+async def sweep_expired_rate_limits() -> int:
+    return await _sweep(delete_expired_windows)
+
+
+async def run_sweeper():
+    """Периодически удаляет просроченные refresh-сессии и окна rate limit."""
+    while True:
+        try:
+            deleted = await sweep_expired_tokens()
+            if deleted:
+                logger.info("Removed %d expired refresh sessions", deleted)
+            await sweep_expired_rate_limits()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Sweep failed")
+        await asyncio.sleep(settings.TOKEN_SWEEP_INTERVAL_SECONDS)
@@ -0,0 +1,25 @@
+"""Тесты работают с базой из DATABASE_URL: перед запуском к ней применяются
+миграции, а данные тестов откатываются или удаляются после них. Нужна
+отдельная, не рабочая база.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import settings
+from db.migrate import upgrade
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    async def migrate():
+        engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+        try:
+            await upgrade(engine)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(migrate())
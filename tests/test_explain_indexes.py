@@ -0,0 +1,10 @@
+import asyncio
+
+from benchmarks.explain_indexes import check_plans
+
+
+def test_key_queries_avoid_sequential_scans():
+    plans = asyncio.run(check_plans())
+
+    seq_scans = {name: scans for name, tables, scans in plans if tables}
+    assert not seq_scans, f"Sequential scans in key queries: {seq_scans}"
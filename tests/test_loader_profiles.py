@@ -0,0 +1,16 @@
+import asyncio
+
+from benchmarks.loader_profiles import check_profiles
+from crud.loaders import LOADER_PROFILES
+
+
+def test_loader_profiles_load_only_what_they_declare():
+    results = asyncio.run(check_profiles())
+
+    assert {profile for profile, _, _, _ in results} == set(LOADER_PROFILES)
+    mismatches = {
+        f"{profile}: {name}": problems
+        for profile, name, problems, _ in results
+        if problems
+    }
+    assert not mismatches, f"Loader profiles load more than declared: {mismatches}"
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+import main
+from core.cache import principal_cache
+from core.config import settings
+from core.security import create_access_token
+from db import db_helper
+from db.querycount import instrument, query_budget, track_queries
+from models import UserModel
+
+PREFIX = "test-budget-"
+PARTICIPANTS = 12
+
+SEED = [
+    f"""
+    INSERT INTO users (username, email, password, first_name, last_name,
+                       is_activated, roles, is_banned)
+    SELECT '{PREFIX}' || g, '{PREFIX}' || g || '@example.com', 'x', 'Имя',
+           'Фамилия', true, ARRAY['guest'], false
+    FROM generate_series(0, {PARTICIPANTS}) g
+    """,
+    f"""
+    INSERT INTO hikes (name, slug, tourism_type, complexity, leader_id,
+                       participants_count, route, start_date, end_date,
+                       report_s3_key, route_s3_key, status, created_by)
+    SELECT '{PREFIX}' || g, '{PREFIX}' || g, 'горный', '2', u.id, 8, 'route',
+           current_date, current_date, 'r', 'g', 'PUBLISHED', u.id
+    FROM generate_series(1, 3) g, users u
+    WHERE u.username = '{PREFIX}0'
+    """,
+    f"""
+    INSERT INTO hike_participants (user_id, hike_id, role)
+    SELECT u.id, h.id, 'participant'
+    FROM users u, hikes h
+    WHERE u.username LIKE '{PREFIX}%' AND h.slug = '{PREFIX}1'
+    """,
+]
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def hike_id(client):
+    async def seed():
+        async with db_helper.engine.begin() as conn:
+            for statement in SEED:
+                await conn.execute(text(statement))
+            return await conn.scalar(
+                text(f"SELECT id FROM hikes WHERE slug = '{PREFIX}1'")
+            )
+
+    async def cleanup():
+        # Походы и участия удаляются каскадом вместе с пользователями
+        async with db_helper.engine.begin() as conn:
+            await conn.execute(
+                text(f"DELETE FROM users WHERE username LIKE '{PREFIX}%'")
+            )
+
+    hike_id = client.portal.call(seed)
+    yield hike_id
+    client.portal.call(cleanup)
+
+
+@pytest.fixture(scope="module")
+def guest(client, hike_id):
+    async def load_user():
+        async with db_helper.session_factory() as session:
+            return await session.scalar(
+                select(UserModel).where(UserModel.username == f"{PREFIX}0")
+            )
+
+    user = client.portal.call(load_user)
+    # Токен без claims: пользователь грузится из базы, как в AUTH_FAST_MODE=false
+    client.cookies.set("access_token", create_access_token(user.username))
+    return user
+
+
+@pytest.fixture(autouse=True)
+def cold_principal_cache():
+    # Бюджеты ниже включают запрос пользователя для проверки роли
+    principal_cache.clear()
+
+
+def test_hike_list_budget(client, guest):
+    with query_budget(3):
+        response = client.get("/api/archive/hikes", params={"limit": 50})
+    assert response.status_code == 200
+
+
+def test_hike_detail_budget(client, guest, hike_id):
+    with query_budget(3):
+        response = client.get(f"/api/archive/hikes/{hike_id}")
+    assert response.status_code == 200
+
+
+def test_hike_detail_with_zoom_skips_full_track(client, guest, hike_id):
+    # Пользователь, поход, руководитель и уровень трека
+    with query_budget(4) as collected:
+        response = client.get(f"/api/archive/hikes/{hike_id}", params={"zoom": 10})
+    assert response.status_code == 200
+    statements = [s for stats in collected for s in stats.statements]
+    assert not [s for s in statements if "hikes.geojson_data" in s]
+
+
+def test_hike_participants_budget(client, guest, hike_id):
+    with query_budget(4):
+        response = client.get(f"/api/archive/hikes/{hike_id}/participants")
+    assert response.status_code == 200
+    assert len(response.json()["detail"]) == PARTICIPANTS + 1
+
+
+def test_query_budget_reports_excess(client, guest, hike_id):
+    with pytest.raises(AssertionError, match="Query budget of 1 exceeded"):
+        with query_budget(1):
+            client.get(f"/api/archive/hikes/{hike_id}/participants")
+
+
+def test_repeated_statement_logged_as_n_plus_one(caplog):
+    async def load_one_by_one():
+        engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+        instrument(engine)
+        try:
+            async with engine.connect() as conn:
+                for user_id in range(settings.DB_N_PLUS_ONE_THRESHOLD):
+                    await conn.execute(
+                        select(UserModel.id).where(UserModel.id == user_id)
+                    )
+        finally:
+            await engine.dispose()
+
+    with caplog.at_level(logging.WARNING, logger="db.querycount"):
+        with track_queries("load_one_by_one") as stats:
+            asyncio.run(load_one_by_one())
+
+    assert stats.count == settings.DB_N_PLUS_ONE_THRESHOLD
+    assert "Possible N+1 in load_one_by_one" in caplog.text